@@ -5,6 +5,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.archive import ArchiveReader
 
 # ==================== #
 # ==== PARAMETERS ==== #
@@ -20,11 +24,22 @@ import os
 #PATH_WAY  = "data/2025-12-19/data_2025-12-19-T13-14-16_-60_60_0.5_0.339.csv" # 19.12.2025
 PATH_WAY  = "data/2025-12-19/data_2025-12-19-T14-14-12_-60_60_0.5_0.276.csv" # 19.12.2025
 
+# Alternativ ein Rohdaten-Archiv von rot_live.py neu auswerten (None = CSV von oben)
+ARCHIVE_PATH = None # z. B. "data/2026-01-12/raw_2026-01-12-T09-00-00"
+ARCHIVE_SCAN = None # None = letzter Scan im Archiv
+FILTER = "hampel"   # "hampel" wie im Live-Pfad (k=15, t0=3), None = ungefiltert
+DB_MODE = "power"   # "power" = 10*log10 wie rot_live.py, "amplitude" = 20*log10
+
 # ==================== #
 # ==== Load Data ===== #
 # ==================== #
 #print("start")
-df = pd.read_csv(PATH_WAY, sep=",")
+if ARCHIVE_PATH is None:
+    df = pd.read_csv(PATH_WAY, sep=",")
+else:
+    reader = ArchiveReader(ARCHIVE_PATH)
+    scan = reader.scans()[-1] if ARCHIVE_SCAN is None else ARCHIVE_SCAN
+    df = reader.reprocess(scan, filter=FILTER, db_mode=DB_MODE)
 #print(df.info)
 
 # ==================== #
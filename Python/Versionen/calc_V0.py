@@ -3,6 +3,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import time
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.outliers import remove_outliers
+from masterarbeit.ringbuffer import RingBuffer
 
 # -----------------------------
 # DAQ-Konfiguration
@@ -11,25 +16,6 @@ CHANNEL = "Dev1/ai0"  # Dein Messkanal
 SAMPLE_RATE = 2000     # Hz, Sample Rate
 BLOCK_SIZE = 500       # Anzahl Samples pro Lesevorgang
 
-# -----------------------------
-# Outlier-Removal (MAD Methode)
-# -----------------------------
-def remove_outliers(data, k=15, t0=3):
-    data = np.array(data)
-    mask = np.ones(len(data), dtype=bool)
-    for i in range(len(data)):
-        left = max(0, i - k)
-        right = min(len(data), i + k + 1)
-        window = data[left:right]
-        med = np.median(window)
-        mad = np.median(np.abs(window - med))
-        if mad == 0:
-            continue
-        z = 0.6745 * (data[i] - med) / mad
-        if abs(z) > t0:
-            mask[i] = False
-    return data[mask]
-
 # -----------------------------
 # Plot vorbereiten
 # -----------------------------
@@ -46,16 +32,18 @@ text_timer = ax.text(0.02, 0.82, "", transform=ax.transAxes, color='blue', fonts
 # -----------------------------
 # Variablen
 # -----------------------------
+SAVE_DURATION = 20  # Sekunden Aufnahme für Referenz oder Messung
+BUFFER_SIZE = SAMPLE_RATE * SAVE_DURATION + 4 * BLOCK_SIZE  # Platz für eine ganze Aufnahme
+
 V0 = None
 is_ref_mode = False
-ref_buffer = []
+ref_buffer = RingBuffer(BUFFER_SIZE)
 ref_start_time = None
 
 is_recording = False
-rec_buffer = []
+rec_buffer = RingBuffer(BUFFER_SIZE)
 rec_start_time = None
-
-SAVE_DURATION = 20  # Sekunden Aufnahme für Referenz oder Messung
+x_axis = np.arange(BLOCK_SIZE)
 
 results = {"mean": [], "std": []}
 
@@ -70,8 +58,8 @@ task.timing.cfg_samp_clk_timing(rate=SAMPLE_RATE)
 # Tastatur-Ereignisse
 # -----------------------------
 def on_key(event):
-    global is_ref_mode, ref_buffer, ref_start_time
-    global is_recording, rec_buffer, rec_start_time, V0
+    global is_ref_mode, ref_start_time
+    global is_recording, rec_start_time, V0
 
     if event.key == 'q':
         print("Beenden...")
@@ -80,7 +68,7 @@ def on_key(event):
     elif event.key == 'p':
         print("Referenzmessung gestartet (V0 bestimmen)...")
         is_ref_mode = True
-        ref_buffer = []
+        ref_buffer.mark()
         ref_start_time = time.time()
         ax.set_ylabel("Voltage (V)")  # Y-Achse vor Referenzmessung
 
@@ -90,7 +78,7 @@ def on_key(event):
             return
         print("Messung gestartet...")
         is_recording = True
-        rec_buffer = []
+        rec_buffer.mark()
         rec_start_time = time.time()
 
     elif event.key == 's':
@@ -116,12 +104,12 @@ try:
 
         # --- Referenzmodus (p) ---
         if is_ref_mode:
-            ref_buffer.extend(clean)
+            ref_buffer.append_block(clean)
             elapsed = time.time() - ref_start_time
             remaining = max(0, SAVE_DURATION - elapsed)
             text_timer.set_text(f"Referenzmessung: {remaining:.0f}s")
             if elapsed >= SAVE_DURATION:
-                V0 = np.mean(ref_buffer)
+                V0 = np.mean(ref_buffer.since_mark())
                 print(f"Referenz gesetzt: V0 = {V0:.4f} V")
                 is_ref_mode = False
                 ax.set_ylabel("Voltage (dB)")  # nach Referenz in dB
@@ -130,20 +118,20 @@ try:
         # --- Aufnahmemodus (m) ---
         if is_recording:
             data_db = 20*np.log10(np.maximum(np.abs(clean)/V0, 1e-12))
-            rec_buffer.extend(data_db)
+            rec_buffer.append_block(data_db)
             elapsed = time.time() - rec_start_time
             remaining = max(0, SAVE_DURATION - elapsed)
             text_timer.set_text(f"Messung läuft: {remaining:.0f}s")
             if elapsed >= SAVE_DURATION:
-                results["mean"].append(np.mean(rec_buffer))
-                results["std"].append(np.std(rec_buffer))
+                results["mean"].append(np.mean(rec_buffer.since_mark()))
+                results["std"].append(np.std(rec_buffer.since_mark()))
                 print(f"Messung gespeichert: mean={results['mean'][-1]:.2f} dB, std={results['std'][-1]:.2f} dB")
                 is_recording = False
                 text_timer.set_text("")
 
         # --- Plot ---
         display_data = clean if V0 is None else 20*np.log10(np.maximum(np.abs(clean)/V0, 1e-12))
-        line.set_xdata(np.arange(len(display_data)))
+        line.set_xdata(x_axis[:len(display_data)])
         line.set_ydata(display_data)
         ax.set_xlim(0, len(display_data))
         ax.set_ylim(min(display_data)-0.5, max(display_data)+0.5)
@@ -1,6 +1,10 @@
 import nidaqmx
 import numpy as np
 import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.outliers import remove_outliers
 
 CHANNEL = "Dev1/ai0"
 SAMPLE_RATE = 2000
@@ -21,26 +25,10 @@ ax.grid(True)
 text_mean = fig.text(0.15, 0.9, "---")
 text_std = fig.text(0.15, 0.85, "---")
 
-def remove_outliers(data, k=20, t0=3):
-    mask = np.ones(len(data), dtype=bool)
-    for i in range(len(data)):
-        start = max(0, i-k)
-        end =min(len(data), i+k)
-        window = data[start:end]
-        
-        med = np.median(window)
-        mad = np.median(np.abs(window - med))
-        if mad == 0:
-            continue
-        z_score = 0.6745 * (data[i] - med) / mad
-        if np.abs(z_score) > t0:
-            mask[i] = False
-        return data[mask]
-
 try:
     while True:
         data_raw = np.array(task.read(number_of_samples_per_channel=int(SAMPLE_RATE * DISPLAY_WINDOW)))
-        data_clean = remove_outliers(data_raw)
+        data_clean = remove_outliers(data_raw, k=20)
         t = np.linspace(0, DISPLAY_WINDOW, len(data_clean))
         line.set_xdata(t)
         line.set_ydata(data_clean)
@@ -5,6 +5,10 @@ from matplotlib.widgets import TextBox
 import pandas as pd
 import time
 import serial
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.outliers import remove_outliers
 
 # -----------------------------
 # DAQ-Konfiguration
@@ -13,25 +17,6 @@ CHANNEL = "Dev1/ai0"  # Dein Messkanal
 SAMPLE_RATE = 2000     # Hz, Sample Rate
 BLOCK_SIZE = 500       # Anzahl Samples pro Lesevorgang
 
-# -----------------------------
-# Outlier-Removal (MAD Methode)
-# -----------------------------
-def remove_outliers(data, k=15, t0=3):
-    data = np.array(data)
-    mask = np.ones(len(data), dtype=bool)
-    for i in range(len(data)):
-        left = max(0, i - k)
-        right = min(len(data), i + k + 1)
-        window = data[left:right]
-        med = np.median(window)
-        mad = np.median(np.abs(window - med))
-        if mad == 0:
-            continue
-        z = 0.6745 * (data[i] - med) / mad
-        if abs(z) > t0:
-            mask[i] = False
-    return data[mask]
-
 # -----------------------------
 # Rotation
 # -----------------------------
@@ -7,6 +7,9 @@ from datetime import datetime
 import time
 from pathlib import Path
 import serial
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.outliers import remove_outliers
 
 # =================================== #
 # ============ Variablen ============ #
@@ -59,25 +62,6 @@ task = nidaqmx.Task()
 task.ai_channels.add_ai_voltage_chan(CHANNEL)
 task.timing.cfg_samp_clk_timing(rate=SAMPLE_RATE)
 
-# =================================== #
-# == Outlier-Removal (MAD Methode) == #
-# =================================== #
-def remove_outliers(data, k=15, t0=3):
-    data = np.array(data)
-    mask = np.ones(len(data), dtype=bool)
-    for i in range(len(data)):
-        left = max(0, i - k)
-        right = min(len(data), i + k + 1)
-        window = data[left:right]
-        med = np.median(window)
-        mad = np.median(np.abs(window - med))
-        if mad == 0:
-            continue
-        z = 0.6745 * (data[i] - med) / mad
-        if abs(z) > t0:
-            mask[i] = False
-    return data[mask]
-
 # =================================== #
 # =========== FUNKTIONEN ============ #
 # =================================== #
@@ -1,148 +1,129 @@
 # =================================== #
 # ============= Packete ============= #
 # =================================== #
-import nidaqmx
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import TextBox
-import pandas as pd
 from datetime import datetime
-import time
 from pathlib import Path
-import serial
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.stats import to_db
+from masterarbeit.ringbuffer import RingBuffer
+from masterarbeit.liveplot import BlitRenderer
+from masterarbeit.decimate import decimate, display_points
+from masterarbeit.patternview import PatternView
+from masterarbeit.acquisition import AcquisitionEngine
+from masterarbeit.archive import ArchiveWriter
+from masterarbeit.motor import MotorModel, SerialMotor, SimulatedMotor
+from masterarbeit.sources import RealClock, SimulatedSource
+from masterarbeit.planner import MotionPlanner, SpeedModel
+from masterarbeit.scan import STATE_IDLE, Scan
 
 # =================================== #
 # ============ Variablen ============ #
 # =================================== #
-MOTOR_SETTLE_TIME = 7.0
-motor_busy = False
-motor_read_time = 0.0
+# Ohne Messaufbau testen: simuliertes DAQ-Signal und simulierter Drehtisch
+SIMULATE = False
+# Serieller Port des Drehtischs; zum Testen ohne Drehtisch den Port des
+# Emulators eintragen (python -m masterarbeit.emulator gibt ihn aus)
+MOTOR_PORT = "COM12"
+# Befehl für die Positionsabfrage (Antwort mit dem Ist-Winkel); None = Winkel nicht zurücklesen.
+# "pos" kennt bisher nur der Emulator; antwortet der Controller nicht, wird beim Verbinden abgeschaltet
+POSITION_CMD = None
+POSITION_REPLY = "POS"  # Anfang der Antwort darauf; None = jede Zeile mit einer Zahl
+# Gemessenes Fahrzeitmodell des Drehtischs, anlegen mit (aus dem Ordner Python/):
+#     python -m masterarbeit.scan --fit-speed --port COM12 --position-cmd pos
+SPEED_MODEL_FILE = "speed_model.json"
 
-# Zum Referenzwert messen
-V0 = None # 
-ref_buffer = []
-
-# Zum Aufnehmen der Messpunkte
-rec_buffer_db = []
-rec_buffer = []
-results = {"angle": [], "mean_db": [], "std_db": [], "mean_raw": [], "std_raw": []}
-SAVE_DURATION = 10  # Sekunden Aufnahme für Referenz oder Messung # 
-timer_start = None
-
-# Zum Finden der maximalen Spannung
-max_buffer = {}
-current_angles = []
-angle_index = 0
-best_angle = None   # Winkel mit der höchsten Spannung
-max_angle_start = -40 
-max_angle_stop = 40
-angle_step = 10
-DURATION_FIND_MAXIMUM = 5 # 
-
-# Für den Motor
-ser = serial.Serial("COM12", 115200, timeout=1) # Kommunikation
-ang = 0 # Aktueller Winkel  
-measure_start = -60             # Startwinkel für die Messung
-measure_stop = 60               # Stoppwinkel für die Messung
-step = 0.5
-
-#Für die Kalibrierung
-do_calibration = False
+# DAQ-Konfiguration
+CHANNEL = "Dev1/ai0"    # Dein Messkanal; mehrere z. B. "Dev1/ai0:3" (ai0 = Empfänger, Rest als mean_ai1 ... im Ergebnis)
+SAMPLE_RATE = 2000      # Hz, Sample Rate
+BLOCK_SIZE = 500        # Anzahl Samples pro Lesevorgang
+FPS = 20                # höchstens so viele Bilder pro Sekunde in der Live-Anzeige
 
-# ZUSTÄNDE 
-STATE_IDLE = "IDLE"
-STATE_REF = "REF"
-STATE_MEASURE = "MEASURE"
-STATE_MEASURE_WAIT = "MEASURE_WAIT"
-STATE_FIND_MAX = "FIND_MAX"
-STATE_FIND_MAX_WAIT = "FIND_MAX_WAIT"
+# Live-Anzeige: immer die letzten BLOCK_SIZE bereinigten Samples
+live_buffer = RingBuffer(BLOCK_SIZE)
+x_axis = np.arange(BLOCK_SIZE)
 
-STATE_CALIBRATE_START = "CALIBRATE_START"
-STATE_CALIBRATE_CAL= "CALIBRATE_CAL"
-STATE_CALIBRATE_MOVE2 = "CALIBRATE_MOVE2"
-STATE_CALIBRATE_TEST= "CALIBRATE_TEST"
-STATE_CALIBRATE_DONE = "CALIBRATE_DONE"
-CALIBRATE_WAIT = 70 # Sekunden
+# Zweites Fenster mit dem Antennendiagramm, Punkt für Punkt während der Messung
+PATTERN_VIEW = True
+REFERENCE_CSV = None    # z. B. "data/2025-12-19/data_2025-12-19-T14-14-12_-60_60_0.5_0.276.csv" zum Vergleich
 
-state = STATE_IDLE
+# Rohdaten-Archiv: jeder Block aus REF / FIND_MAX / MEASURE wird mitgeschrieben
+ARCHIVE = True
 
-# DAQ-Konfiguration
-CHANNEL = "Dev1/ai0"    # Dein Messkanal
-SAMPLE_RATE = 2000      # Hz, Sample Rate
-BLOCK_SIZE = 500        # Anzahl Samples pro Lesevorgang
+# Abgebrochene Messung fortsetzen: Checkpoint eintragen, r kalibriert und setzt dann fort
+RESUME_CHECKPOINT = None  # z. B. "2026-10-18/checkpoint_2026-10-18-T09-30-00.jsonl"
 
 # =================================== #
 # ======= DAQ-Task erstellen ======== #
 # =================================== #
-task = nidaqmx.Task()
-task.ai_channels.add_ai_voltage_chan(CHANNEL)
-task.timing.cfg_samp_clk_timing(rate=SAMPLE_RATE)
+# Liest kontinuierlich in einem eigenen Thread, auch während plt.pause / Motorfahrt
+clock = RealClock()
+if SIMULATE:
+    model = MotorModel(clock)
+    motor = SimulatedMotor(model)
+    engine = SimulatedSource(clock, motor=model, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, channels=CHANNEL)
+else:
+    motor = SerialMotor(MOTOR_PORT, 115200, timeout=1, position_cmd=POSITION_CMD, position_reply=POSITION_REPLY)
+    engine = AcquisitionEngine(CHANNEL, SAMPLE_RATE, BLOCK_SIZE)
+engine.start()
+
+archive = None
+if ARCHIVE:
+    archive = ArchiveWriter(Path(datetime.now().strftime("%Y-%m-%d")) / datetime.now().strftime("raw_%Y-%m-%d-T%H-%M-%S"),
+                            SAMPLE_RATE, CHANNEL)
+
+# Ablauf (Referenz, Maximum, Messung, Kalibrierung) steckt in masterarbeit.scan
+scan = Scan(motor, clock, sample_rate=SAMPLE_RATE, archive=archive, source=engine)
+scan.motor_settle_time = 7.0    # Obergrenze, meist ist der Tisch früher eingeschwungen
+scan.settle_detection = True
+scan.save_duration = 10         # Sekunden Aufnahme für Referenz, bei der Messung Obergrenze
+scan.adaptive_dwell = True      # Messung pro Winkel beenden, sobald mean_db genau genug ist
+scan.dwell_min = 1.0
+scan.dwell_target_se = 0.01     # dB
+scan.find_max_duration = 5
+scan.measure_start = -60        # Startwinkel für die Messung
+scan.measure_stop = 60          # Stoppwinkel für die Messung
+scan.step = 0.5
+scan.sweep_speed = 1            # Taste c: durchgehende Fahrt mit diesem speed, Bins à step
+scan.measure_mode = "grid"      # "adaptive": grob messen, nur an Flanken und Nullstellen verfeinern
+scan.position_feedback = SIMULATE or POSITION_CMD is not None   # Ist-Winkel in Ergebnis und Archiv
+# Fahrplanung: Punkte in einem Durchlauf, immer von kleineren Winkeln her anfahren (Umkehrspiel).
+if SIMULATE:
+    speed_model = SpeedModel.from_model(model)
+elif Path(SPEED_MODEL_FILE).exists():
+    speed_model = SpeedModel.load(SPEED_MODEL_FILE)
+else:
+    # nur geraten: Zwischenfahrten, Einschwingfenster und Sweep-Ende hängen an dieser Schätzung
+    speed_model = SpeedModel()
+    print(f"{SPEED_MODEL_FILE} fehlt, Fahrzeiten nur geschätzt ({speed_model}); mit --fit-speed messen")
+scan.planner = MotionPlanner(speed_model, approach=1, overshoot=1.0, step_speed=5, travel_speed=15)
 
 # =================================== #
 # =========== FUNKTIONEN ============ #
 # =================================== #
-def remove_outliers(data):
-    data = np.asarray(data)
-    if len(data) < 10:
-        return data
+resume_pending = False    # r: nach der Kalibrierung mit RESUME_CHECKPOINT fortsetzen
 
-    # global
-    med = np.median(data)
-    mad = np.median(np.abs(data - med))
-    if mad == 0:
-        return data
-
-    z = 0.6745 * (data - med) / mad
-    data = data[np.abs(z) < 4]
-
-    return data
-
-def send(cmd):
-    global ang
-    ser.write((cmd + "\r").encode())
-    response = ser.read_all().decode(errors="ignore").strip()
-    if cmd.lower().startswith("move"):
-        ang = float(cmd.split()[1])
-        text_angle.set_text(f"Winkel: {ang}°")
-    return response
-
-def move_motor(angle, speed=5):
-    global motor_busy, motor_read_time
-    send(f"Move {angle} {speed}")
-    motor_busy = True
-    motor_read_time = time.time() + MOTOR_SETTLE_TIME
-    
-def motor_ready():
-    global motor_busy, motor_read_time
-    if not motor_busy:
-        return True
-    if time.time() >= motor_read_time:
-        motor_busy = False
-        return True
-    return False
+def resume_measurement():
+    """Checkpoint übernehmen, sobald die Kalibrierung von r fertig ist (aus der Hauptschleife)."""
+    global resume_pending
+    resume_pending = False
+    if scan.resume(RESUME_CHECKPOINT) and pattern is not None:
+        pattern.clear()
+        pattern.extend(scan.results["angle"], scan.results["mean_db"], scan.results["std_db"])
 
 def submit_move(text):
     try:
         angle = float(text)
-        send(f"move {angle} 5")
+        # kehrt sofort zurück, Einschwingen erkennt die Hauptschleife über scan.process
+        scan.move_motor(angle, speed=5)
         print(f"Motor fährt zu {angle}°")
-        time.sleep(5)
         move_box.set_val("")
     except ValueError:
         print("Ungültiger Winkel.")
 
-def save(results=results):
-    global measure_start, measure_stop, step, V0
-    if len(results["mean_db"]) == 0:
-        print("Keine Messdaten zum Speichern.")
-        return
-    df = pd.DataFrame(results)
-    today = datetime.now().strftime("%Y-%m-%d")
-    time_stamp = datetime.now().strftime("%Y-%m-%d-T%H-%M-%S")
-    Path(today).mkdir(exist_ok=True)
-    df.to_csv(f"{today}/data_{time_stamp}_{measure_start}_{measure_stop}_{step}_{V0:.3f}.csv", index=False)
-    print(f"Daten gespeichert in data_{time_stamp}_{measure_start}_{measure_stop}_{step}_{V0}.csv")
-    
 # =================================== #
 # ======== Plot vorbereiten ========= #
 # =================================== #
@@ -162,49 +143,60 @@ text_angle = ax.text(0.7, 1.07, "", transform=ax.transAxes, color='green', fonts
 axbox = plt.axes([0.25, 0.05, 0.5, 0.07])
 move_box = TextBox(axbox, "Fahre zu Winkel (°): ", initial = "")
 move_box.on_submit(submit_move) 
+ax.set_xlim(0, BLOCK_SIZE)
+
+# nur Kurve und Texte werden pro Frame neu gezeichnet, der Rest ist gespeicherter Hintergrund
+renderer = BlitRenderer(fig, [line, text_mean, text_std, text_timer, text_angle], fps=FPS)
+
+pattern = None
+if PATTERN_VIEW:
+    pattern = PatternView(REFERENCE_CSV, span=(scan.measure_start, scan.measure_stop))
+    scan.on_result = pattern.extend
+plt.show(block=False)
 
 # =================================== #
 # ======= Tastatur-Ereignisse ======= #
 # =================================== #
 def on_key(event):
-    global state, timer_start, ref_buffer, current_angles, angle_index
-    global max_buffer, angle_step, max_angle_start, max_angle_stop
-
+    global resume_pending
+    if event.key in ("p", "m", "w", "k", "c") and resume_pending:
+        print("Fortsetzen abgebrochen.")
+        resume_pending = False
     if event.key == 'q':
         print("Beenden...")
         plt.close(fig)
 
     elif event.key == 'p':
-        print("Referenzmessung gestartet (V0 bestimmen)...")
-        ref_buffer = []
-        timer_start = time.time()
         ax.set_ylabel("Voltage (V)")  # Y-Achse vor Referenzmessung
-        state = STATE_REF
+        renderer.invalidate()
+        scan.start_ref()
 
     elif event.key == 'm':
-        if V0 is None or best_angle is None:
-            print("V0 oder best_angle noch nicht gesetzt! Erst p oder w drücken.")
-            return
-        results = {k: [] for k in results}
-        print("Messung gestartet...")
-        current_angles = np.round(
-            np.arange(measure_start, measure_stop + step, step) + best_angle, 3)
-        angle_index = 0
-        state = STATE_MEASURE
+        if scan.start_measure() and pattern is not None:
+            pattern.clear()
         
     elif event.key =="w":
-        print("Finde Maximum")
-        max_angle_start = -40 
-        max_angle_stop = 40
-        angle_step = 10
-        state = STATE_FIND_MAX
+        scan.start_find_max()
         
     elif event.key == "k":
-        print("Starte Kalibrierung des Motors")
-        state = STATE_CALIBRATE_START
+        scan.start_calibration()
+        
+    elif event.key == "c":
+        if scan.start_sweep() and pattern is not None:
+            pattern.clear()
         
+    elif event.key == 'r':
+        if RESUME_CHECKPOINT is None:
+            print("RESUME_CHECKPOINT ist nicht gesetzt.")
+        elif scan.state != STATE_IDLE or resume_pending:
+            print("Fortsetzen geht nur, wenn gerade nichts läuft.")
+        else:
+            # wie --resume: Drehtisch erst neu referenzieren, fortgesetzt wird in der Hauptschleife
+            resume_pending = True
+            scan.start_calibration()
+
     elif event.key == 's':
-        save()
+        scan.save()
 
 fig.canvas.mpl_connect('key_press_event', on_key)
 
@@ -215,131 +207,59 @@ try:
     print(f"""Drücke:
     p zur Messung von V0
     m für eine Messung
+    c für einen schnellen Sweep (durchgehende Fahrt)
     s zum speichern
     w zum finden eines Maximums
     k zur Kalibrierung
+    r zum Fortsetzen einer abgebrochenen Messung (RESUME_CHECKPOINT, vorher Kalibrierung)
     q zum schließen \n""")
     while plt.fignum_exists(fig.number): # Solange das Fenster existiert
         
-        # Auf den Motor warten
-        if not motor_ready():
-            plt.pause(0.1)
+        # Auf den Motor warten (Kalibrierung), Daten verwerfen
+        if scan.waiting():
+            engine.clear()
+            text_angle.set_text(f"Winkel: {scan.angle:.2f}°")
+            renderer.pause(0.1)
             continue
         
-        # Live Daten
-        data = np.array(task.read(number_of_samples_per_channel=BLOCK_SIZE))
-        clean = remove_outliers(data)
+        # Live Daten (kurzes Timeout, damit die GUI bedienbar bleibt)
+        block = engine.get_block(timeout=1 / FPS)
+        if block is None:
+            renderer.draw()
+            continue
+        clean = scan.process(block)  # Filter, Statistik, Zustände
+        if resume_pending and scan.state == STATE_IDLE:
+            resume_measurement()
         
-        if len(clean):
-            display_data = clean if V0 is None else 10*np.log10(np.maximum(np.abs(clean)/V0, 1e-12))
-            line.set_xdata(np.arange(len(display_data)))
-            line.set_ydata(display_data)
-            ax.set_xlim(0, BLOCK_SIZE)
-            ax.set_ylim(min(display_data)-0.5, max(display_data)+0.5)
+        live_buffer.append_block(clean)
+        if len(live_buffer):
+            V0 = scan.V0
+            display_data = live_buffer.last() if V0 is None else to_db(live_buffer.last(), V0)
+            line.set_data(*decimate(x_axis[:len(display_data)], display_data, display_points(ax)))
+            renderer.set_ylim(ax, display_data.min(), display_data.max())
             
             # --- Mean/Std Text ---
             text_mean.set_text(f"mean: {np.mean(display_data):.4f}")
             text_std.set_text(f"std:  {np.std(display_data):.4f}")
-            text_angle.set_text(f"Winkel: {ang:.2f}°")
-            
-        # STATES:  
-        if state == STATE_CALIBRATE_START:
-            move_motor(-360, speed=15)
-            timer_start = time.time()
-            state = STATE_CALIBRATE_CAL
-        elif state == STATE_CALIBRATE_CAL:
-            if motor_ready():
-                print("Starte Kalibrierung... ")
-                send("calibrate")
-                motor_busy = True
-                motor_read_time = time.time() + CALIBRATE_WAIT
-                state = STATE_CALIBRATE_MOVE2
-        elif state == STATE_CALIBRATE_MOVE2:
-            if motor_ready():
-                move_motor(-360, speed=15)
-                timer_start = time.time()
-                state = STATE_CALIBRATE_TEST
-        elif state == STATE_CALIBRATE_TEST:
-            if motor_ready():
-                print("Kalibrierung Testen ...")
-                send("testcal")
-                motor_busy = True
-                motor_read_time = time.time() + CALIBRATE_WAIT
-                state = STATE_CALIBRATE_DONE
-        elif state == STATE_CALIBRATE_DONE:
-            if motor_ready():
-                print("Testen der Kalibrierung abgeschlossen.")
-                state = STATE_IDLE
-          
-        if state == STATE_REF:
-            ref_buffer.extend(clean)
-            if time.time() - timer_start >= SAVE_DURATION:
-                V0 = np.mean(ref_buffer)
-                print(f"V0 = {V0:.4f} V")
-                state = STATE_IDLE
-                
-        elif state == STATE_FIND_MAX:
-            if not max_buffer:
-                current_angles = np.arange(max_angle_start, max_angle_stop + angle_step, angle_step)
-                angle_index = 0
-                
-            if angle_index < len(current_angles):
-                move_motor(current_angles[angle_index])
-                rec_buffer = []
-                timer_start = time.time()
-                state = STATE_FIND_MAX_WAIT
-            
-            else:
-                best_angle = max(max_buffer, key=max_buffer.get)
-                max_angle_start = best_angle - angle_step
-                max_angle_stop = best_angle + angle_step
-                angle_step /= 2 
-                max_buffer = {}
-                if angle_step < 0.5:
-                    print(f"Bester Winkel: {best_angle}° mit Spannung {max_buffer[best_angle]:.4f}V")
-                    state = STATE_IDLE
-                    
-        elif state == STATE_FIND_MAX_WAIT:
-            rec_buffer.extend(clean)
-            if time.time() - timer_start >= DURATION_FIND_MAXIMUM:
-                max_buffer[current_angles[angle_index]] = np.mean(rec_buffer)
-                angle_index +=1
-                state = STATE_FIND_MAX
-    
-        elif state == STATE_MEASURE:
-            if angle_index < len(current_angles):
-                move_motor(current_angles[angle_index])
-                timer_start = time.time()
-                rec_buffer = []
-                rec_buffer_db = []
-                state = STATE_MEASURE_WAIT
-            else:
-                print("Messung abgeschlossen")
-                save(results)
-                move_motor(best_angle)
-                state = STATE_IDLE
-                
-        elif state == STATE_MEASURE_WAIT:
-            rec_buffer.extend(clean)
-            rec_buffer_db.extend(10*np.log10(np.maximum(np.abs(clean)/V0, 1e-12)))
-            if time.time() - timer_start >= SAVE_DURATION:
-                angle = current_angles[angle_index]
-                results["angle"].append(angle-best_angle)
-                results["mean_db"].append(np.mean(rec_buffer_db))
-                results["std_db"].append(np.std(rec_buffer_db))
-                results["mean_raw"].append(np.mean(rec_buffer))
-                results["std_raw"].append(np.std(rec_buffer))
-                angle_index += 1
-                state = STATE_MEASURE
+            text_angle.set_text(f"Winkel: {scan.angle:.2f}°")
         
-        fig.canvas.draw_idle()
-        plt.pause(0.01)
+        # nur zeichnen, wenn alle wartenden Blöcke abgearbeitet sind (höchstens FPS Bilder/s)
+        if not engine.pending():
+            renderer.draw()
 except KeyboardInterrupt:
     print("Messung manuell abgebrochen.")
 
 finally:
-    task.close()
+    checkpoint = scan.close_checkpoint()
+    if checkpoint is not None:
+        print(f"Messung unvollständig, Checkpoint: {checkpoint}")
+    engine.stop()
+    print(engine.status())
+    print(renderer.status())
+    if archive is not None:
+        archive.close()
+        print(f"Rohdaten archiviert: {archive.blocks_written} Blöcke in {archive.directory}")
     plt.ioff()
     plt.close(fig)
-    ser.close()
+    motor.close()
     
\ No newline at end of file
@@ -1,32 +1,46 @@
-import serial
+import sys
 import time
-import numpy as np
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.serial_driver import SerialDriver
 print("start")
-ser = serial.Serial("/dev/cu.usbmodem141101", 115200, timeout=1)
-time.sleep(1)
-
-def send(cmd):
-    ser.write((cmd + "\r").encode())
-    time.sleep(0.1)
-    response = ser.read_all().decode().strip()
-    return response
-
-send("calibrate")
-time.sleep(70)
-print("calibrierung abgeshclossen")
-send("Move -360 15")
-time.sleep(7)
-send("testcal")
-time.sleep(70)
+# Port als Argument, z. B. der des Emulators (python -m masterarbeit.emulator)
+PORT = sys.argv[1] if len(sys.argv) > 1 else "/dev/cu.usbmodem141101"
+driver = SerialDriver(PORT, 115200, timeout=2)
+
+# Ablauf: (Befehl, danach warten in s). Befehle gehen über den Treiber-Thread,
+# gewartet wird nur hier in der Schleife, die Antworten kommen nebenher.
+STEPS = [("calibrate", 70), ("Move -360 15", 7), ("testcal", 70), ("Move -360 15", 0)]
+
+
+def report(future):
+    try:
+        reply = future.result()
+        print(f"  {reply.command} -> {reply.text} ({1e3 * reply.rtt:.0f} ms)")
+    except (TimeoutError, ConnectionError) as e:
+        print(f"  Fehler: {e}")
+
+
+for cmd, wait in STEPS:
+    print(cmd)
+    # calibrate/testcal und Move antworten evtl. erst am Ende, daher Frist = Wartezeit
+    driver.submit(cmd, timeout=max(wait, 2)).add_done_callback(report)
+    end = time.monotonic() + wait
+    while time.monotonic() < end:
+        print(f"  noch {end - time.monotonic():.0f} s", end="\r")
+        time.sleep(0.5)
+    if cmd == "calibrate":
+        print("calibrierung abgeshclossen")
 print("Ende Test")
-send("Move -360 15")
 
 
 #for i in range(-5, 6, 1):
-#    x = send(f"move {i} 15")
+#    x = driver.request(f"move {i} 15")
 #    print(f"Winkel {i}°")
-#    print(x)
+#    print(x.text)
 #    time.sleep(5)
-    
 
-ser.close()
\ No newline at end of file
+summary = driver.rtt_summary()
+if summary is not None:
+    print("Laufzeit: {} Befehle, Median {:.3f} s, 95% {:.3f} s, max {:.3f} s".format(*summary))
+driver.close()
@@ -10,47 +10,23 @@ Taste 'q' = Beenden
 import numpy as np
 import matplotlib.pyplot as plt
 import time
-import random
-
-# ----------------------------- #
-# Outlier-Removal (MAD Methode)
-# ----------------------------- #
-def remove_outliers(data, k=15, t0=3):
-    data = np.array(data)
-    mask = np.ones(len(data), dtype=bool)
-
-    for i in range(len(data)):
-        left = max(0, i - k)
-        right = min(len(data), i + k + 1)
-        window = data[left:right]
-
-        med = np.median(window)
-        mad = np.median(np.abs(window - med))
-
-        if mad == 0:
-            continue
-        
-        z = 0.6745 * (data[i] - med) / mad
-        if abs(z) > t0:
-            mask[i] = False
-
-    return data[mask]
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.outliers import remove_outliers
+from masterarbeit.sources import SimulatedSource, sine_wave
 
 # ----------------------------- #
 # Fake-Datenquelle
 # (In deinem System später ersetzen durch DAQ)
 # ----------------------------- #
-def read_data_block(N=500):
-    """Simuliert DAQ-Daten mit Ausreißern."""
-    base = np.sin(np.linspace(0, 4*np.pi, N)) * 0.5
-    noise = np.random.normal(0, 0.05, N)
-    raw = base + noise
+# Simulierter Sinus mit Rauschen und Ausreißern, ohne NI-Gerät
+source = SimulatedSource(waveform=sine_wave, drift=0, noise=0.05, outlier_rate=1e-3, outlier_size=2.0)
 
-    if random.random() < 0.5:    # 5% Ausreißer
-        idx = random.randint(0, N-1)
-        raw[idx] += random.choice([2.0, -2.0])
-
-    return raw
+def read_data_block(N=500):
+    """Simuliert DAQ-Daten mit Ausreißern (masterarbeit.sources.SimulatedSource)."""
+    source.block_size = N
+    return source.get_block(timeout=np.inf).data
 
 # ----------------------------- #
 # Plot vorbereiten
@@ -10,41 +10,23 @@ Live-Simulation von Messdaten mit Outlier-Removal und Aufzeichnung
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
-import random
 import time
-
-# -----------------------------
-# Outlier-Removal (MAD Methode)
-# -----------------------------
-def remove_outliers(data, k=15, t0=3):
-    data = np.array(data)
-    mask = np.ones(len(data), dtype=bool)
-
-    for i in range(len(data)):
-        left = max(0, i - k)
-        right = min(len(data), i + k + 1)
-        window = data[left:right]
-        med = np.median(window)
-        mad = np.median(np.abs(window - med))
-        if mad == 0:
-            continue
-        z = 0.6745 * (data[i] - med) / mad
-        if abs(z) > t0:
-            mask[i] = False
-    return data[mask]
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # Python/ für das Paket masterarbeit
+from masterarbeit.outliers import remove_outliers
+from masterarbeit.sources import SimulatedSource, sine_wave
 
 # -----------------------------
 # Simuliertes DAQ-Signal
 # -----------------------------
+# Simulierter Sinus mit Rauschen und Ausreißern, ohne NI-Gerät
+source = SimulatedSource(waveform=sine_wave, drift=0, noise=0.05, outlier_rate=1e-4, outlier_size=2.0)
+
 def read_data_block(N=500):
-    """Simuliert DAQ-Daten mit gelegentlichen Ausreißern"""
-    base = np.sin(np.linspace(0, 4*np.pi, N)) * 0.5
-    noise = np.random.normal(0, 0.05, N)
-    raw = base + noise
-    if random.random() < 0.05:  # 5% Ausreißer
-        idx = random.randint(0, N-1)
-        raw[idx] += random.choice([2.0, -2.0])
-    return raw
+    """Simuliert DAQ-Daten mit Ausreißern (masterarbeit.sources.SimulatedSource)."""
+    source.block_size = N
+    return source.get_block(timeout=np.inf).data
 
 # -----------------------------
 # Aufnahme & Speicherung
@@ -0,0 +1,5 @@
+"""
+Gemeinsame Bausteine für die Messskripte der Masterarbeit.
+Die Skripte in Python/ und Python/Versionen/ importieren von hier,
+statt Funktionen wie remove_outliers in jede Datei zu kopieren.
+"""
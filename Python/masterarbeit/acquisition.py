@@ -0,0 +1,281 @@
+"""
+Kontinuierliche DAQ-Aufnahme in einem eigenen Thread.
+Der NI-Task läuft im Modus CONTINUOUS mit ausreichend großem Eingangspuffer,
+ein Reader-Thread holt fortlaufend Blöcke ab und legt sie in eine Queue.
+Die Hauptschleife (Plot, Motor, Tastatur) holt sich die Blöcke von dort,
+ohne dass während plt.pause oder Motorbewegungen Samples verloren gehen.
+
+Gelesen wird mit den nidaqmx stream_readers direkt in vorab angelegte
+NumPy-Arrays (kein task.read() -> Liste -> np.array mehr pro Block).
+Mehrere Kanäle ("Dev1/ai0:3" oder eine Liste) laufen in einem Task mit
+gemeinsamem Sample-Takt und werden pro Block in einem Aufruf als
+(Kanäle x Samples) gelesen; Kosten pro Block wachsen mit der Zahl der
+Samples, nicht mit der Zahl der Lesevorgänge.
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from masterarbeit.sources import Block, DataSource, expand_channels
+
+# Fehlercode von NI-DAQmx, wenn der Hardware-Puffer überschrieben wurde
+DAQ_OVERWRITE_ERROR = -200279
+# Reserve auf die Füllzeit eines Blocks beim Lesen (s)
+READ_TIMEOUT_MARGIN = 1.0
+
+
+class AcquisitionEngine(DataSource):
+    """
+    nidaqmx-Backend der DataSource-Schnittstelle.
+    Liest einen oder mehrere Kanäle kontinuierlich in Blöcken von block_size Samples
+    (pro Kanal). Block.data ist bei einem Kanal 1D, sonst (Kanäle x Samples).
+    Die Queue fasst queue_seconds Daten (mindestens 2 Blöcke), unabhängig von
+    der Blockgröße; der Speicher dafür ist queue_seconds * sample_rate *
+    Kanäle * 8 Byte (250 kS/s, 4 Kanäle, 20 s: 160 MB).
+    Block.data ist ein View in einen festen Pool von Queue-Länge + 1 Puffern,
+    der Pool wird reihum überschrieben. Ist die Queue voll, wird der älteste
+    Block verworfen, bevor in den nächsten Puffer gelesen wird; wartende
+    Blöcke werden so nie überschrieben. Ein abgeholter Block ist gültig, bis
+    die Queue einmal neu gefüllt wurde (ca. queue_seconds).
+    Zähler: overflows (Hardware-Puffer übergelaufen), dropped (Queue voll,
+    älteste Blöcke verworfen), underflows (Read-Timeout, keine Daten).
+    Nach einem Überlauf wird der Task neu gestartet; der Gerätezähler beginnt
+    dann wieder bei 0. Block.start und sample_index() laufen trotzdem weiter
+    auf derselben Zählung (ab start()), die verlorenen Samples stehen als
+    Sprung in Block.start und in gaps (Index, Anzahl; geschätzt).
+    Jeder Reader-Thread hat sein eigenes Stop-Event und liest mit Task, Reader
+    und Pool aus seinem start(). stop() wartet bis zu einem Read-Timeout; hängt
+    der Thread dann noch in einem Read, legt er danach nichts mehr in die Queue
+    und beendet sich, auch wenn start() inzwischen einen neuen Thread gestartet hat.
+    """
+
+    def __init__(self, channel="Dev1/ai0", sample_rate=2000, block_size=500,
+                 buffer_seconds=10, queue_seconds=20):
+        self.channel = channel
+        self.channel_names = expand_channels(channel)
+        self.channels = len(self.channel_names)
+        self.sample_rate = sample_rate
+        self.block_size = int(block_size)
+        self.buffer_size = int(sample_rate * buffer_seconds)
+        self.queue_seconds = queue_seconds
+        # deque.append / popleft sind in CPython atomar -> keine Locks nötig
+        self._queue = deque(maxlen=self._queue_blocks())
+        self._pool = None
+        self._reader = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._stop.set()                 # Stop-Event des aktuellen Reader-Threads
+        self.task = None
+        self.samples_read = 0
+        self._index_base = 0             # Gerätezähler seit dem letzten Task-Start + _index_base = Index
+        self.gaps = []                   # (Index vor der Lücke, verlorene Samples) nach Überläufen
+        self.overflows = 0
+        self.underflows = 0
+        self.dropped = 0
+
+    # ---------- Steuerung ---------- #
+    def start(self):
+        import nidaqmx  # type: ignore  # erst hier, Paket bleibt ohne NI-Treiber importierbar
+        from nidaqmx.constants import AcquisitionType  # type: ignore
+        from nidaqmx.stream_readers import AnalogSingleChannelReader, AnalogMultiChannelReader  # type: ignore
+
+        self.task = nidaqmx.Task()
+        self.task.ai_channels.add_ai_voltage_chan(", ".join(self.channel_names))
+        self.task.timing.cfg_samp_clk_timing(rate=self.sample_rate,
+                                             sample_mode=AcquisitionType.CONTINUOUS,
+                                             samps_per_chan=self.buffer_size)
+        self.task.in_stream.input_buf_size = self.buffer_size
+        n_channels = self.task.number_of_channels
+        # Länge folgt Sample Rate und Blockgröße (restart)
+        self._queue = deque(maxlen=self._queue_blocks())
+        if n_channels == 1:
+            self._reader = AnalogSingleChannelReader(self.task.in_stream)
+            shape = (self._queue.maxlen + 1, self.block_size)
+        else:
+            self._reader = AnalogMultiChannelReader(self.task.in_stream)
+            shape = (self._queue.maxlen + 1, n_channels, self.block_size)
+        # ein alter Thread, der beim stop() noch im Read hing, schreibt ggf. noch in seinen Pool
+        if self._pool is None or self._pool.shape != shape or self._thread is not None:
+            self._pool = np.zeros(shape)
+        self.samples_read = 0
+        self._index_base = 0
+        self.gaps = []
+        self._stop = threading.Event()
+        self.task.start()
+        self._thread = threading.Thread(target=self._run, name="daq-reader", daemon=True,
+                                        args=(self._stop, self.task, self._reader, self._pool))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            # ein laufender Read endet spätestens nach seinem Timeout
+            self._thread.join(timeout=self._read_timeout() + READ_TIMEOUT_MARGIN)
+            if not self._thread.is_alive():
+                self._thread = None
+        if self.task is not None:
+            self.task.close()
+            self.task = None
+
+    def restart(self, sample_rate=None, block_size=None):
+        """Task mit neuer Sample Rate / Blockgröße neu aufsetzen."""
+        self.stop()
+        if sample_rate is not None:
+            self.buffer_size = int(self.buffer_size / self.sample_rate * sample_rate)
+            self.sample_rate = sample_rate
+        if block_size is not None:
+            self.block_size = int(block_size)
+        self.start()
+
+    def _queue_blocks(self):
+        """Queue-Länge in Blöcken für queue_seconds Daten."""
+        return max(2, int(np.ceil(self.queue_seconds * self.sample_rate / self.block_size)))
+
+    # ---------- Reader-Thread ---------- #
+    def _read_timeout(self):
+        # ein Block braucht block_size / sample_rate zum Füllen, große Anzeigefenster dauern länger als 1 s
+        return self.block_size / self.sample_rate + READ_TIMEOUT_MARGIN
+
+    def _read(self, reader, buf):
+        """Nächsten Block direkt in den Pool-Puffer buf lesen."""
+        n = reader.read_many_sample(buf, number_of_samples_per_channel=buf.shape[-1],
+                                    timeout=self._read_timeout())
+        return buf[..., :n]
+
+    def _run(self, stop, task, reader, pool):
+        from nidaqmx.errors import DaqError  # type: ignore
+
+        slot = 0
+        while not stop.is_set():
+            if len(self._queue) == self._queue.maxlen:
+                # ältesten Block verwerfen, bevor _read() in den nächsten Puffer schreibt
+                try:
+                    self._queue.popleft()
+                    self.dropped += 1
+                except IndexError:
+                    pass    # gerade vom Verbraucher abgeholt
+            try:
+                data = self._read(reader, pool[slot])
+            except DaqError as err:
+                if stop.is_set():
+                    break   # Task wurde von stop() geschlossen
+                if err.error_code == DAQ_OVERWRITE_ERROR:
+                    # Puffer übergelaufen: zählen, Task neu starten, weiterlesen
+                    self.overflows += 1
+                    self._restart_after_overflow(task)
+                else:
+                    self.underflows += 1
+                continue
+            if stop.is_set():
+                break       # veralteter Thread: Queue gehört schon einem neuen start()
+            slot = (slot + 1) % len(pool)
+            self._queue.append(Block(self.samples_read, data))
+            self.samples_read += data.shape[-1]
+
+    def _restart_after_overflow(self, task):
+        """
+        Task neu starten und die Zählung fortsetzen: der Neustart setzt
+        total_samp_per_chan_acquired auf 0, der Index springt um die bis zum
+        Stopp aufgenommenen, nicht gelesenen Samples plus die Dauer des Neustarts.
+        """
+        t0 = time.monotonic()
+        acquired = self._index_base + task.in_stream.total_samp_per_chan_acquired
+        task.stop()
+        task.start()
+        base = acquired + int(round((time.monotonic() - t0) * self.sample_rate))
+        self.gaps.append((self.samples_read, base - self.samples_read))
+        self._index_base = base
+        self.samples_read = base
+
+    # ---------- Verbraucher ---------- #
+    def pending(self):
+        """Anzahl Blöcke, die noch nicht abgeholt wurden."""
+        return len(self._queue)
+
+    def get_block(self, timeout=1.0):
+        """Nächsten Block holen, None falls innerhalb von timeout nichts kam."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._queue.popleft()
+            except IndexError:
+                if time.monotonic() >= deadline or self._stop.is_set():
+                    return None
+                time.sleep(0.2 * self.block_size / self.sample_rate)
+
+    def clear(self):
+        """Alle wartenden Blöcke verwerfen (z. B. während der Motor fährt)."""
+        self._queue.clear()
+
+    def sample_time(self, index):
+        """Zeit in Sekunden seit start() laut Sample-Takt."""
+        return index / self.sample_rate
+
+    def sample_index(self):
+        """Index des gerade aufgenommenen Samples pro Kanal (gleiche Zählung wie Block.start)."""
+        return self._index_base + self.task.in_stream.total_samp_per_chan_acquired
+
+    def status(self):
+        lost = sum(n for _, n in self.gaps)
+        return (f"gelesen: {self.samples_read}, overflows: {self.overflows} ({lost} Samples verloren), "
+                f"underflows: {self.underflows}, verworfen: {self.dropped}")
+
+
+# ========================== #
+# ==== BENCHMARK ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.acquisition [Kanal] [Kanäle]  (braucht das NI-Gerät)
+    # Vergleicht den Overhead pro Block: task.read() + np.array gegen
+    # read_many_sample in einen festen Puffer. Der Eingangspuffer wird vorher
+    # gefüllt, damit nur das Abholen gemessen wird und nicht das Warten.
+    # Danach: ein Kanal gegen alle Kanäle (Standard Dev1/ai0:3) in einem Aufruf.
+    import sys
+    import nidaqmx  # type: ignore
+    from nidaqmx.constants import AcquisitionType  # type: ignore
+    from nidaqmx.stream_readers import AnalogMultiChannelReader, AnalogSingleChannelReader  # type: ignore
+
+    channel = sys.argv[1] if len(sys.argv) > 1 else "Dev1/ai0"
+    multi = sys.argv[2] if len(sys.argv) > 2 else "Dev1/ai0:3"
+    rate, block, n_blocks = 100000, 500, 400
+
+    with nidaqmx.Task() as task:
+        task.ai_channels.add_ai_voltage_chan(channel)
+        task.timing.cfg_samp_clk_timing(rate=rate, sample_mode=AcquisitionType.CONTINUOUS,
+                                        samps_per_chan=4 * block * n_blocks)
+        reader = AnalogSingleChannelReader(task.in_stream)
+        buf = np.zeros(block)
+        task.start()
+
+        for name in ("task.read + np.array", "read_many_sample"):
+            time.sleep(1.5 * block * n_blocks / rate)  # Puffer füllen
+            t = time.perf_counter()
+            for _ in range(n_blocks):
+                if name == "read_many_sample":
+                    reader.read_many_sample(buf, number_of_samples_per_channel=block)
+                else:
+                    np.array(task.read(number_of_samples_per_channel=block))
+            dt = (time.perf_counter() - t) / n_blocks
+            print(f"{name:22s}: {dt*1e6:8.1f} µs pro Block ({block} Samples)")
+
+    for spec in (channel, multi):
+        names = expand_channels(spec)
+        # Summenrate des Geräts bleibt gleich, pro Kanal entsprechend weniger
+        per_channel = rate / len(names)
+        with nidaqmx.Task() as task:
+            task.ai_channels.add_ai_voltage_chan(", ".join(names))
+            task.timing.cfg_samp_clk_timing(rate=per_channel, sample_mode=AcquisitionType.CONTINUOUS,
+                                            samps_per_chan=4 * block * n_blocks)
+            reader = AnalogMultiChannelReader(task.in_stream)
+            buf = np.zeros((len(names), block))
+            task.start()
+            time.sleep(1.5 * block * n_blocks / per_channel)
+            t = time.perf_counter()
+            for _ in range(n_blocks):
+                reader.read_many_sample(buf, number_of_samples_per_channel=block)
+            dt = (time.perf_counter() - t) / n_blocks
+            print(f"{len(names)} Kanäle, ein Aufruf: {dt*1e6:8.1f} µs pro Block, "
+                  f"{dt*1e9 / buf.size:6.1f} ns pro Sample")
@@ -0,0 +1,285 @@
+"""
+Rohdaten-Archiv für Scans.
+Jeder DAQ-Block eines Scans wird im Hintergrund an eine Binärdatei
+angehängt (raw.f64, float64 little endian, ohne Header), dazu eine Zeile
+im Index blocks.csv mit Scan-ID, Winkelindex, Winkel, best_angle, Zustand, V0 und
+Sample-Zeitstempel. angle ist bei Positionsrückmeldung der gemessene
+Winkel in der Blockmitte, angle_cmd der kommandierte. So kann später mit anderem Filter oder anderer
+dB-Konvention neu ausgewertet werden, ohne neu zu messen.
+
+Ordnerstruktur:
+    <archiv>/meta.json    Sample Rate, Kanal, Kanalliste, Startzeit
+    <archiv>/raw.f64      alle Samples hintereinander
+    <archiv>/blocks.csv   eine Zeile pro Block, offset/n zeigen in raw.f64
+
+Bei mehreren Kanälen liegen die Samples verschachtelt wie vom DAQ
+(ai0, ai1, ..., ai0, ai1, ...); offset/n zählen dann Samples pro Kanal.
+ArchiveReader.samples ist immer der Empfänger (Kanal 0), frames alle Kanäle.
+"""
+
+import json
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from masterarbeit.sources import expand_channels
+
+INDEX_COLUMNS = ["scan", "angle_index", "angle", "best_angle", "state", "V0", "start", "t", "offset", "n",
+                 "angle_cmd"]
+
+
+class ArchiveWriter:
+    """
+    Schreibt Blöcke in einem eigenen Thread. write() kopiert nur den Block
+    in die Queue und kehrt sofort zurück, blockiert also nie die Messschleife.
+    Ein bestehendes Archiv wird fortgesetzt, aber nur mit derselben Sample
+    Rate und denselben Kanälen (sonst ValueError), meta.json bleibt dann stehen.
+    Kommt die Platte nicht hinterher, wächst die Queue höchstens auf
+    max_backlog Sekunden Daten; weitere Blöcke werden verworfen (dropped,
+    Lücke in start/offset von blocks.csv) und einmal pro Stau per log gemeldet.
+    """
+
+    def __init__(self, directory, sample_rate, channel="Dev1/ai0", max_backlog=30.0, log=print):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.channels = len(expand_channels(channel))
+        meta_path = self.directory / "meta.json"
+        if meta_path.exists():
+            old = json.loads(meta_path.read_text())
+            if old["sample_rate"] != sample_rate or old["channels"] != expand_channels(channel):
+                raise ValueError(f"{self.directory}: Archiv mit {old['sample_rate']} Hz und Kanälen {old['channels']}, "
+                                 f"nicht fortsetzbar mit {sample_rate} Hz und {expand_channels(channel)}")
+        elif (self.directory / "raw.f64").exists():
+            raise ValueError(f"{self.directory}: raw.f64 ohne meta.json, Aufbau unbekannt")
+        else:
+            meta = {"sample_rate": sample_rate, "channel": channel, "channels": expand_channels(channel),
+                    "created": datetime.now().isoformat(timespec="seconds")}
+            meta_path.write_text(json.dumps(meta, indent=2))
+        self._raw = open(self.directory / "raw.f64", "ab")
+        index_path = self.directory / "blocks.csv"
+        new_index = not index_path.exists()
+        self._index = open(index_path, "a", encoding="utf-8")
+        if new_index:
+            self._index.write(",".join(INDEX_COLUMNS) + "\n")
+        self._offset = self._raw.tell() // (8 * self.channels)
+        self._queue = queue.SimpleQueue()
+        self.blocks_written = 0
+        self.dropped = 0
+        self.log = log
+        self.max_backlog = max_backlog
+        self._backlog = 0                # Samples pro Kanal in der Queue
+        self._backlog_lock = threading.Lock()
+        self._jammed = False
+        self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, start, data, scan, angle_index, angle, state, V0=None, best_angle=None, angle_cmd=None):
+        """Block zum Schreiben vormerken. start = Index des ersten Samples (Sample-Takt)."""
+        n = np.shape(data)[-1]
+        with self._backlog_lock:
+            if self._backlog and self._backlog + n > self.max_backlog * self.sample_rate:
+                self.dropped += 1
+                if not self._jammed:
+                    self._jammed = True
+                    self.log(f"Archiv: Schreiben hängt {self.max_backlog:g} s hinterher, "
+                             f"Blöcke werden verworfen ({self.directory})")
+                return
+            self._backlog += n
+            self._jammed = False
+        # Kopie, weil data ein View in den Puffer-Pool der AcquisitionEngine ist;
+        # (Kanäle x Samples) als (Samples x Kanäle), also verschachtelt wie vom DAQ
+        self._queue.put((start, np.array(np.asarray(data).T, dtype="<f8", order="C"), scan, angle_index, angle, best_angle, state, V0,
+                         angle_cmd))
+
+    def pending(self):
+        """Anzahl Blöcke, die noch nicht geschrieben wurden."""
+        return self._queue.qsize()
+
+    def backlog(self):
+        """Noch nicht geschriebene Daten in Sekunden."""
+        return self._backlog / self.sample_rate
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            start, data, scan, angle_index, angle, best_angle, state, V0, angle_cmd = item
+            data.tofile(self._raw)
+            angle, best_angle, V0, angle_cmd = ("" if v is None else repr(float(v))
+                                                for v in (angle, best_angle, V0, angle_cmd))
+            t = start / self.sample_rate
+            self._index.write(f"{scan},{angle_index},{angle},{best_angle},{state},{V0},"
+                              f"{start},{t!r},{self._offset},{len(data)},{angle_cmd}\n")
+            self._offset += len(data)
+            self.blocks_written += 1
+            with self._backlog_lock:
+                self._backlog -= len(data)
+            # Index regelmäßig rausschreiben, damit bei einem Absturz wenig fehlt
+            if self._queue.empty():
+                self._raw.flush()
+                self._index.flush()
+
+    def close(self):
+        """Restliche Blöcke schreiben und Dateien schließen."""
+        self._queue.put(None)
+        self._thread.join()
+        self._raw.close()
+        self._index.close()
+
+
+# dB-Konventionen: rot_live.py rechnet 10*log10, read_save_nidaqmx.py 20*log10
+DB_FACTORS = {"power": 10, "amplitude": 20}
+
+
+class ArchiveReader:
+    """
+    Liest ein mit ArchiveWriter geschriebenes Archiv. raw.f64 wird nur
+    per np.memmap eingeblendet, es wird nichts vorab in den Speicher geladen.
+    """
+
+    def __init__(self, directory):
+        import pandas as pd
+
+        self.directory = Path(directory)
+        self.meta = json.loads((self.directory / "meta.json").read_text())
+        self.sample_rate = self.meta["sample_rate"]
+        self.index = pd.read_csv(self.directory / "blocks.csv")
+        raw = np.memmap(self.directory / "raw.f64", dtype="<f8", mode="r")
+        self.channels = self.meta.get("channels", [self.meta["channel"]])
+        # View ohne Kopie, bei einem Kanal identisch mit raw
+        self.frames = raw.reshape(-1, len(self.channels))
+        self.samples = self.frames[:, 0] if len(self.channels) > 1 else raw
+
+    def scans(self, state="MEASURE"):
+        """Scan-IDs, die Blöcke im gegebenen Zustand enthalten."""
+        return sorted(self.index.loc[self.index["state"] == state, "scan"].unique())
+
+    def _segments(self, scan, state):
+        """Eine Zeile pro Winkelindex: Winkel (Mittel der Blöcke), V0 und Bereich lo..hi in raw.f64."""
+        rows = self.index[(self.index["scan"] == scan) & (self.index["state"] == state)]
+        if rows.empty:
+            raise KeyError(f"Keine {state}-Blöcke für Scan {scan} im Archiv {self.directory}")
+        rows = rows.assign(end=rows["offset"] + rows["n"])
+        return rows.groupby("angle_index", sort=False).agg(
+            angle=("angle", "mean"), best_angle=("best_angle", "first"), V0=("V0", "first"),
+            lo=("offset", "min"), hi=("end", "max"), n=("n", "sum"))
+
+    def _view(self, scan, state, seg):
+        """Samples eines Winkels; View ohne Kopie, wenn die Blöcke direkt hintereinander liegen."""
+        if seg.hi - seg.lo == seg.n:
+            return self.samples[seg.lo:seg.hi]
+        rows = self.index[(self.index["scan"] == scan) & (self.index["state"] == state)
+                          & (self.index["angle_index"] == seg.Index)]
+        return np.concatenate([self.samples[o:o + n] for o, n in zip(rows["offset"], rows["n"])])
+
+    def angle_views(self, scan, state="MEASURE"):
+        """{angle_index: Samples} für alle Winkel eines Scans."""
+        return {seg.Index: self._view(scan, state, seg) for seg in self._segments(scan, state).itertuples()}
+
+    def reprocess(self, scan, filter="hampel", db_mode="power", V0=None, state="MEASURE"):
+        """
+        Ergebnistabelle angle/mean_db/std_db/mean_raw/std_raw wie in rot_live.py
+        aus den Rohdaten neu berechnen.
+        filter:  "hampel" (rollender MAD pro Winkel, k=15, t0=3 wie im Scan),
+                 None (ungefiltert) oder Funktion data -> Bool-Maske
+        db_mode: "power" (10*log10), "amplitude" (20*log10) oder ein Faktor
+        V0:      None = V0 aus der Aufnahme
+        """
+        from functools import partial
+
+        import pandas as pd
+        from masterarbeit.outliers import hampel_mask
+
+        factor = DB_FACTORS.get(db_mode, db_mode)
+        segs = self._segments(scan, state)
+        lo, hi, counts = segs["lo"].to_numpy(), segs["hi"].to_numpy(), segs["n"].to_numpy()
+
+        # alle Winkel in einem Array; liegt der ganze Scan am Stück in raw.f64
+        # (Normalfall), ist auch das nur ein View auf die memmap
+        if np.all(hi - lo == counts) and np.all(lo[1:] == hi[:-1]):
+            x = self.samples[lo[0]:hi[-1]]
+            views = np.split(x, np.cumsum(counts)[:-1]) if filter is not None else None
+        else:
+            views = [self._view(scan, state, seg) for seg in segs.itertuples()]
+            x = np.concatenate(views)
+        if filter is not None:
+            if filter == "hampel":
+                filter = partial(hampel_mask, k=15, t0=3)     # wie Scan.hampel im Live-Pfad
+            masks = [filter(v) for v in views]
+            counts = np.array([m.sum() for m in masks])
+            x = x[np.concatenate(masks)]
+
+        v0 = segs["V0"].to_numpy() if V0 is None else np.full(len(counts), float(V0))
+        if np.all(v0 == v0[0]):
+            v0 = v0[0]  # Normalfall: ein V0 für den ganzen Scan, spart das np.repeat
+        else:
+            v0 = np.repeat(v0, counts)
+        db = factor * np.log10(np.maximum(np.abs(x) / v0, 1e-12))
+
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        full = counts > 0
+
+        def mean_std(values):
+            """Mittelwert und Std (ddof=0) pro Winkel in einem Durchlauf über values."""
+            mean = np.full(len(counts), np.nan)
+            var = np.full(len(counts), np.nan)
+            mean[full] = np.add.reduceat(values, starts[full]) / counts[full]
+            var[full] = np.add.reduceat((values - np.repeat(mean, counts)) ** 2, starts[full]) / counts[full]
+            return mean, np.sqrt(var)
+
+        mean_db, std_db = mean_std(db)
+        mean_raw, std_raw = mean_std(x)
+        best_angle = segs["best_angle"].fillna(0).to_numpy()
+        return pd.DataFrame({"angle": segs["angle"].to_numpy() - best_angle,
+                             "mean_db": mean_db, "std_db": std_db,
+                             "mean_raw": mean_raw, "std_raw": std_raw})
+
+
+# ========================== #
+# ==== BENCHMARK ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.archive [Ordner]
+    # Durchsatz von ArchiveWriter bei 250 kS/s mit 1 und 4 Kanälen: erst so
+    # schnell wie möglich (Faktor gegenüber Echtzeit), dann im Takt des DAQ
+    # mit dem größten Rückstand. Ordner auf der Messplatte angeben, Standard
+    # ist ein temporärer Ordner.
+    import sys
+    import tempfile
+    import time
+
+    rate, block, seconds = 250000, 25000, 20
+    base = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(tempfile.mkdtemp(prefix="archive_bench_"))
+    for channels in (["Dev1/ai0"], ["Dev1/ai0", "Dev1/ai1", "Dev1/ai2", "Dev1/ai3"]):
+        data = np.random.default_rng(0).normal(0.3, 0.01, (len(channels), block)).squeeze()
+        n_blocks = seconds * rate // block
+
+        writer = ArchiveWriter(base / f"burst_{len(channels)}", rate, channels, max_backlog=np.inf)
+        t = time.perf_counter()
+        for i in range(n_blocks):
+            writer.write(i * block, data, 1, i, 0.0, "MEASURE", 0.3)
+        writer.close()
+        dt = time.perf_counter() - t
+        mb = n_blocks * data.nbytes / 1e6
+        print(f"{len(channels)} Kanäle, {seconds} s Daten am Stück: {dt:5.2f} s, {mb / dt:6.0f} MB/s, "
+              f"{seconds / dt:5.1f}x Echtzeit")
+
+        writer = ArchiveWriter(base / f"live_{len(channels)}", rate, channels)
+        worst = 0.0
+        t0 = time.perf_counter()
+        for i in range(n_blocks // 4):
+            time.sleep(max(0.0, t0 + (i + 1) * block / rate - time.perf_counter()))
+            writer.write(i * block, data, 1, i, 0.0, "MEASURE", 0.3)
+            worst = max(worst, writer.backlog())
+        writer.close()
+        print(f"{len(channels)} Kanäle im DAQ-Takt ({seconds // 4} s): größter Rückstand {worst * 1e3:.0f} ms, "
+              f"verworfen {writer.dropped}")
+        assert writer.dropped == 0, "Platte zu langsam für 250 kS/s"
+    if len(sys.argv) < 2:
+        import shutil
+        shutil.rmtree(base)
@@ -0,0 +1,225 @@
+"""
+Modellbasierte Suche der Hauptstrahlrichtung (boresight).
+Ersetzt die Grob-Fein-Suche aus STATE_FIND_MAX (-40..40° in 10°-Schritten,
+dann Schrittweite halbieren bis unter 0.5°, rund 30 Fahrten):
+    1. Grobraster wie bisher (start..stop, step)
+    2. Brent-Suche (Parabel-Interpolation + Goldener Schnitt) im Intervall
+       bester Rasterpunkt ± step, bis es auf resolution eingegrenzt ist
+    3. Gauß-Fit (Parabel in log(Spannung)) an alle Punkte der Hauptkeule,
+       daraus Maximum und Unsicherheit
+BoresightFinder wird schrittweise benutzt: next_angle() liefert den
+nächsten Winkel, add() nimmt den Messwert entgegen, result() am Ende.
+"""
+
+import numpy as np
+
+GOLDEN = 0.3819660112501051   # (3 - sqrt(5)) / 2
+
+
+def brent_max(a, b, x, fx, xtol):
+    """
+    Generator für die Maximumsuche nach Brent im Intervall [a, b], x ist der
+    bisher beste Punkt mit Wert fx. Liefert per yield den nächsten Winkel und
+    bekommt per send() den Messwert zurück. Endet, wenn das Maximum auf
+    ±xtol eingegrenzt ist.
+    """
+    # intern wird -f minimiert, Bezeichnungen wie bei Brent (1973)
+    w = v = x
+    gx = gw = gv = -fx
+    d = e = 0.0
+    while True:
+        m = 0.5 * (a + b)
+        tol2 = 2 * xtol
+        if abs(x - m) <= tol2 - 0.5 * (b - a):
+            return
+        golden = True
+        if abs(e) > xtol:
+            r = (x - w) * (gx - gv)
+            q = (x - v) * (gx - gw)
+            p = (x - v) * q - (x - w) * r
+            q = 2 * (q - r)
+            if q > 0:
+                p = -p
+            q = abs(q)
+            e_old, e = e, d
+            if abs(p) < abs(0.5 * q * e_old) and q * (a - x) < p < q * (b - x):
+                d = p / q
+                u = x + d
+                if u - a < tol2 or b - u < tol2:
+                    d = xtol if x < m else -xtol
+                golden = False
+        if golden:
+            e = (b - x) if x < m else (a - x)
+            d = GOLDEN * e
+        u = x + d if abs(d) >= xtol else x + (xtol if d > 0 else -xtol)
+        gu = -(yield u)
+        if gu <= gx:
+            if u >= x:
+                a = x
+            else:
+                b = x
+            v, w, x = w, x, u
+            gv, gw, gx = gw, gx, gu
+        else:
+            if u < x:
+                a = u
+            else:
+                b = u
+            if gu <= gw or w == x:
+                v, w = w, u
+                gv, gw = gw, gu
+            elif gu <= gv or v == x or v == w:
+                v, gv = u, gu
+
+
+def fit_peak(angles, values, se=None):
+    """
+    Gauß-Fit values = A * exp(-(angle - x0)² / (2 s²)) als Parabel in log(values).
+    Gibt (x0, Unsicherheit von x0, Spitzenwert) zurück oder None, wenn die
+    Punkte keine nach unten offene Parabel ergeben. se: Standardfehler der
+    Messwerte (Gewichte), None = gleich gewichtet. Die Unsicherheit enthält
+    den statistischen Fehler und den Unterschied zum Parabel-Fit in linearer
+    Spannung als Maß für den Modellfehler.
+    """
+    x = np.asarray(angles, dtype=float)
+    y = np.asarray(values, dtype=float)
+    if len(x) < 3 or np.any(y <= 0):
+        return None
+    x_c = x.mean()   # zentrieren, sonst ist die Kovarianz von b und c schlecht konditioniert
+    if se is not None and np.all(np.isfinite(se)) and np.all(np.asarray(se) > 0):
+        sigma = np.asarray(se, dtype=float) / y           # Fehler von log(y)
+    else:
+        sigma = np.ones_like(y)
+    (c, b, a), cov = np.polyfit(x - x_c, np.log(y), 2, w=1 / sigma, cov="unscaled")
+    # Modellfehler (Hauptkeule ist kein exakter Gauß): Kovarianz mit chi²/dof
+    # hochskalieren, wenn die Residuen größer sind als das Messrauschen
+    chi2 = np.sum(((np.log(y) - np.polyval((c, b, a), x - x_c)) / sigma) ** 2)
+    if len(x) > 3:
+        cov = cov * max(chi2 / (len(x) - 3), 1.0 if se is not None else 0.0)
+    if c >= 0:
+        return None
+    x0 = -b / (2 * c)
+    # Fehlerfortpflanzung für x0 = -b / (2c)
+    grad = np.array([b / (2 * c ** 2), -1 / (2 * c)])   # d/dc, d/db
+    var = grad @ cov[:2, :2] @ grad
+    # Modellunsicherheit: Abstand zum Scheitel einer Parabel in linearer Spannung
+    c_lin, b_lin, _ = np.polyfit(x - x_c, y, 2)
+    model = x0 + b_lin / (2 * c_lin) if c_lin < 0 else 0.0
+    peak = np.exp(a - b ** 2 / (4 * c))
+    return x0 + x_c, float(np.hypot(np.sqrt(max(var, 0.0)), model)), float(peak)
+
+
+class BoresightFinder:
+    """
+    start, stop, step: Grobraster wie bisher in rot_live.py
+    resolution:        Zielauflösung der Brent-Suche (° Intervallbreite)
+    grid enthält die noch offenen Rasterpunkte und darf umsortiert werden.
+    """
+
+    def __init__(self, start=-40, stop=40, step=10, resolution=0.5, decimals=2):
+        self.step = step
+        self.resolution = resolution
+        self.decimals = decimals
+        self.grid = list(np.arange(start, stop + step, step))
+        self._search = None
+        self._next = None
+        self.done = False
+        self.angles = []
+        self.values = []
+        self.se = []
+
+    def next_angle(self):
+        """Nächster anzufahrender Winkel oder None, wenn die Suche fertig ist."""
+        if self.grid:
+            return float(self.grid[0])
+        if self._next is None and not self.done:
+            i = int(np.argmax(self.values))
+            x, fx = self.angles[i], self.values[i]
+            self._search = brent_max(x - self.step, x + self.step, x, fx, self.resolution / 2)
+            self._advance(None)
+        return None if self.done else self._next
+
+    def _advance(self, value):
+        try:
+            u = next(self._search) if value is None else self._search.send(value)
+            self._next = round(float(u), self.decimals)
+        except StopIteration:
+            self._next = None
+            self.done = True
+
+    def add(self, angle, value, se=None):
+        """Messwert am zuletzt gelieferten Winkel eintragen."""
+        self.angles.append(float(angle))
+        self.values.append(float(value))
+        self.se.append(np.inf if se is None else float(se))
+        if self.grid:
+            self.grid.pop(0)
+        else:
+            self._advance(value)
+
+    @property
+    def moves(self):
+        return len(self.angles)
+
+    def result(self):
+        """
+        (best_angle, Unsicherheit, Spitzenwert). Gauß-Fit an die Punkte der
+        Hauptkeule (Wert über halbem Maximum, innerhalb ± step um das beste
+        Messergebnis); schlägt der Fit fehl oder landet er außerhalb, gilt der
+        beste Messpunkt mit der halben Auflösung als Unsicherheit.
+        """
+        x, y, se = np.array(self.angles), np.array(self.values), np.array(self.se)
+        i = int(np.argmax(y))
+        best = (x[i], self.resolution / 2, y[i])
+        lobe = (np.abs(x - x[i]) <= self.step) & (y >= 0.5 * y[i])
+        fit = fit_peak(x[lobe], y[lobe], se[lobe]) if lobe.sum() >= 3 else None
+        if fit is None or abs(fit[0] - x[i]) > self.resolution:
+            return best
+        return (round(fit[0], self.decimals),) + fit[1:]
+
+
+def coarse_to_fine_moves(measure, start=-40, stop=40, step=10):
+    """Alte Suche aus rot_live.py zum Vergleich: (best_angle, Anzahl Fahrten)."""
+    moves = 0
+    while True:
+        angles = np.arange(start, stop + step, step)
+        values = {a: measure(a) for a in angles}
+        moves += len(angles)
+        best = max(values, key=values.get)
+        start, stop = best - step, best + step
+        step /= 2
+        if step < 0.5:
+            return best, moves
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.boresight  (aus dem Ordner Python/)
+    # Alte Grob-Fein-Suche gegen BoresightFinder am simulierten Hornstrahler.
+    from masterarbeit.sources import horn_pattern
+
+    rng = np.random.default_rng(0)
+    noise = 0.002 / np.sqrt(5 * 2000)   # 5 s Aufnahme bei 2 kHz
+    err_old, err_new, moves_old, moves_new, inside = [], [], [], [], 0
+    for boresight in rng.uniform(-15, 15, 200):
+        def measure(a):
+            return float(horn_pattern(a, boresight=boresight) + rng.normal(0, noise))
+
+        best, n = coarse_to_fine_moves(measure)
+        err_old.append(best - boresight)
+        moves_old.append(n)
+
+        finder = BoresightFinder()
+        while (a := finder.next_angle()) is not None:
+            finder.add(a, measure(a), noise)
+        x0, dx, _ = finder.result()
+        err_new.append(x0 - boresight)
+        moves_new.append(finder.moves)
+        inside += abs(x0 - boresight) <= 2 * dx
+
+    for name, err, moves in (("Grob-Fein (alt)", err_old, moves_old), ("Raster + Brent", err_new, moves_new)):
+        print(f"{name:16s}: Fahrten {np.mean(moves):5.1f}, Fehler max {np.max(np.abs(err)):.3f}°, "
+              f"rms {np.sqrt(np.mean(np.square(err))):.3f}°")
+    print(f"Fehler innerhalb 2 sigma: {inside / len(err_new):.0%}")
@@ -0,0 +1,199 @@
+"""
+Messkampagnen ohne Tastendrücke.
+Eine Kampagne ist eine Liste von Rezepten (JSON-Datei), die nacheinander
+abgearbeitet werden, z. B. die Reihen aus ToDo.txt (Linse links, rechts,
+oben, unten, andere Linsen). Pro Rezept:
+    pause:    Anweisung an den Bediener (Linse umsetzen, Absorber ...),
+              danach wird auf Enter gewartet; gilt als Umbau, V0 und
+              best_angle werden dann neu bestimmt
+    measure / sweep: [start, stop, step] wie --measure / --sweep
+    dwell, adaptive: wie in scan.py
+    repeat:   so oft hintereinander messen (ohne erneute Pause)
+    ref, find_max: "auto" (neu nur wenn nötig), true (immer neu), false
+    ref_max_age: V0 gilt so viele Sekunden (bei "auto")
+Jeder Scan wird wie gewohnt als CSV gespeichert, daneben eine JSON-Datei
+mit Rezept, V0, best_angle und Zeiten; campaign.json fasst alles zusammen.
+
+Beispiel (recipes.json):
+    [{"name": "Linse mittig", "measure": [-60, 60, 0.5], "repeat": 2},
+     {"name": "Linse links", "pause": "Linse 5 mm nach links, dann Enter", "measure": [-60, 60, 0.5]},
+     {"name": "Übersicht", "sweep": [-90, 90, 0.5], "find_max": false}]
+Start (aus dem Ordner Python/):
+    python -m masterarbeit.campaign recipes.json --out data/kampagne
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from masterarbeit.scan import STATE_IDLE, Progress, _number, run_until_idle
+
+RECIPE_DEFAULTS = {"name": None, "pause": None, "measure": None, "sweep": None, "dwell": None,
+                   "adaptive": False, "repeat": 1, "ref": "auto", "find_max": "auto", "ref_max_age": 3600}
+
+
+def check_recipe(recipe, number=0):
+    """Rezept mit Standardwerten ergänzen; ValueError bei unbekannten Feldern oder ohne measure/sweep."""
+    unknown = set(recipe) - set(RECIPE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Rezept {number}: unbekannte Felder {sorted(unknown)}")
+    recipe = {**RECIPE_DEFAULTS, **recipe}
+    if (recipe["measure"] is None) == (recipe["sweep"] is None):
+        raise ValueError(f"Rezept {number}: genau eins von measure und sweep angeben")
+    if len(recipe["measure"] or recipe["sweep"]) != 3:
+        raise ValueError(f"Rezept {number}: Bereich als [start, stop, step] angeben")
+    for key in ("ref", "find_max"):
+        if recipe[key] not in ("auto", True, False):
+            raise ValueError(f"Rezept {number}: {key} muss \"auto\", true oder false sein")
+    if recipe["name"] is None:
+        recipe["name"] = f"Rezept {number}"
+    return recipe
+
+
+def load_recipes(path):
+    with open(path, encoding="utf-8") as f:
+        return [check_recipe(r, i + 1) for i, r in enumerate(json.load(f))]
+
+
+class Campaign:
+    """
+    Arbeitet Rezepte mit einem fertig eingerichteten Scan ab (siehe scan.setup).
+    prompt: Funktion für Bedieneranweisungen, wartet bis es weitergeht (input);
+            None = nicht warten (Simulation)
+    """
+
+    def __init__(self, scan, source, recipes, directory, prompt=input, log=print):
+        self.scan = scan
+        self.source = source
+        self.recipes = [check_recipe(r, i + 1) for i, r in enumerate(recipes)]
+        self.directory = Path(directory)
+        self.prompt = prompt
+        self.log = log
+        self.entries = []            # eine Zeile pro Scan für campaign.json
+        self.V0_time = None if scan.V0 is None else scan.clock.now()
+        self._defaults = {"save_duration": scan.save_duration, "measure_mode": scan.measure_mode}
+
+    def run(self):
+        """Alle Rezepte abarbeiten. Gibt die Anzahl gespeicherter Scans zurück."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        t0 = self.scan.clock.now()
+        for number, recipe in enumerate(self.recipes, 1):
+            changed = False
+            if recipe["pause"]:
+                changed = True
+                self.log(f"[{recipe['name']}] {recipe['pause']}")
+                if self.prompt is not None:
+                    self.prompt("Weiter mit Enter ... ")
+            for repeat in range(1, recipe["repeat"] + 1):
+                self.log(f"== {number}/{len(self.recipes)} {recipe['name']}, Durchlauf {repeat}/{recipe['repeat']} ==")
+                self._run_scan(recipe, repeat, changed and repeat == 1)
+        saved = sum(entry["file"] is not None for entry in self.entries)
+        self.log(f"Kampagne fertig: {saved} von {len(self.entries)} Scans gespeichert "
+                 f"in {(self.scan.clock.now() - t0) / 60:.0f} min")
+        return saved
+
+    def _needed(self, setting, missing, stale):
+        return setting is True or (setting == "auto" and (missing or stale))
+
+    def _run_scan(self, recipe, repeat, changed):
+        scan = self.scan
+        started = datetime.now().isoformat(timespec="seconds")
+        scan.saved_path = None
+        try:
+            self._prepare(recipe, changed)
+            self._measure(recipe)
+        except (OSError, ValueError, RuntimeError, TimeoutError) as e:
+            # ein Fehler kostet nur diesen Scan, die Kampagne läuft weiter
+            self.log(f"[{recipe['name']}] Fehler: {e}")
+            scan.state = STATE_IDLE
+            scan.on_result = None
+        checkpoint = scan.close_checkpoint()    # nur noch vorhanden, wenn nicht gespeichert wurde
+        entry = {"recipe": recipe, "repeat": repeat, "V0": scan.V0, "V0_age": self._V0_age(),
+                 "best_angle": scan.best_angle, "best_angle_se": scan.best_angle_se, "started": started,
+                 "finished": datetime.now().isoformat(timespec="seconds"),
+                 "file": None if scan.saved_path is None else str(scan.saved_path),
+                 "checkpoint": None if checkpoint is None else str(checkpoint)}
+        self.entries.append(entry)
+        if scan.saved_path is not None:
+            Path(scan.saved_path).with_suffix(".json").write_text(
+                json.dumps(entry, indent=2, ensure_ascii=False, default=float), encoding="utf-8")
+        (self.directory / "campaign.json").write_text(
+            json.dumps(self.entries, indent=2, ensure_ascii=False, default=float), encoding="utf-8")
+
+    def _V0_age(self):
+        return None if self.V0_time is None else self.scan.clock.now() - self.V0_time
+
+    def _prepare(self, recipe, changed):
+        """V0 und best_angle übernehmen, wenn noch gültig, sonst neu bestimmen."""
+        scan = self.scan
+        age = self._V0_age()
+        if self._needed(recipe["ref"], scan.V0 is None, changed or (age is not None and age > recipe["ref_max_age"])):
+            scan.start_ref()
+            run_until_idle(scan, self.source)
+            self.V0_time = scan.clock.now()
+        if self._needed(recipe["find_max"], scan.best_angle is None, changed):
+            scan.start_find_max()
+            run_until_idle(scan, self.source)
+
+    def _measure(self, recipe):
+        scan = self.scan
+        scan.save_duration = recipe["dwell"] if recipe["dwell"] is not None else self._defaults["save_duration"]
+        scan.measure_mode = "adaptive" if recipe["adaptive"] else self._defaults["measure_mode"]
+        scan.measure_start, scan.measure_stop, scan.step = (_number(v) for v in recipe["measure"] or recipe["sweep"])
+        scan.output_dir = self.directory
+        if recipe["measure"]:
+            if not scan.start_measure():
+                return
+            total = len(scan.current_angles) if scan.refiner is None else None
+        else:
+            if not scan.start_sweep():
+                return
+            total = len(np.arange(scan.measure_start, scan.measure_stop + scan.step / 2, scan.step))
+        scan.on_result = Progress(scan.clock, total, self.log)
+        run_until_idle(scan, self.source)
+        scan.on_result = None
+
+
+def main(argv=None):
+    import argparse
+    from functools import partial
+    from masterarbeit.scan import EXIT_FAILED, EXIT_INTERRUPTED, EXIT_OK, add_setup_arguments, setup
+
+    parser = argparse.ArgumentParser(prog="python -m masterarbeit.campaign",
+                                     description="Rezepte aus einer JSON-Datei nacheinander messen.")
+    parser.add_argument("recipes", help="JSON-Datei mit einer Liste von Rezepten")
+    parser.add_argument("--yes", action="store_true", help="bei Pausen nicht auf Enter warten")
+    add_setup_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        recipes = load_recipes(args.recipes)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    out = partial(print, flush=True)
+    try:
+        scan, source, motor, archive = setup(args, log=(lambda *a: None) if args.quiet else out)
+    except ValueError as e:
+        parser.error(str(e))
+    directory = args.out or Path(datetime.now().strftime("%Y-%m-%d")) / datetime.now().strftime("kampagne_%H-%M-%S")
+    campaign = Campaign(scan, source, recipes, directory, prompt=None if args.yes or args.simulate else input,
+                        log=out)
+    try:
+        source.start()
+        saved = campaign.run()
+    except KeyboardInterrupt:
+        out("Abgebrochen.")
+        return EXIT_INTERRUPTED
+    finally:
+        source.stop()
+        if archive is not None:
+            archive.close()
+        motor.close()
+    return EXIT_OK if saved == len(campaign.entries) else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main())
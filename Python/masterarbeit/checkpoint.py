@@ -0,0 +1,118 @@
+"""
+Checkpoint einer laufenden Messung.
+Bisher standen die Ergebnisse bis zum Speichern am Ende nur im Speicher;
+ein Absturz, ein geschlossenes Fenster oder Strg+C bei Winkel 230 von 241
+kostete die ganze Stunde. Jetzt wird nach jedem Winkel eine Zeile an eine
+Datei angehängt (flush + os.fsync, kein Neuschreiben eines DataFrames):
+    1. Zeile:  {"params": {...}}  Bereich, Schrittweite, Modus, V0,
+               best_angle, geplante Winkel
+    danach:    eine Zeile pro Winkel mit den Ergebnisspalten
+JSON Lines, damit eine beim Absturz halb geschriebene letzte Zeile
+einfach übersprungen werden kann. Fortsetzen: Scan.resume(path) bzw.
+python -m masterarbeit.scan --resume <checkpoint>.
+"""
+
+import json
+import os
+
+
+class Checkpoint:
+    """
+    Append-only Datei, eine JSON-Zeile pro Messpunkt.
+    params: neue Datei mit diesen Parametern anlegen; None = bestehende
+            Datei weiterschreiben (halbe letzte Zeile wird abgeschnitten)
+    """
+
+    def __init__(self, path, params=None):
+        self.path = path
+        if params is None:
+            _truncate_partial_line(path)
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self._file = open(path, "x", encoding="utf-8")
+            self._write({"params": params})
+
+    def append(self, row):
+        """Einen Messpunkt (Spalte -> Wert) anhängen, erst nach fsync zurück."""
+        self._write(row)
+
+    def _write(self, obj):
+        self._file.write(json.dumps(obj, default=float) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def remove(self):
+        """Nach erfolgreichem Speichern: Datei schließen und löschen."""
+        self.close()
+        os.remove(self.path)
+
+
+def _truncate_partial_line(path):
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+
+def load_checkpoint(path):
+    """(params, rows) aus einem Checkpoint; rows als Liste von Dicts, unvollständige Zeilen fehlen."""
+    params, rows = None, []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break                    # beim Absturz halb geschrieben
+            entry = json.loads(line)
+            if params is None:
+                params = entry["params"]
+            else:
+                rows.append(entry)
+    if params is None:
+        raise ValueError(f"{path}: kein Checkpoint (Parameterzeile fehlt)")
+    return params, rows
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.checkpoint  (aus dem Ordner Python/)
+    # Kosten pro Winkel: Zeile anhängen mit fsync gegen die ganze Tabelle als CSV neu schreiben.
+    import tempfile
+    import time
+    from pathlib import Path
+
+    import numpy as np
+    import pandas as pd
+
+    columns = ["angle", "mean_db", "std_db", "mean_raw", "std_raw", "se_db", "dwell", "settle_time", "angle_cmd"]
+    angles = np.arange(-60, 60.5, 0.5)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "checkpoint.jsonl"
+        checkpoint = Checkpoint(path, {"measure_start": -60, "measure_stop": 60, "step": 0.5})
+        per_angle = []
+        for a in angles:
+            t0 = time.perf_counter()
+            checkpoint.append(dict(zip(columns, [a, -3.0, 0.1, 0.2, 0.01, 0.01, 2.0, 1.2, a])))
+            per_angle.append(time.perf_counter() - t0)
+        checkpoint.close()
+        with open(path, "a") as f:
+            f.write('{"angle": 60.5, "mean')    # Absturz mitten in der Zeile
+        params, rows = load_checkpoint(path)
+        print(f"anhängen + fsync: {1e3 * np.median(per_angle):.2f} ms pro Winkel, "
+              f"{len(rows)} von {len(angles)} Zeilen wieder gelesen (halbe Zeile übersprungen)")
+
+        results = {k: [] for k in columns}
+        rewrite = []
+        for a in angles:
+            for k, v in zip(columns, [a, -3.0, 0.1, 0.2, 0.01, 0.01, 2.0, 1.2, a]):
+                results[k].append(v)
+            t0 = time.perf_counter()
+            pd.DataFrame(results).to_csv(Path(tmp) / "data.csv", index=False)
+            rewrite.append(time.perf_counter() - t0)
+        print(f"CSV neu schreiben: {1e3 * np.median(rewrite):.2f} ms pro Winkel "
+              f"(letzter {1e3 * rewrite[-1]:.2f} ms, ohne fsync)")
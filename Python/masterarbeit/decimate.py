@@ -0,0 +1,108 @@
+"""
+Ausdünnen langer Messfenster für die Live-Anzeige.
+Bei hohen Sample Rates (USB-6251: einige 100 kS/s) oder langen
+Anzeigefenstern (Drift prüfen) gingen pro Frame Hunderttausende Punkte
+durch matplotlib, obwohl nur rund tausend Pixel Breite da sind. Vor dem
+Zeichnen wird darum auf etwa 2 Punkte pro Pixelspalte reduziert:
+    minmax: pro Bucket Minimum und Maximum in zeitlicher Reihenfolge,
+            komplett vektorisiert; Ausreißer bleiben sichtbar, das Bild
+            ist dasselbe wie mit allen Punkten
+    lttb:   Largest-Triangle-Three-Buckets, ein Punkt pro Bucket (der mit
+            der größten Dreiecksfläche zum vorigen Punkt und zum Mittel des
+            nächsten Buckets); glatter, Schleife über die Buckets
+Der Aufwand fürs Zeichnen hängt dann nur noch von der Fensterbreite ab.
+"""
+
+import numpy as np
+
+
+def minmax_decimate(x, y, buckets):
+    """Min und Max pro Bucket, höchstens 2 * buckets Punkte. Kürzere Daten bleiben unverändert."""
+    y = np.asarray(y)
+    n = len(y)
+    if buckets <= 0 or n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)          # Bucket-Größe, aufgerundet
+    m = n // size                    # volle Buckets
+    full = y[:m * size].reshape(m, size)
+    base = np.arange(m) * size
+    lo = base + full.argmin(axis=1)
+    hi = base + full.argmax(axis=1)
+    idx = np.column_stack((np.minimum(lo, hi), np.maximum(lo, hi))).ravel()
+    if m * size < n:                 # angefangener letzter Bucket
+        tail = y[m * size:]
+        last = m * size + np.array(sorted((tail.argmin(), tail.argmax())))
+        idx = np.concatenate((idx, last))
+    return np.asarray(x)[idx], y[idx]
+
+
+def lttb(x, y, points):
+    """Largest-Triangle-Three-Buckets auf points Punkte (erster und letzter bleiben)."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(y)
+    if points >= n or points < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, points - 1).astype(int)    # points - 2 Buckets zwischen erstem und letztem
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    mean_x, mean_y = np.append(mean_x[1:], x[-1]), np.append(mean_y[1:], y[-1])   # Mittel des nächsten Buckets
+    out = np.empty(points, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return x[out], y[out]
+
+
+def decimate(x, y, points, method="minmax"):
+    """Auf etwa points Punkte ausdünnen (minmax: 2 Punkte pro Bucket)."""
+    if method == "lttb":
+        return lttb(x, y, points)
+    return minmax_decimate(x, y, points // 2)
+
+
+def display_points(ax, per_pixel=2):
+    """Punktzahl für die aktuelle Breite der Achse in Pixeln."""
+    return int(per_pixel * ax.get_window_extent().width)
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.decimate  (aus dem Ordner Python/)
+    # 2 s bei 500 kS/s mit einzelnen Ausreißern: Rechenzeit und ob die Spitzen erhalten bleiben.
+    import time
+
+    rng = np.random.default_rng(0)
+    rate, window, width = 500_000, 2.0, 1000
+    t = np.arange(int(rate * window)) / rate
+    y = 0.3 + 0.01 * np.sin(2 * np.pi * 3 * t) + rng.normal(0, 0.002, len(t))
+    spikes = rng.choice(len(t), 5, replace=False)
+    y[spikes] += 0.5
+    for method in ("minmax", "lttb"):
+        t0 = time.perf_counter()
+        for _ in range(10):
+            xd, yd = decimate(t, y, 2 * width, method)
+        dt = (time.perf_counter() - t0) / 10
+        kept = np.isin(t[spikes], xd).sum()
+        print(f"{method:6s}: {len(y)} -> {len(yd)} Punkte in {1e3 * dt:.1f} ms, "
+              f"{kept}/{len(spikes)} Ausreißer sichtbar, y-Bereich gleich: {yd.max() == y.max() and yd.min() == y.min()}")
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise SystemExit
+    fig, ax = plt.subplots(figsize=(width / 100, 4), dpi=100)
+    line, = ax.plot(t, y, lw=1)
+    for label, data in (("alle Punkte", (t, y)), ("minmax", decimate(t, y, display_points(ax)))):
+        line.set_data(*data)
+        t0 = time.perf_counter()
+        for _ in range(5):
+            fig.canvas.draw()
+        print(f"Zeichnen {label:12s}: {1e3 * (time.perf_counter() - t0) / 5:.1f} ms pro Frame")
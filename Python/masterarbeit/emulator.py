@@ -0,0 +1,165 @@
+"""
+Emulator des Drehtisch-Controllers auf einem Pseudo-Terminal (nur Linux/macOS).
+Öffnet ein pty-Paar und spricht dasselbe Textprotokoll wie der echte
+Controller an COM12 (Move <winkel> <speed>, calibrate, testcal, jeweils
+mit "\\r" abgeschlossen), dazu die Positionsabfrage pos (Antwort
+"POS <winkel>"). Die Skripte öffnen statt "COM12" einfach emulator.port
+mit serial.Serial, sonst ändert sich nichts.
+
+Fahrzeiten kommen aus dem MotorModel (motor.py). Optional lassen sich
+Latenz, verlorene Antworten und ein Verbindungsabbruch einstellen.
+Die Antworten ("OK" / "ERR ...") sind die des Emulators, die Firmware
+des echten Controllers wird von den Skripten nicht ausgewertet.
+
+Start als eigenes Programm (aus dem Ordner Python/):
+    python -m masterarbeit.emulator --latency 0.05 --drop 0.01
+"""
+
+import os
+import select
+import threading
+import tty
+
+import numpy as np
+
+from masterarbeit.motor import MotorModel, parse_command
+from masterarbeit.sources import RealClock
+
+
+class MotorEmulator:
+    """
+    latency:          Verzögerung bis ein Befehl ausgeführt und beantwortet wird (s)
+    jitter:           zusätzliche zufällige Verzögerung, gleichverteilt 0..jitter (s)
+    drop_rate:        Anteil der Befehle, die ausgeführt, aber nicht beantwortet werden
+    disconnect_after: nach so vielen Befehlen wird die Verbindung getrennt (None = nie)
+    """
+
+    def __init__(self, model=None, latency=0.0, jitter=0.0, drop_rate=0.0,
+                 disconnect_after=None, seed=None, log=None):
+        self.model = model if model is not None else MotorModel(RealClock())
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.disconnect_after = disconnect_after
+        self.rng = np.random.default_rng(seed)
+        self.log = log
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.connected = True
+        self.commands = []      # (Zeit, Befehl) aller empfangenen Befehle
+        self.dropped = 0
+        self._running = False
+        self._thread = None
+
+    # ---------- Steuerung ---------- #
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="motor-emulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def disconnect(self):
+        """Verbindung trennen wie beim Abziehen des USB-Kabels: die Gegenseite bekommt EIO."""
+        if self.connected:
+            self.connected = False
+            os.close(self._master)
+
+    def close(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self.disconnect()
+        os.close(self._slave)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Protokoll ---------- #
+    def _run(self):
+        buf = b""
+        while self._running and self.connected:
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                chunk = os.read(self._master, 1024)
+            except OSError:
+                break
+            buf += chunk.replace(b"\n", b"\r")
+            *lines, buf = buf.split(b"\r")
+            for line in lines:
+                if line.strip():
+                    self._handle(line.decode(errors="ignore"))
+                if not self.connected:
+                    return
+
+    def _handle(self, cmd):
+        clock = self.model.clock
+        self.commands.append((clock.now(), cmd))
+        if self.log:
+            self.log(f"<- {cmd}")
+        if self.disconnect_after is not None and len(self.commands) > self.disconnect_after:
+            self.disconnect()
+            return
+        clock.sleep(self.latency + self.rng.uniform(0, self.jitter))
+        response = self.execute(cmd)
+        if self.rng.random() < self.drop_rate:
+            self.dropped += 1
+            return
+        try:
+            os.write(self._master, (response + "\r\n").encode())
+        except OSError:
+            self.connected = False
+
+    def execute(self, cmd):
+        """Befehl auf das MotorModel anwenden und die Antwort zurückgeben."""
+        try:
+            name, args = parse_command(cmd)
+        except ValueError:
+            return f"ERR {cmd}"
+        if name == "move" and len(args) >= 1:
+            speed = args[1] if len(args) > 1 else 5
+            if speed <= 0:
+                return f"ERR {cmd}"
+            self.model.move(args[0], speed)
+            return "OK"
+        if name in ("calibrate", "testcal"):
+            self.model.calibrate()
+            return "OK"
+        if name == "pos":
+            return f"POS {self.model.angle:.3f}"
+        return f"ERR {cmd}"
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Drehtisch-Emulator auf einem Pseudo-Terminal")
+    parser.add_argument("--latency", type=float, default=0.0, help="Antwortverzögerung in s")
+    parser.add_argument("--jitter", type=float, default=0.0, help="zusätzliche zufällige Verzögerung in s")
+    parser.add_argument("--drop", type=float, default=0.0, help="Anteil verlorener Antworten")
+    parser.add_argument("--disconnect-after", type=int, default=None, help="Verbindung nach N Befehlen trennen")
+    parser.add_argument("--deg-per-speed", type=float, default=1.0, help="°/s pro Einheit speed")
+    parser.add_argument("--calibrate-time", type=float, default=60.0, help="Dauer von calibrate in s")
+    args = parser.parse_args()
+
+    clock = RealClock()
+    model = MotorModel(clock, deg_per_speed=args.deg_per_speed, calibrate_time=args.calibrate_time)
+    emulator = MotorEmulator(model, latency=args.latency, jitter=args.jitter, drop_rate=args.drop,
+                             disconnect_after=args.disconnect_after, log=print)
+    with emulator:
+        print(f"Emulator läuft auf {emulator.port}  (Strg+C beendet)")
+        try:
+            while emulator.connected:
+                time.sleep(1)
+            print("Verbindung getrennt.")
+        except KeyboardInterrupt:
+            pass
+        print(f"{len(emulator.commands)} Befehle, {emulator.dropped} Antworten verworfen, "
+              f"Winkel {model.angle:.2f}°")
@@ -0,0 +1,192 @@
+"""
+Schnelle Live-Anzeige mit matplotlib-Blitting.
+Bisher wurde pro Block die ganze Figur neu gezeichnet (draw_idle +
+plt.pause), samt Achsen, Beschriftung und Widgets. BlitRenderer speichert
+den statischen Hintergrund einmal und zeichnet pro Frame nur noch die
+veränderlichen Artists (Messkurve, Texte) darüber:
+    - Frames höchstens mit fps, unabhängig davon, wie schnell Blöcke kommen
+    - y-Grenzen über AxisLimits mit Hysterese: sofort erweitern, wenn die
+      Daten herauslaufen, verkleinern erst, wenn sie deutlich kleiner sind;
+      nur dann wird die ganze Figur neu gezeichnet
+    - Zeit pro Frame wird gemessen, status() fasst sie zusammen
+matplotlib wird nicht importiert, der Renderer bekommt Figur und Artists.
+"""
+
+import time
+
+import numpy as np
+
+
+class AxisLimits:
+    """
+    Achsgrenzen mit Hysterese.
+    margin: Rand um die Daten beim Setzen neuer Grenzen (Anteil der Spanne)
+    shrink: verkleinert wird erst, wenn die Daten weniger als diesen Anteil
+            der aktuellen Spanne belegen
+    """
+
+    def __init__(self, margin=0.1, shrink=0.4, min_span=1e-9):
+        self.margin = margin
+        self.shrink = shrink
+        self.min_span = min_span
+        self.limits = None
+
+    def update(self, lo, hi):
+        """Neue Grenzen (lo, hi), wenn sie sich ändern müssen, sonst None."""
+        if not (np.isfinite(lo) and np.isfinite(hi)):
+            return None
+        span = max(hi - lo, self.min_span)
+        if self.limits is not None:
+            cur_lo, cur_hi = self.limits
+            inside = cur_lo <= lo and hi <= cur_hi
+            if inside and span >= self.shrink * (cur_hi - cur_lo):
+                return None
+        pad = self.margin * span
+        self.limits = (lo - pad, hi + pad)
+        return self.limits
+
+
+class FrameTimer:
+    """Frame-Takt begrenzen und Zeit pro Frame messen (s, perf_counter)."""
+
+    def __init__(self, fps=20, history=500, clock=time.perf_counter):
+        self.fps = fps
+        self.clock = clock
+        self._times = np.zeros(history)
+        self.frames = 0
+        self._last = -np.inf
+
+    def due(self):
+        """Ist der nächste Frame dran?"""
+        return self.fps is None or self.clock() - self._last >= 1 / self.fps
+
+    def start(self):
+        self._last = self.clock()
+        return self._last
+
+    def stop(self, t0):
+        self._times[self.frames % len(self._times)] = self.clock() - t0
+        self.frames += 1
+
+    def summary(self):
+        """(Frames, Median, 95%-Quantil, Maximum) der Frame-Zeit in s über die letzten Frames."""
+        if self.frames == 0:
+            return None
+        times = self._times[:min(self.frames, len(self._times))]
+        return self.frames, float(np.median(times)), float(np.percentile(times, 95)), float(times.max())
+
+
+class BlitRenderer:
+    """
+    fig:     matplotlib-Figur
+    artists: veränderliche Artists (Linien, Texte), werden animated gesetzt
+    fps:     höchstens so viele Frames pro Sekunde (None = jedes draw())
+    """
+
+    def __init__(self, fig, artists, fps=20):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.artists = list(artists)
+        for artist in self.artists:
+            artist.set_animated(True)
+        self.timer = FrameTimer(fps)
+        self.limits = {}                 # Achse -> AxisLimits
+        self.full_redraws = 0
+        self._background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        # jede volle Zeichnung (erstes Mal, Größe, Widgets, Beschriftung) erneuert den Hintergrund
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.full_redraws += 1
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+    def invalidate(self):
+        """Hintergrund neu zeichnen lassen (z. B. nach set_ylabel)."""
+        self._background = None
+
+    def set_ylim(self, ax, lo, hi):
+        """y-Grenzen aus dem Datenbereich lo..hi, mit Hysterese."""
+        limits = self.limits.setdefault(ax, AxisLimits())
+        new = limits.update(lo, hi)
+        if new is not None:
+            ax.set_ylim(*new)
+            self.invalidate()
+
+    def draw(self):
+        """Frame zeichnen, falls dran; GUI-Ereignisse werden immer abgearbeitet. True = gezeichnet."""
+        drawn = False
+        if self.timer.due():
+            t0 = self.timer.start()
+            if self._background is None:
+                self.canvas.draw()           # löst _on_draw aus
+            else:
+                self.canvas.restore_region(self._background)
+                self._draw_artists()
+                self.canvas.blit(self.fig.bbox)
+            self.timer.stop(t0)
+            drawn = True
+        self.canvas.flush_events()
+        return drawn
+
+    def pause(self, interval):
+        """Wie plt.pause, aber ohne volles Neuzeichnen der Figur."""
+        self.draw()
+        self.canvas.start_event_loop(interval)
+
+    def status(self):
+        summary = self.timer.summary()
+        if summary is None:
+            return "Anzeige: keine Frames"
+        frames, median, p95, worst = summary
+        return (f"Anzeige: {frames} Frames, {self.full_redraws} davon voll gezeichnet, "
+                f"Frame-Zeit Median {1e3 * median:.1f} ms, 95% {1e3 * p95:.1f} ms, max {1e3 * worst:.1f} ms")
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.liveplot  (aus dem Ordner Python/)
+    # Zeit pro Frame: volles Neuzeichnen wie bisher gegen Blitting, ohne Fenster (Agg).
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rng = np.random.default_rng(0)
+    n, frames = 500, 200
+
+    def setup():
+        fig, ax = plt.subplots()
+        line, = ax.plot(np.arange(n), np.zeros(n), lw=1)
+        texts = [ax.text(0.7, 0.95 - 0.05 * i, "", transform=ax.transAxes) for i in range(3)]
+        ax.set_xlim(0, n)
+        return fig, ax, line, texts
+
+    fig, ax, line, texts = setup()
+    t = time.perf_counter()
+    for _ in range(frames):
+        data = 0.3 + rng.normal(0, 0.01, n)
+        line.set_ydata(data)
+        ax.set_ylim(data.min() - 0.5, data.max() + 0.5)
+        for text in texts:
+            text.set_text(f"{data.mean():.4f}")
+        fig.canvas.draw()
+    full = (time.perf_counter() - t) / frames
+    plt.close(fig)
+
+    fig, ax, line, texts = setup()
+    renderer = BlitRenderer(fig, [line] + texts, fps=None)
+    for _ in range(frames):
+        data = 0.3 + rng.normal(0, 0.01, n)
+        line.set_ydata(data)
+        renderer.set_ylim(ax, data.min(), data.max())
+        for text in texts:
+            text.set_text(f"{data.mean():.4f}")
+        renderer.draw()
+    print(f"volles Neuzeichnen: {1e3 * full:.1f} ms pro Frame")
+    print(renderer.status())
@@ -0,0 +1,276 @@
+"""
+Ansteuerung des Drehtischs.
+Das Protokoll ist das aus rot_live.py / rot_test.py: Textbefehle mit "\\r",
+    Move <winkel> <speed>   fährt absolut auf <winkel>
+    calibrate               Referenzfahrt (ca. 70 s)
+    testcal                 Kalibrierung prüfen (ca. 70 s)
+    pos                     Positionsabfrage, Antwort mit dem Ist-Winkel
+                            (nur der Emulator; ob die Firmware eine Abfrage
+                            kennt, ist offen, daher standardmäßig aus)
+SerialMotor spricht mit dem echten Controller, SimulatedMotor mit einem
+MotorModel, das Fahrzeiten aus Strecke und Geschwindigkeit berechnet.
+position() liefert den Ist-Winkel (NaN = noch keine neue Antwort, None =
+keine Rückmeldung), PositionTrack sammelt die Rückmeldungen als
+Zeitreihe und interpoliert Winkel für beliebige Zeiten.
+"""
+
+import re
+
+import numpy as np
+
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?")
+
+
+def parse_command(cmd):
+    """'Move 12.5 5' -> ("move", [12.5, 5.0]); Groß-/Kleinschreibung egal."""
+    parts = cmd.strip().split()
+    if not parts:
+        return "", []
+    return parts[0].lower(), [float(p) for p in parts[1:]]
+
+
+def parse_position(reply):
+    """Erste Zahl in der Antwort auf die Positionsabfrage, z. B. 'POS -12.350' -> -12.35; sonst None."""
+    match = _NUMBER.search(reply or "")
+    return float(match.group()) if match else None
+
+
+class PositionTrack:
+    """
+    Zeitreihe (Zeit, Ist-Winkel) der Positionsrückmeldung. Zeiten nach
+    Sample-Takt der Datenquelle, damit sich Blöcke und Samples direkt
+    zuordnen lassen. Speicher wächst durch Verdoppeln, append ist O(1).
+    """
+
+    def __init__(self, capacity=4096):
+        self._t = np.empty(capacity)
+        self._a = np.empty(capacity)
+        self.n = 0
+
+    def clear(self):
+        self.n = 0
+
+    def append(self, t, angle):
+        if self.n == len(self._t):
+            self._t = np.concatenate((self._t, np.empty_like(self._t)))
+            self._a = np.concatenate((self._a, np.empty_like(self._a)))
+        self._t[self.n] = t
+        self._a[self.n] = angle
+        self.n += 1
+
+    @property
+    def times(self):
+        return self._t[:self.n]
+
+    @property
+    def angles(self):
+        return self._a[:self.n]
+
+    def angle_at(self, t):
+        """Ist-Winkel zu Zeit(en) t, linear interpoliert; NaN ohne Rückmeldung."""
+        if self.n == 0:
+            return np.full(np.shape(t), np.nan) if np.ndim(t) else np.nan
+        return np.interp(t, self.times, self.angles)
+
+    def mean_angle(self, t0, t1, points=64):
+        """Mittlerer Ist-Winkel im Zeitraum t0..t1."""
+        return float(np.mean(self.angle_at(np.linspace(t0, t1, points))))
+
+    def arrived(self, target, tol=0.05, hold=0.25):
+        """True, wenn alle Rückmeldungen der letzten hold Sekunden (mind. 2) höchstens tol vom Ziel abweichen."""
+        if self.n < 2:
+            return False
+        times, angles = self.times, self.angles
+        first = np.searchsorted(times, times[-1] - hold)
+        recent = angles[min(first, self.n - 2):]
+        return bool(np.all(np.abs(recent - target) <= tol))
+
+
+class MotorModel:
+    """
+    Einfaches Bewegungsmodell des Drehtischs auf einer Uhr (RealClock/VirtualClock).
+    Fahrzeit = overhead + Strecke / (speed * deg_per_speed).
+    """
+
+    def __init__(self, clock, angle=0.0, deg_per_speed=1.0, overhead=0.2,
+                 calibrate_time=60.0, home_angle=0.0):
+        self.clock = clock
+        self.deg_per_speed = deg_per_speed
+        self.overhead = overhead
+        self.calibrate_time = calibrate_time
+        self.home_angle = home_angle
+        # aktuelle Fahrt: von _from (bei _t0) nach _to (bei _t1)
+        self._from = self._to = float(angle)
+        self._t0 = self._t1 = clock.now()
+        self.last_stop = -np.inf   # Zeitpunkt, an dem die letzte Fahrt endete
+
+    def move_duration(self, start, target, speed):
+        return self.overhead + abs(target - start) / (speed * self.deg_per_speed)
+
+    def move(self, target, speed):
+        """Neue Fahrt ab jetzt; eine laufende Fahrt wird von der aktuellen Position aus abgelöst."""
+        now = self.clock.now()
+        self._from = float(self.angle_at(now))
+        self._to = float(target)
+        self._t0 = now
+        self._t1 = now + self.move_duration(self._from, self._to, speed)
+        self.last_stop = self._t1
+        return self._t1
+
+    def calibrate(self):
+        """Referenzfahrt: steht calibrate_time lang, danach auf home_angle."""
+        now = self.clock.now()
+        self._from = self._to = self.home_angle
+        self._t0, self._t1 = now, now + self.calibrate_time
+        self.last_stop = self._t1
+        return self._t1
+
+    def angle_at(self, t):
+        """Winkel zu Zeit(en) t, linear zwischen Start und Ziel der Fahrt."""
+        t = np.asarray(t, dtype=float)
+        if self._t1 <= self._t0 or self._from == self._to:
+            return np.full_like(t, self._to) if t.ndim else self._to
+        frac = np.clip((t - self._t0 - self.overhead) / (self._t1 - self._t0 - self.overhead), 0, 1)
+        return self._from + frac * (self._to - self._from)
+
+    def busy(self):
+        return self.clock.now() < self._t1
+
+    @property
+    def angle(self):
+        return float(self.angle_at(self.clock.now()))
+
+
+class SerialMotor:
+    """
+    Echter Controller über die serielle Schnittstelle. Läuft über einen
+    SerialDriver (serial_driver.py): send() und position() kehren sofort
+    zurück, Antworten und Fehler kommen im Hintergrund.
+    position_cmd:   Befehl der Positionsabfrage, None = keine Rückmeldung.
+                    Wird beim Verbinden einmal abgefragt (probe_position);
+                    kommt kein Winkel zurück, ist die Rückmeldung gleich aus.
+    position_reply: Präfix der Antwort auf position_cmd; None = jede Zeile
+                    mit einer Zahl. Alle anderen Zeilen gelten als Antwort
+                    auf die übrigen Befehle.
+    """
+
+    def __init__(self, port="COM12", baudrate=115200, timeout=1, position_cmd=None, position_reply="POS",
+                 log=print):
+        from masterarbeit.serial_driver import SerialDriver
+
+        # Move/calibrate und Positionsabfrage gleichzeitig offen, die Antworten trennt _is_position
+        self.driver = SerialDriver(port, baudrate, timeout=timeout, max_pending=2, log=log)
+        self.position_cmd = position_cmd
+        self.position_reply = position_reply
+        self.log = log
+        self.position_time = None    # Zeit der letzten Positionsantwort (time.monotonic, Mitte der Laufzeit)
+        self.max_position_failures = 3   # so viele Fehlschläge in Folge, dann keine Rückmeldung mehr
+        self._query = None
+        self._query_failures = 0
+        if self.position_cmd:
+            self.probe_position()
+
+    def probe_position(self):
+        """
+        Einmal abfragen, ob der Controller position_cmd mit einem Winkel
+        beantwortet. Sonst position_cmd = None: der Scan merkt das bei der
+        ersten Abfrage, statt bis zum max_position_failures-ten Timeout
+        keine Einschwingerkennung zu bekommen. Gibt True/False zurück.
+        """
+        try:
+            reply = self.driver.submit(self.position_cmd, expect=self._is_position).result()
+        except (TimeoutError, ConnectionError) as error:
+            answer = f"keine Antwort ({error})"
+        else:
+            if parse_position(reply.text) is not None:
+                return True
+            answer = f"Antwort ohne Winkel: {reply.text!r}"
+        self.log(f"Positionsabfrage {self.position_cmd!r}: {answer}, keine Rückmeldung")
+        self.position_cmd = None
+        return False
+
+    def _is_position(self, text):
+        if self.position_reply:
+            return text.upper().startswith(self.position_reply.upper())
+        return parse_position(text) is not None
+
+    def send(self, cmd, timeout=None):
+        """
+        Befehl einreihen; gibt das Future mit der Antwort (Reply) zurück.
+        timeout: für Befehle, die erst am Ende antworten (Move, calibrate),
+                 z. B. die geschätzte Fahrzeit plus Reserve; None = Standard
+        """
+        future = self.driver.submit(cmd, timeout, expect=lambda text: not self._is_position(text))
+        future.add_done_callback(self._check)
+        return future
+
+    def _check(self, future):
+        error = future.exception()
+        if error is not None:
+            self.log(f"Motorbefehl fehlgeschlagen: {error}")
+
+    def position(self):
+        """
+        Neuer Ist-Winkel seit dem letzten Aufruf, NaN solange keine neue
+        Antwort da ist, None wenn der Controller keine Position liefert.
+        Die Abfrage läuft im Hintergrund, position_time ist ihre Zeit.
+        """
+        if not self.position_cmd:
+            return None
+        query, angle = self._query, np.nan
+        if query is not None and not query.done():
+            return angle
+        if query is not None:
+            try:
+                reply = query.result()
+            except TimeoutError:
+                self._query_failures += 1
+            except ConnectionError:
+                pass
+            else:
+                parsed = parse_position(reply.text)
+                if parsed is None:
+                    self._query_failures += 1
+                    self.log(f"Positionsantwort ohne Winkel: {reply.text!r}")
+                else:
+                    angle = parsed
+                    self._query_failures = 0
+                    self.position_time = reply.sent + reply.rtt / 2
+            if self._query_failures >= self.max_position_failures:
+                # z. B. Firmware kennt die Abfrage nicht; einzelne Aussetzer schalten nicht ab
+                self.log(f"{self._query_failures} Positionsabfragen in Folge ohne Winkel, keine Rückmeldung mehr")
+                self.position_cmd = None
+                return None
+        self._query = self.driver.submit(self.position_cmd, expect=self._is_position)
+        return angle
+
+    def close(self):
+        summary = self.driver.rtt_summary()
+        if summary is not None:
+            n, median, p95, worst = summary
+            self.log(f"Motorbefehle: {n}, Laufzeit Median {1e3 * median:.0f} ms, "
+                     f"95% {1e3 * p95:.0f} ms, max {1e3 * worst:.0f} ms, {self.driver.timeouts} Timeouts")
+        self.driver.close()
+
+
+class SimulatedMotor:
+    """Gleiche Schnittstelle wie SerialMotor, fährt aber ein MotorModel."""
+
+    def __init__(self, model, position_noise=0.0, seed=None):
+        self.model = model
+        self.position_noise = position_noise
+        self.rng = np.random.default_rng(seed)
+
+    def position(self):
+        return self.model.angle + self.rng.normal(0, self.position_noise) if self.position_noise else self.model.angle
+
+    def send(self, cmd, timeout=None):
+        name, args = parse_command(cmd)
+        if name == "move" and len(args) >= 1:
+            self.model.move(args[0], args[1] if len(args) > 1 else 5)
+        elif name in ("calibrate", "testcal"):
+            self.model.calibrate()
+        return ""
+
+    def close(self):
+        pass
@@ -0,0 +1,249 @@
+"""
+Outlier-Removal (MAD / Hampel-Filter)
+Vektorisierte Version der remove_outliers-Schleife aus den Messskripten.
+Liefert exakt dieselbe Maske wie die alte Schleife (gleiche Randbehandlung,
+Fenster mit mad == 0 werden übersprungen), aber ohne Python-Loop pro Sample.
+Mehrere Kanäle (Kanäle x Samples) werden in einem Aufruf gefiltert, jeder
+Kanal für sich entlang der letzten Achse.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Zeilen pro Durchlauf, damit das Fenster-Array bei langen Aufnahmen
+# nicht den Speicher sprengt und im Cache bleibt (CHUNK x (2k+1) float64).
+CHUNK = 1024
+
+# ========================== #
+# ==== FUNKTIONEN ==== #
+# ========================== #
+
+def _edge_mask(data, idx, k, t0):
+    """
+    Maske für einzelne Positionen mit abgeschnittenem Fenster (Ränder).
+    Alle Positionen und Kanäle in einem Aufruf: die Fenster werden mit NaN
+    auf 2k+1 aufgefüllt, NaN sortiert ans Ende, der Median ist dann das
+    mittlere (bzw. das Mittel der beiden mittleren) der gültigen Elemente.
+    """
+    idx = np.asarray(idx, dtype=int)
+    n = data.shape[-1]
+    if idx.size == 0:
+        return np.ones(data.shape[:-1] + (0,), dtype=bool)
+    cols = idx[:, None] + np.arange(-k, k + 1)
+    inside = (cols >= 0) & (cols < n)
+    windows = np.where(inside, data[..., np.clip(cols, 0, n - 1)], np.nan)
+    length = inside.sum(axis=1)
+    rows, lo, hi = np.arange(len(idx)), (length - 1) // 2, length // 2
+
+    def median(w):
+        w = np.sort(w, axis=-1)
+        return (w[..., rows, lo] + w[..., rows, hi]) / 2     # wie np.median
+
+    med = median(windows)
+    mad = median(np.abs(windows - med[..., None]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = 0.6745 * (data[..., idx] - med) / mad
+    return (mad == 0) | ~(np.abs(z) > t0)
+
+
+def _interior_mask(data, k, t0):
+    """Maske für alle Positionen k..len-k-1 mit vollem Fenster (2k+1)."""
+    n_out = data.shape[-1] - 2 * k
+    mask = np.ones(data.shape[:-1] + (max(n_out, 0),), dtype=bool)
+    if n_out <= 0:
+        return mask
+    windows = sliding_window_view(data, 2 * k + 1, axis=-1)
+    chunk = max(CHUNK // max(data[..., 0].size, 1), 1)     # gleich viel Speicher pro Durchlauf
+    for start in range(0, n_out, chunk):
+        w = windows[..., start:start + chunk, :]
+        # ungerade Fensterlänge: Median = k-tes Element, wie np.median
+        med = np.partition(w, k, axis=-1)[..., k]
+        mad = np.partition(np.abs(w - med[..., None]), k, axis=-1)[..., k]
+        center = w[..., k]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = 0.6745 * (center - med) / mad
+        mask[..., start:start + w.shape[-2]] = (mad == 0) | ~(np.abs(z) > t0)
+    return mask
+
+
+def hampel_mask(data, k=15, t0=3):
+    """
+    Bool-Maske (True = behalten) für den rollenden MAD-Filter.
+    Fenster data[i-k:i+k+1], am Rand abgeschnitten wie in der alten Schleife.
+    Bei mehreren Kanälen (Kanäle x Samples) eine Maske derselben Form.
+    """
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
+    if n <= 2 * k:
+        return _edge_mask(data, range(n), k, t0)
+    mask = np.empty(data.shape, dtype=bool)
+    mask[..., :k] = _edge_mask(data, range(k), k, t0)
+    mask[..., k:n - k] = _interior_mask(data, k, t0)
+    mask[..., n - k:] = _edge_mask(data, range(n - k, n), k, t0)
+    return mask
+
+
+def remove_outliers(data, k=15, t0=3):
+    """Entfernt Ausreißer aus den Daten"""
+    data = np.asarray(data, dtype=float)
+    return data[hampel_mask(data, k, t0)]
+
+
+class StreamingHampel:
+    """
+    Hampel-Filter für fortlaufende DAQ-Blöcke.
+    Hält die letzten 2k Rohwerte zwischen zwei feed()-Aufrufen, damit das
+    Fenster nicht an jeder Blockgrenze abgeschnitten wird. Ausgabe hat eine
+    feste Latenz von k Samples; feed() über alle Blöcke + flush() liefert
+    dasselbe wie remove_outliers() auf der gesamten Aufnahme.
+    Blöcke mit mehreren Kanälen (Kanäle x Samples) werden gemeinsam
+    gefiltert; damit alle Kanäle gleich lang bleiben, kommen Ausreißer dann
+    als NaN zurück statt entfernt zu werden.
+    """
+
+    def __init__(self, k=15, t0=3):
+        self.k = k
+        self.t0 = t0
+        self.reset()
+
+    def reset(self):
+        """Neuen Datenstrom beginnen (z. B. nach einer Motorbewegung)."""
+        self._buf = None
+        self._next = 0  # Index in _buf des ersten noch nicht bewerteten Samples
+
+    def _judge(self, stop):
+        """Bewertet _buf[_next:stop] und gibt die behaltenen Werte zurück."""
+        buf, k, first = self._buf, self.k, self._next
+        n = buf.shape[-1]
+        if stop <= first:
+            return buf[..., :0] if buf.ndim > 1 else buf[:0]
+        mask = np.empty(buf.shape[:-1] + (stop - first,), dtype=bool)
+        # Positionen, deren Fenster links oder rechts über _buf hinausragt
+        edge = list(range(first, min(stop, k))) + list(range(max(first, k, n - k), stop))
+        inner_lo = max(first, k)
+        inner_hi = min(stop, n - k)
+        if inner_hi > inner_lo:
+            mask[..., inner_lo - first:inner_hi - first] = _interior_mask(buf[..., inner_lo - k:inner_hi + k],
+                                                                          k, self.t0)
+        if edge:
+            mask[..., np.subtract(edge, first)] = _edge_mask(buf, edge, k, self.t0)
+        self._next = stop
+        if buf.ndim == 1:
+            return buf[first:stop][mask]
+        return np.where(mask, buf[..., first:stop], np.nan)
+
+    def feed(self, block):
+        """Neuen Block anhängen, bereinigte Werte bis k Samples vor Blockende zurückgeben."""
+        if self._buf is None:
+            self._buf = np.array(block, dtype=float)    # Kopie, block kann ein Pool-View sein
+        else:
+            self._buf = np.concatenate((self._buf, np.asarray(block, dtype=float)), axis=-1)
+        clean = self._judge(self._buf.shape[-1] - self.k)
+        # nur k Kontext-Samples + k unbewertete Samples aufheben
+        drop = max(0, self._next - self.k)
+        if drop:
+            self._buf = self._buf[..., drop:]
+            self._next -= drop
+        return clean
+
+    def flush(self):
+        """Letzte k Samples mit abgeschnittenem Fenster bewerten und Strom beenden."""
+        clean = np.empty(0) if self._buf is None else self._judge(self._buf.shape[-1])
+        self.reset()
+        return clean
+
+
+def _remove_outliers_loop(data, k=15, t0=3):
+    """Ursprüngliche Schleifen-Version, nur noch als Referenz für den Vergleich."""
+    data = np.array(data)
+    mask = np.ones(len(data), dtype=bool)
+    for i in range(len(data)):
+        left = max(0, i - k)
+        right = min(len(data), i + k + 1)
+        window = data[left:right]
+        med = np.median(window)
+        mad = np.median(np.abs(window - med))
+        if mad == 0:
+            continue
+        z = 0.6745 * (data[i] - med) / mad
+        if abs(z) > t0:
+            mask[i] = False
+    return data[mask]
+
+
+# ========================== #
+# ==== VERGLEICHSTEST ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.outliers  (aus dem Ordner Python/)
+    import time
+
+    rng = np.random.default_rng(0)
+    N = 40000  # 20 s bei 2 kHz, wie rec_buffer in read_save_nidaqmx.py
+    data = 0.2 + rng.normal(0, 0.01, N)
+    spikes = rng.choice(N, 200, replace=False)
+    data[spikes] += rng.choice([-1.0, 1.0], 200) * rng.uniform(0.05, 2.0, 200)
+    data[1000:1100] = 0.2  # konstantes Stück -> mad == 0
+    data = np.round(data, 4)  # Quantisierung wie beim ADC, erzeugt Gleichstände
+
+    for n in (0, 1, 5, 30, 31, 32, 500):
+        for k in (1, 15, 20):
+            assert np.array_equal(remove_outliers(data[:n], k), _remove_outliers_loop(data[:n], k)), (n, k)
+
+    t = time.perf_counter()
+    ref = _remove_outliers_loop(data)
+    t_loop = time.perf_counter() - t
+    t = time.perf_counter()
+    new = remove_outliers(data)
+    t_vec = time.perf_counter() - t
+
+    assert np.array_equal(ref, new)
+
+    # Streaming: beliebige Blockgrößen, Ergebnis wie auf der ganzen Aufnahme
+    for sizes in ([500], [1, 7, 3], [40, 1000, 13]):
+        hampel = StreamingHampel()
+        parts, pos, s = [], 0, 0
+        while pos < N:
+            n = sizes[s % len(sizes)]
+            parts.append(hampel.feed(data[pos:pos + n]))
+            pos, s = pos + n, s + 1
+        parts.append(hampel.flush())
+        assert np.array_equal(np.concatenate(parts), ref), sizes
+
+    print(f"gleiche Maske: {len(data) - len(new)} Ausreißer entfernt")
+    print(f"Schleife: {t_loop*1e3:.1f} ms, vektorisiert: {t_vec*1e3:.1f} ms, Faktor {t_loop/t_vec:.0f}x")
+
+    # Mehrere Kanäle: ein Filter über (Kanäle x Samples) gegen einen Filter pro Kanal,
+    # Blöcke à 500 Samples wie in der Messschleife. Ohne Neustart kostet das Filtern
+    # pro Sample gleich viel (np.partition über die Fenster), gemeinsam spart nur die
+    # Aufrufe; mit reset() alle 4 Blöcke (nach jeder Fahrt, 1 s bei 2 kHz) kommen die
+    # Ränder dazu, die _edge_mask für alle Kanäle in einem Aufruf bewertet.
+    channels = 4
+    multi = np.stack([np.roll(data, 997 * c) for c in range(channels)])
+
+    def stream(hampel, x, reset_every):
+        parts = []
+        for b, pos in enumerate(range(0, N, 500)):
+            if reset_every and b and b % reset_every == 0:
+                parts.append(hampel.flush())
+            parts.append(hampel.feed(x[..., pos:pos + 500]))
+        parts.append(hampel.flush())
+        return np.concatenate(parts, axis=-1)
+
+    def best_of(f, repeat=5):
+        """Ergebnis und kürzeste Laufzeit aus repeat Durchläufen (Messrauschen)."""
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            result = f()
+            times.append(time.perf_counter() - t)
+        return result, min(times)
+
+    for reset_every in (None, 4):
+        for n_ch in (1, channels):
+            single, t_single = best_of(lambda: [stream(StreamingHampel(), multi[c], reset_every)
+                                                for c in range(n_ch)])
+            joint, t_joint = best_of(lambda: stream(StreamingHampel(), multi[:n_ch], reset_every))
+            assert all(np.array_equal(joint[c][~np.isnan(joint[c])], single[c]) for c in range(n_ch))
+            print(f"{n_ch} Kanäle{', reset alle 4 Blöcke' if reset_every else ''}: je Kanal ein Filter "
+                  f"{t_single*1e3:.1f} ms, alle Kanäle gemeinsam {t_joint*1e3:.1f} ms (gleiches Ergebnis)")
@@ -0,0 +1,243 @@
+"""
+Live-Antennendiagramm während eines Scans.
+Bisher sah man während der Messung nur den Rohdaten-Block und den Winkel,
+das Diagramm erst nach dem Speichern in Auswertung_Charakterisation.py.
+PatternView ist ein zweites Fenster mit kartesischem und polarem
+Diagramm; jeder fertige Messpunkt (angle, mean_db ± std_db) kommt sofort
+dazu, optional über einem Referenzdiagramm aus einer früheren CSV.
+
+Die Punkte liegen nach Winkel sortiert (auch bei der adaptiven Messung,
+die zwischen schon gemessene Winkel misst). Kommt ein Punkt am Rand dazu,
+wird nur das neue Kurvenstück zum Nachbarn samt Fehlerbalken auf den
+gespeicherten Hintergrund gemalt und per Blit angezeigt, der Hintergrund
+dann übernommen: der Aufwand hängt nicht von der Zahl der Punkte ab.
+Liegt er zwischen zwei Punkten, steckt deren alte Verbindung schon im
+Hintergrund; dann, wie bei Fenstergröße und Achsbereich, volles
+Neuzeichnen aus den Arrays.
+"""
+
+import numpy as np
+
+
+def load_reference(path):
+    """Referenzdiagramm (angle, mean_db) aus einer gespeicherten Ergebnis-CSV, nach Winkel sortiert."""
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    angle = df["angle"].to_numpy(dtype=float) if "angle" in df else df.index.to_numpy(dtype=float)
+    order = np.argsort(angle, kind="stable")
+    return angle[order], df["mean_db"].to_numpy(dtype=float)[order]
+
+
+class PatternView:
+    """
+    reference: Pfad zu einer Ergebnis-CSV oder (angle, mean_db), None = ohne
+    span:      Winkelbereich der kartesischen Achse (°)
+    floor:     untere Grenze in dB (Mitte des Polardiagramms)
+    """
+
+    def __init__(self, reference=None, span=(-60, 60), floor=-40.0, capacity=1024):
+        import matplotlib.pyplot as plt  # erst hier, das Modul bleibt ohne matplotlib importierbar
+
+        self.floor = floor
+        self.fig = plt.figure(figsize=(11, 5))
+        if self.fig.canvas.manager is not None:
+            self.fig.canvas.manager.set_window_title("Antennendiagramm")
+        self.ax = self.fig.add_subplot(1, 2, 1)
+        self.ax_polar = self.fig.add_subplot(1, 2, 2, projection="polar")
+        self.ax.set_xlim(*span)
+        self.ax.set_ylim(floor, 3)
+        self.ax.set_xlabel("Angle (°)")
+        self.ax.set_ylabel("Voltage Level (db)")
+        self.ax.grid(True)
+        self.ax_polar.set_theta_zero_location("N")
+        self.ax_polar.set_theta_direction(-1)
+        self.ax_polar.set_thetamin(min(span[0], -90))
+        self.ax_polar.set_thetamax(max(span[1], 90))
+        self.ax_polar.set_rlim(floor, 3)
+
+        self.reference = None
+        if reference is not None:
+            if isinstance(reference, tuple):
+                self.reference = tuple(np.asarray(r, dtype=float) for r in reference)
+            else:
+                self.reference = load_reference(reference)
+            ref_angle, ref_db = self.reference
+            style = dict(color="gray", ls="--", lw=1, label="Referenz")
+            self.ax.plot(ref_angle, ref_db, **style)
+            self.ax_polar.plot(np.radians(ref_angle), np.maximum(ref_db, floor), **style)
+            self.ax.legend(loc="lower center")
+        self.text = self.ax.text(0.02, 0.97, "", transform=self.ax.transAxes, va="top", color="blue")
+
+        # Messpunkte (wachsen durch Verdoppeln), schon in der Form, die die Kurven brauchen:
+        # Polarwinkel/Radius und Fehlerbalken als eine Linie mit NaN-Lücken (3 Werte pro Punkt)
+        self._data = {"angle": np.empty(capacity), "mean": np.empty(capacity), "std": np.empty(capacity),
+                      "theta": np.empty(capacity), "r": np.empty(capacity),
+                      "bar_x": np.empty(3 * capacity), "bar_y": np.empty(3 * capacity)}
+        self.n = 0
+        self._sq_dev = 0.0
+        self._curve, = self.ax.plot([], [], "o-", ms=3, lw=1, color="C0")
+        self._bars, = self.ax.plot([], [], lw=1, color="C0")
+        self._curve_polar, = self.ax_polar.plot([], [], "o-", ms=3, lw=1, color="C0")
+        # neues Kurvenstück, wird nur auf den Hintergrund gemalt
+        self._seg, = self.ax.plot([], [], "o-", ms=3, lw=1, color="C0", animated=True)
+        self._seg_bar, = self.ax.plot([], [], lw=1, color="C0", animated=True)
+        self._seg_polar, = self.ax_polar.plot([], [], "o-", ms=3, lw=1, color="C0", animated=True)
+        self.text.set_animated(True)
+        self._background = None
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+        self.fig.canvas.draw()
+
+    # ---------- Daten ---------- #
+    def clear(self):
+        """Für einen neuen Scan leeren (volles Neuzeichnen)."""
+        self.n = 0
+        self._sq_dev = 0.0
+        self._sync_curves()
+        self.text.set_text("")
+        self.fig.canvas.draw_idle()
+
+    def _insert(self, angle, mean_db, std_db):
+        """Punkt nach Winkel einsortieren; gibt seine Position zurück."""
+        d = self._data
+        if self.n == len(d["angle"]):
+            for key, values in d.items():
+                d[key] = np.concatenate((values, np.empty_like(values)))
+        n = self.n
+        i = int(np.searchsorted(d["angle"][:n], angle, side="right"))
+        for key in ("angle", "mean", "std", "theta", "r"):
+            d[key][i + 1:n + 1] = d[key][i:n]
+        for key in ("bar_x", "bar_y"):
+            d[key][3 * i + 3:3 * n + 3] = d[key][3 * i:3 * n]
+        d["angle"][i], d["mean"][i], d["std"][i] = angle, mean_db, std_db
+        d["theta"][i], d["r"][i] = np.radians(angle), max(mean_db, self.floor)
+        d["bar_x"][3 * i:3 * i + 3] = angle, angle, np.nan
+        d["bar_y"][3 * i:3 * i + 3] = mean_db - std_db, mean_db + std_db, np.nan
+        self.n += 1
+        if self.reference is not None:
+            diff = mean_db - np.interp(angle, *self.reference)
+            self._sq_dev += diff * diff
+        return i
+
+    def add(self, angle, mean_db, std_db=0.0):
+        """Einen fertigen Messpunkt einsortieren und, wenn möglich, nur das neue Stück zeichnen."""
+        i = self._insert(angle, mean_db, std_db)
+        self._sync_curves()
+        if mean_db + std_db > self.ax.get_ylim()[1]:
+            self.ax.set_ylim(self.floor, mean_db + std_db + 1)
+            self.ax_polar.set_rlim(self.floor, mean_db + std_db + 1)
+            self.fig.canvas.draw_idle()
+            return
+        if 0 < i < self.n - 1:
+            self.fig.canvas.draw_idle()    # alte Verbindung der Nachbarn muss aus dem Hintergrund
+            return
+        d = self._data
+        lo, hi = max(i - 1, 0), min(i + 2, self.n)
+        self._seg.set_data(d["angle"][lo:hi], d["mean"][lo:hi])
+        self._seg_bar.set_data(d["bar_x"][3 * i:3 * i + 2], d["bar_y"][3 * i:3 * i + 2])
+        self._seg_polar.set_data(d["theta"][lo:hi], d["r"][lo:hi])
+        self._paint()
+
+    def extend(self, angles, mean_db, std_db):
+        """Neue Punkte; viele auf einmal (z. B. Sweep-Ergebnis) mit einem vollen Neuzeichnen."""
+        if len(angles) == 1:
+            self.add(angles[0], mean_db[0], std_db[0])
+            return
+        for a, m, s in zip(angles, mean_db, std_db):
+            self._insert(a, m, s)
+        self._sync_curves()
+        self.fig.canvas.draw_idle()
+
+    def _sync_curves(self):
+        # nur Views setzen (O(1)), matplotlib liest sie erst beim vollen Neuzeichnen
+        d, n = self._data, self.n
+        self._curve.set_data(d["angle"][:n], d["mean"][:n])
+        self._curve_polar.set_data(d["theta"][:n], d["r"][:n])
+        self._bars.set_data(d["bar_x"][:3 * n], d["bar_y"][:3 * n])
+        if self.reference is not None and n:
+            self.text.set_text(f"Abweichung zur Referenz: {np.sqrt(self._sq_dev / n):.2f} dB rms")
+
+    # ---------- Zeichnen ---------- #
+    def _on_draw(self, event):
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.fig.draw_artist(self.text)
+
+    def _paint(self):
+        canvas = self.fig.canvas
+        if self._background is None:
+            canvas.draw()
+            return
+        canvas.restore_region(self._background)
+        for artist in (self._seg, self._seg_bar, self._seg_polar):
+            self.fig.draw_artist(artist)
+        # Kurvenstück gehört ab jetzt zum Hintergrund, der Text nicht
+        self._background = canvas.copy_from_bbox(self.fig.bbox)
+        self.fig.draw_artist(self.text)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.patternview  (aus dem Ordner Python/)
+    # Zeit pro neuem Punkt: inkrementell gegen komplettes errorbar-Neuzeichnen, ohne Fenster (Agg).
+    import time
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from masterarbeit.sources import horn_pattern
+
+    angles = np.arange(-60, 60.5, 0.5)
+    values = 10 * np.log10(np.abs(horn_pattern(angles)) / horn_pattern(0))
+    reference = (angles, values + 0.2)
+
+    view = PatternView(reference=reference)
+    t = time.perf_counter()
+    per_point = []
+    for a, v in zip(angles, values):
+        t0 = time.perf_counter()
+        view.add(a, v, 0.05)
+        per_point.append(time.perf_counter() - t0)
+    print(f"inkrementell: {len(angles)} Punkte, {1e3 * np.median(per_point):.1f} ms pro Punkt "
+          f"(erste 20: {1e3 * np.median(per_point[:20]):.1f} ms, letzte 20: {1e3 * np.median(per_point[-20:]):.1f} ms)")
+    print(view.text.get_text())
+
+    fig, ax = plt.subplots()
+    full = []
+    for i in range(1, len(angles) + 1, 20):
+        t0 = time.perf_counter()
+        ax.cla()
+        ax.errorbar(angles[:i], values[:i], yerr=0.05, fmt="o-", capsize=4)
+        fig.canvas.draw()
+        full.append(time.perf_counter() - t0)
+    print(f"komplett neu: erste {1e3 * full[0]:.1f} ms, letzte {1e3 * full[-1]:.1f} ms pro Punkt")
+
+    # ========================== #
+    # ==== TEST: UNSORTIERTE WINKEL ==== #
+    # ========================== #
+    # Reihenfolge wie bei der adaptiven Messung: grobes Raster, dann Mitten dazwischen
+    # und Punkte links vom bisherigen Anfang; die Kurve muss immer nach Winkel laufen.
+    from masterarbeit.refine import AdaptiveGrid
+
+    grid = AdaptiveGrid()
+    view = PatternView()
+    order = []
+    while (a := grid.next_angle()) is not None:
+        v = float(10 * np.log10(np.abs(horn_pattern(a)) / horn_pattern(0)))
+        grid.add(a, v)
+        view.add(a, v, 0.05)
+        order.append(a)
+    for a, seg in ((-70.0, [-70.0, -60.0]), (70.0, [60.0, 70.0]), (0.25, None)):   # links, rechts, dazwischen
+        view.add(a, -30.0, 0.05)
+        order.append(a)
+        if seg is not None:
+            assert list(view._seg.get_data()[0]) == seg, "neues Stück nicht zum Nachbarn nach Winkel"
+    x, y = view._curve.get_data()
+    bars = view._bars.get_data()[0][0::3]
+    assert np.all(np.diff(x) >= 0), "Kurve nicht nach Winkel sortiert"
+    assert np.array_equal(x, np.sort(order)) and np.array_equal(bars, x)
+    assert np.allclose(y[np.searchsorted(x, 70.0)], -30.0)
+    jumps = np.abs(np.diff(order)).max()
+    print(f"unsortiert: {len(order)} Punkte (Sprünge bis {jumps:.0f}° in der Eingabe), Kurve nach Winkel sortiert: ok")
@@ -0,0 +1,152 @@
+"""
+Fahrplanung für den Drehtisch.
+SpeedModel schätzt die Fahrzeit aus Strecke und speed-Parameter des
+Move-Befehls (aus MotorModel/Emulator übernommen oder aus gemessenen
+Fahrten gefittet). MotionPlanner ordnet Zielwinkel so, dass die gesamte
+Fahrzeit klein bleibt, und zerlegt jede Fahrt so, dass jeder Messpunkt
+aus derselben Richtung angefahren wird (Umkehrspiel/Backlash hebt sich
+dann heraus): lange Strecken schnell bis kurz vor das Ziel, der letzte
+Abschnitt langsam in Anfahrrichtung.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# Ein Fahrabschnitt: Move <angle> <speed>
+Leg = namedtuple("Leg", ["angle", "speed"])
+
+
+class SpeedModel:
+    """Fahrzeit = overhead + Strecke / (speed * deg_per_speed), wie MotorModel."""
+
+    def __init__(self, deg_per_speed=1.0, overhead=0.2):
+        self.deg_per_speed = deg_per_speed
+        self.overhead = overhead
+
+    def duration(self, start, target, speed):
+        return self.overhead + abs(target - start) / (speed * self.deg_per_speed)
+
+    @classmethod
+    def from_model(cls, model):
+        """Parameter des MotorModel (Simulation / Emulator) übernehmen."""
+        return cls(model.deg_per_speed, model.overhead)
+
+    @classmethod
+    def fit(cls, distances, speeds, durations):
+        """Aus gemessenen Fahrabschnitten (Scan.leg_log: Zeit bis am Ziel) per kleinster Quadrate schätzen."""
+        d = np.abs(np.asarray(distances, dtype=float)) / np.asarray(speeds, dtype=float)
+        A = np.column_stack((np.ones_like(d), d))
+        (overhead, inv_rate), *_ = np.linalg.lstsq(A, np.asarray(durations, dtype=float), rcond=None)
+        return cls(1 / inv_rate, max(overhead, 0.0))
+
+    def save(self, path):
+        import json
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"deg_per_speed": self.deg_per_speed, "overhead": self.overhead}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        import json
+
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def __repr__(self):
+        return f"SpeedModel(deg_per_speed={self.deg_per_speed:.3f}, overhead={self.overhead:.3f})"
+
+
+class MotionPlanner:
+    """
+    approach:     +1 = jeder Punkt wird von kleineren Winkeln her angefahren,
+                  -1 = von größeren, 0 = Richtung pro order() frei wählen
+    overshoot:    so weit vor dem Ziel endet die schnelle Fahrt (> Umkehrspiel)
+    step_speed:   speed für den letzten Abschnitt vor einem Messpunkt
+    travel_speed: speed für Vorpositionierung
+    """
+
+    def __init__(self, speed_model=None, approach=1, overshoot=1.0, step_speed=5, travel_speed=15):
+        self.speed_model = speed_model if speed_model is not None else SpeedModel()
+        self.approach = approach
+        self.overshoot = overshoot
+        self.step_speed = step_speed
+        self.travel_speed = travel_speed
+
+    def route(self, current, target, approach=None, direction=0):
+        """
+        Abschnitte von current nach target, letzter Abschnitt in Anfahrrichtung.
+        direction: Richtung der letzten Fahrt (+1/-1, 0 = unbekannt). Ging die
+        schon in Anfahrrichtung, reicht jeder Schritt in dieselbe Richtung,
+        sonst muss der Schritt mindestens overshoot lang sein.
+        """
+        approach = self.approach if approach is None else approach
+        pre = target - (approach or 1) * self.overshoot
+        split = [Leg(pre, self.travel_speed), Leg(target, self.step_speed)]
+        step = approach * (target - current)
+        if approach == 0 or step >= self.overshoot or (step > 0 and direction == approach):
+            # direkt möglich (Spiel ist schon oder wird während der Fahrt aufgebraucht);
+            # schneller von beidem nehmen
+            direct = [Leg(target, self.step_speed)]
+            if self.duration(current, direct) <= self.duration(current, split):
+                return direct
+        return split
+
+    def duration(self, current, legs):
+        """Geschätzte Fahrzeit über alle Abschnitte."""
+        total = 0.0
+        for leg in legs:
+            total += self.speed_model.duration(current, leg.angle, leg.speed)
+            current = leg.angle
+        return total
+
+    def order(self, targets, current):
+        """
+        Reihenfolge der Zielwinkel mit kleinster Fahrzeit. Bei fester
+        Anfahrrichtung ist das ein Durchlauf in dieser Richtung (jede andere
+        Reihenfolge müsste zurück und neu anfahren); bei approach=0 der
+        schnellere der beiden Durchläufe.
+        """
+        targets = np.asarray(targets, dtype=float)
+        if len(targets) == 0:
+            return targets
+        up, down = np.sort(targets), np.sort(targets)[::-1]
+        if self.approach > 0:
+            return up
+        if self.approach < 0:
+            return down
+        return min((up, down), key=lambda t: self.total(t, current, approach=1 if t is up else -1))
+
+    def total(self, targets, current, approach=None, direction=0):
+        """Geschätzte Fahrzeit, um alle targets in der gegebenen Reihenfolge anzufahren."""
+        total = 0.0
+        for target in targets:
+            legs = self.route(current, target, approach, direction)
+            total += self.duration(current, legs)
+            direction = int(np.sign(legs[-1].angle - (legs[-2].angle if len(legs) > 1 else current)))
+            current = target
+        return total
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.planner  (aus dem Ordner Python/)
+    # Fahrzeit eines 0.5°-Scans und der Grob-Suche: bisher (aufsteigend, immer speed 5,
+    # Start in der Mitte) gegen den Fahrplan.
+    model = SpeedModel()
+    planner = MotionPlanner(model)
+
+    def naive(targets, current, speed=5):
+        total = 0.0
+        for target in targets:
+            total += model.duration(current, target, speed)
+            current = target
+        return total
+
+    scan = np.arange(-60, 60.5, 0.5)
+    coarse = np.arange(-40, 50, 10)
+    for name, targets in (("Scan -60..60/0.5", scan), ("Raster -40..40/10", coarse)):
+        print(f"{name:18s}: bisher {naive(targets, 0.0):6.0f} s, "
+              f"Fahrplan {planner.total(planner.order(targets, 0.0), 0.0):6.0f} s")
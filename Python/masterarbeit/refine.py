@@ -0,0 +1,147 @@
+"""
+Adaptive Winkelverfeinerung für Diagramm-Messungen.
+Statt gleichmäßig alle 0.5° zu messen, wird zuerst ein grobes Raster
+gemessen. Danach werden in Runden nur dort Punkte (Intervallmitten)
+eingefügt, wo mean_db sich zwischen zwei Nachbarn schnell ändert
+(Steigung) oder die lineare Interpolation schlecht ist (Krümmung,
+z. B. Nullstellen und Flanken der Hauptkeule). Schluss ist, wenn kein
+Intervall mehr über den Schwellen liegt, min_step erreicht ist oder das
+Punktbudget aufgebraucht ist.
+Benutzung wie BoresightFinder: next_angle() / add() in einer Schleife.
+"""
+
+import numpy as np
+
+
+def interval_errors(x, y):
+    """
+    Schätzung des Interpolationsfehlers in der Mitte jedes Intervalls [x_i, x_i+1]:
+    Abstand der linearen Interpolation zu den Parabeln durch die Nachbartripel
+    (x_i-1, x_i, x_i+1) und (x_i, x_i+1, x_i+2), das Maximum von beiden.
+    """
+    n = len(x)
+    err = np.zeros(n - 1)
+    if n < 3:
+        return err
+    # zweite dividierte Differenz je Tripel = halbe Krümmung der Parabel
+    h = np.diff(x)
+    dd1 = np.diff(y) / h
+    dd2 = np.diff(dd1) / (x[2:] - x[:-2])          # Länge n-2, Tripel mit Mitte x_1 .. x_n-2
+    # Parabel p(t) = lin(t) + dd2 * (t - x_i)(t - x_i+1); in der Intervallmitte -h²/4 * dd2
+    mid = np.abs(dd2) * 0.25
+    err[:-1] = np.maximum(err[:-1], mid * h[:-1] ** 2)   # Tripel (i-1, i, i+1) -> Intervall i
+    err[1:] = np.maximum(err[1:], mid * h[1:] ** 2)      # Tripel (i, i+1, i+2) -> Intervall i+1
+    return err
+
+
+class AdaptiveGrid:
+    """
+    start, stop:  Winkelbereich (relativ zu best_angle, wie measure_start/stop)
+    coarse_step:  Schrittweite des ersten Rasters
+    min_step:     feinste Schrittweite; neue Punkte liegen auf diesem Raster
+    tol_db:       Interpolationsfehler, ab dem ein Intervall geteilt wird
+    grad_db:      Änderung von mean_db über ein Intervall, ab der geteilt wird
+    budget:       höchstens so viele Messpunkte (None = unbegrenzt)
+    order:        Funktion, die die Winkel einer Runde in Fahrreihenfolge bringt
+                  (z. B. MotionPlanner.order), None = aufsteigend
+    """
+
+    def __init__(self, start=-60, stop=60, coarse_step=4.0, min_step=0.5, tol_db=0.3,
+                 grad_db=3.0, budget=None, order=None):
+        self.start, self.stop = start, stop
+        self.min_step = min_step
+        self.tol_db = tol_db
+        self.grad_db = grad_db
+        self.budget = budget
+        self.order = order
+        coarse = np.arange(start, stop + coarse_step / 2, coarse_step)
+        if coarse[-1] < stop:
+            coarse = np.append(coarse, stop)
+        self._queue = self._ordered([self._snap(a) for a in coarse])
+        self.rounds = 1
+        self.done = False
+        self.angles = []
+        self.values = []
+
+    def _snap(self, angle):
+        """Auf das min_step-Raster ab start runden (vergleichbar mit der 0.5°-Messung)."""
+        return round(self.start + round((angle - self.start) / self.min_step) * self.min_step, 3)
+
+    def next_angle(self):
+        """Nächster zu messender Winkel oder None, wenn die Verfeinerung fertig ist."""
+        if not self._queue and not self.done:
+            self._queue = self._ordered(self._refine())
+            self.done = not self._queue
+        return self._queue[0] if self._queue else None
+
+    def add(self, angle, value):
+        """mean_db am zuletzt gelieferten Winkel eintragen."""
+        self.angles.append(float(angle))
+        self.values.append(float(value))
+        self._queue.pop(0)
+
+    def restore(self, angle, value):
+        """Schon gemessenen Punkt übernehmen (Fortsetzen nach Abbruch), egal an welcher Stelle der Runde."""
+        self.next_angle()                # ggf. nächste Runde bilden, wie beim ursprünglichen Ablauf
+        angle = round(float(angle), 3)
+        if angle in self._queue:
+            self._queue.remove(angle)
+        self.angles.append(angle)
+        self.values.append(float(value))
+
+    def _ordered(self, angles):
+        if self.order is None or not angles:
+            return angles
+        return [round(float(a), 3) for a in self.order(angles)]
+
+    def _refine(self):
+        """Neue Runde: Mitten aller Intervalle über den Schwellen, schlimmste zuerst."""
+        if self.budget is not None and len(self.angles) >= self.budget:
+            return []
+        x, y = self.table()
+        err = interval_errors(x, y)
+        jump = np.abs(np.diff(y))
+        h = np.diff(x)
+        split = (h > self.min_step * 1.5) & ((err > self.tol_db) | (jump > self.grad_db))
+        idx = np.flatnonzero(split)
+        idx = idx[np.argsort(-np.maximum(err[idx] / self.tol_db, jump[idx] / self.grad_db))]
+        if self.budget is not None:
+            idx = idx[:self.budget - len(self.angles)]
+        new = sorted({self._snap((x[i] + x[i + 1]) / 2) for i in idx} - set(x))
+        if new:
+            self.rounds += 1
+        return new
+
+    def table(self):
+        """Gemessene Winkel und Werte, nach Winkel sortiert."""
+        x = np.array(self.angles)
+        order = np.argsort(x, kind="stable")
+        return x[order], np.array(self.values)[order]
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.refine  (aus dem Ordner Python/)
+    # Adaptives Raster gegen das gleichmäßige 0.5°-Raster am simulierten Horn.
+    from masterarbeit.sources import horn_pattern
+
+    rng = np.random.default_rng(0)
+    full = np.round(np.arange(-60, 60.5, 0.5), 3)
+
+    def mean_db(a):
+        # Messrauschen von mean_db wie in der Simulation (ca. 0.01 dB, in Nullstellen mehr)
+        v = horn_pattern(a) + rng.normal(0, 0.002 / np.sqrt(2000))
+        return float(10 * np.log10(abs(v) / horn_pattern(0)))
+
+    reference = np.array([mean_db(a) for a in full])
+    grid = AdaptiveGrid()
+    while (a := grid.next_angle()) is not None:
+        grid.add(a, mean_db(a))
+    x, y = grid.table()
+    err = np.abs(np.interp(full, x, y) - reference)
+    main = reference > -20
+    print(f"0.5°-Raster: {len(full)} Punkte, adaptiv: {len(x)} Punkte in {grid.rounds} Runden")
+    print(f"Abweichung interpoliert gegen 0.5°: max {err.max():.2f} dB, "
+          f"über -20 dB max {err[main].max():.2f} dB, Median {np.median(err):.3f} dB")
@@ -0,0 +1,64 @@
+"""
+Ringpuffer mit fester Kapazität für Live-, Referenz- und Messdaten.
+Jeder Wert wird doppelt gespeichert (Position i und i + capacity), dadurch
+sind "letzte N Samples" und "Samples seit Marke" immer ein zusammenhängender
+Ausschnitt und können ohne Kopie als View zurückgegeben werden.
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """float64-Ringpuffer, append_block() ohne neue Allokationen."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity)
+        self._head = 0      # nächste Schreibposition (0..capacity-1)
+        self.total = 0      # Anzahl jemals geschriebener Samples
+        self._mark = 0
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def clear(self):
+        self._head = 0
+        self.total = 0
+        self._mark = 0
+
+    def append_block(self, block):
+        """Block anhängen; bei mehr als capacity Samples bleiben die neuesten."""
+        block = np.asarray(block, dtype=float)
+        self.total += len(block)
+        n = len(block)
+        if n >= self.capacity:
+            block = block[-self.capacity:]
+            self._head = (self._head + n - self.capacity) % self.capacity
+            n = self.capacity
+        head, cap = self._head, self.capacity
+        first = min(n, cap - head)
+        # vorderes Stück bis zum Ende des Rings, Rest von vorne
+        self._data[head:head + first] = block[:first]
+        self._data[head + cap:head + cap + first] = block[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = block[first:]
+            self._data[cap:cap + rest] = block[first:]
+        self._head = (head + n) % cap
+
+    def last(self, n=None):
+        """View auf die letzten n Samples (ohne Kopie)."""
+        n = len(self) if n is None else min(int(n), len(self))
+        end = self._head + self.capacity
+        return self._data[end - n:end]
+
+    def mark(self):
+        """Marke setzen, z. B. beim Start einer Referenz- oder Messaufnahme."""
+        self._mark = self.total
+
+    def since_mark(self):
+        """View auf alle Samples seit mark(), höchstens capacity viele."""
+        n = self.total - self._mark
+        if n > self.capacity:
+            raise OverflowError(f"{n} Samples seit Marke, Puffer fasst nur {self.capacity}")
+        return self.last(n)
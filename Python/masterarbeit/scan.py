@@ -0,0 +1,1087 @@
+"""
+Zustandsautomat für Referenzmessung, Maximumsuche und Winkelscan.
+Stammt aus der Hauptschleife von rot_live.py und ist jetzt unabhängig von
+matplotlib, nidaqmx und pyserial: Daten kommen aus einer DataSource, der
+Motor ist ein SerialMotor oder SimulatedMotor, die Zeit eine Uhr.
+rot_live.py ist nur noch die GUI darum herum.
+
+Nach jeder Fahrt wird nicht mehr fest motor_settle_time gewartet: die
+Blöcke laufen weiter durch process() in einen SettleDetector, die feste
+Zeit ist nur noch die Obergrenze. Die Einschwingzeit pro Winkel steht in
+settle_log und in der Ergebnisspalte settle_time.
+
+Die Aufnahmedauer pro Winkel ist adaptiv: gemessen wird, bis der
+Standardfehler von mean_db (aus Blockmitteln, autokorrelationsbereinigt)
+dwell_target_se erreicht, mindestens dwell_min und höchstens save_duration
+Sekunden. Erreichter Standardfehler und Dauer stehen in se_db und dwell.
+
+measure_mode = "adaptive" misst statt des gleichmäßigen step-Rasters erst
+grob und verfeinert dann nur, wo sich mean_db stark ändert (AdaptiveGrid
+in refine.py). Die Ergebnistabelle ist dieselbe, nur mit ungleichmäßigen
+Winkeln; gespeichert wird nach Winkel sortiert.
+
+Fahrten laufen über einen MotionPlanner (planner.py): Messpunkte werden
+in einem Durchlauf abgefahren und immer aus derselben Richtung angefahren,
+lange Strecken schnell bis kurz vor das Ziel. Geschätzte und tatsächliche
+Fahrzeit (bis eingeschwungen) stehen in move_log, pro Fahrabschnitt
+Strecke, speed und Zeit bis am Ziel (Positionsrückmeldung) in leg_log;
+daraus fittet fit_speed_model() das SpeedModel des Planers.
+measure_speed_model() fährt dafür eigene Testfahrten (--fit-speed).
+Mit Positionsrückmeldung wartet jede Fahrt auf das Ziel, die Schätzung
+ist dann nur noch Zeitlimit (move_timeout_factor mal so lang).
+
+start_sweep() misst das Diagramm in einer durchgehenden Fahrt mit
+sweep_speed: jedes Sample bekommt einen Winkel aus dem Bewegungsprofil,
+danach wird in Bins der Breite step gemittelt (sweep.py). Schnelle
+Übersicht in Minuten statt einer Stunde. Die Aufnahme endet erst, wenn
+der Tisch am Endwinkel steht (ohne Rückmeldung: Schätzung plus
+sweep_margin), damit der Move zurück nicht in die Fahrt hinein kommt.
+
+Mit position_feedback fragt der Scan den Ist-Winkel des Drehtischs ab
+(höchstens alle position_poll Sekunden, motor.position()) und sammelt
+ihn in track (PositionTrack, Zeiten nach Sample-Takt). Daraus bekommen
+Archiv-Blöcke, Messpunkte (angle, kommandiert in angle_cmd) und Sweep-
+Samples gemessene statt angenommene Winkel. Außerdem endet jede Fahrt,
+sobald die Position am Ziel steht, statt nach der geschätzten Fahrzeit.
+Liefert der Motor keine Position, wird die Rückmeldung abgeschaltet.
+
+Während start_measure() wird nach jedem Winkel eine Zeile an einen
+Checkpoint angehängt (checkpoint.py, checkpoint_<Zeit>.jsonl neben der
+Ergebnis-CSV), mit Parametern, V0 und best_angle in der ersten Zeile.
+Nach dem Speichern wird er gelöscht. Bricht die Messung ab, setzt
+resume(path) sie mit den fehlenden Winkeln fort.
+
+Liefert die Datenquelle mehrere Kanäle (Block.data Kanäle x Samples,
+channel_names), läuft der Hampel-Filter über alle Kanäle in einem Aufruf.
+Kanal 0 (Empfänger) geht wie bisher in Einschwingerkennung, V0, Maximum
+und mean_db; die übrigen Kanäle werden pro Winkel bzw. Sweep-Bin
+mitgemittelt (ChannelStats) und stehen als mean_<Kanal> / std_<Kanal>
+in der Ergebnistabelle, z. B. mean_ai1 für einen Referenz-Leistungsmonitor.
+
+Ohne GUI (keine matplotlib-Importe) läuft derselbe Ablauf über die
+Kommandozeile, mit Fortschritt, Restzeit und Exit-Code:
+    python -m masterarbeit.scan --ref --find-max --measure -60 60 0.5
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from masterarbeit.boresight import BoresightFinder
+from masterarbeit.checkpoint import Checkpoint, load_checkpoint
+from masterarbeit.motor import PositionTrack
+from masterarbeit.outliers import StreamingHampel, hampel_mask
+from masterarbeit.planner import Leg, MotionPlanner, SpeedModel
+from masterarbeit.refine import AdaptiveGrid
+from masterarbeit.settle import SettleDetector
+from masterarbeit.sources import channel_label
+from masterarbeit.stats import ChannelStats, RunningStats, DwellStats
+from masterarbeit.sweep import MotionProfile, bin_channels, bin_sweep
+
+# =================================== #
+# ============ ZUSTÄNDE ============= #
+# =================================== #
+STATE_IDLE = "IDLE"
+STATE_REF = "REF"
+STATE_MEASURE = "MEASURE"
+STATE_MEASURE_WAIT = "MEASURE_WAIT"
+STATE_FIND_MAX = "FIND_MAX"
+STATE_FIND_MAX_WAIT = "FIND_MAX_WAIT"
+STATE_SWEEP = "SWEEP"
+STATE_SWEEP_START = "SWEEP_START"
+STATE_SWEEP_RUN = "SWEEP_RUN"
+
+STATE_CALIBRATE_START = "CALIBRATE_START"
+STATE_CALIBRATE_CAL = "CALIBRATE_CAL"
+STATE_CALIBRATE_MOVE2 = "CALIBRATE_MOVE2"
+STATE_CALIBRATE_TEST = "CALIBRATE_TEST"
+STATE_CALIBRATE_DONE = "CALIBRATE_DONE"
+
+# Zustand -> Bezeichnung im Rohdaten-Archiv
+ARCHIVE_STATES = {STATE_REF: "REF", STATE_FIND_MAX_WAIT: "FIND_MAX", STATE_MEASURE_WAIT: "MEASURE",
+                  STATE_SWEEP_RUN: "SWEEP"}
+
+# Einstellungen, die im Checkpoint stehen und von resume() übernommen werden
+CHECKPOINT_PARAMS = ["measure_start", "measure_stop", "step", "measure_mode", "refine_coarse_step", "refine_tol_db",
+                     "refine_budget", "save_duration", "adaptive_dwell", "dwell_min", "dwell_target_se",
+                     "V0", "best_angle", "best_angle_se"]
+
+RESULT_COLUMNS = ["angle", "mean_db", "std_db", "mean_raw", "std_raw", "se_db", "dwell", "settle_time",
+                  "angle_cmd"]
+
+
+class Scan:
+    """
+    Ablauf wie in rot_live.py: start_ref() (Taste p), start_find_max() (w),
+    start_measure() (m), start_sweep(), start_calibration() (k). Die Messschleife ruft
+    pro DAQ-Block process(block) auf und verwirft Blöcke nur, solange
+    waiting() True ist (Kalibrierung oder Einschwingerkennung aus).
+    source wird nach jedem Fahrbefehl geleert, damit keine Blöcke von vor
+    der Fahrt in die Einschwingerkennung geraten.
+    Ausreißer entfernt hampel, ein rollender Hampel-Filter (Fenster 2k+1 = 31
+    Samples, Schwelle t0 = 3) wie remove_outliers() in den Auswertungen und
+    Archive.reprocess(). Das alte rot_live hatte einen globalen MAD über den
+    ganzen Block mit Schwelle 4; der rollende Filter folgt Drift und
+    Einschwingen und verwirft Spitzen daher eher. Nach dem Einschwingen
+    startet der Filter neu, damit die um k Samples verzögerten Werte aus der
+    Einschwingphase nicht in die Statistik am Messwinkel kommen.
+    """
+
+    def __init__(self, motor, clock, sample_rate=2000, archive=None, log=print, source=None):
+        self.motor = motor
+        self.clock = clock
+        self.source = source
+        self.channel_names = list(getattr(source, "channel_names", None) or ["Dev1/ai0"])   # [0] = Empfänger
+        self.sample_rate = sample_rate
+        self.archive = archive
+        self.log = log
+
+        # Zeiten in Sekunden
+        self.motor_settle_time = 7.0     # Obergrenze fürs Einschwingen
+        self.settle_detection = True
+        self.save_duration = 10          # Aufnahme für Referenz, bei der Messung Obergrenze
+        self.adaptive_dwell = True
+        self.dwell_min = 1.0
+        self.dwell_target_se = 0.01      # dB, Ziel-Standardfehler von mean_db
+        self.find_max_duration = 5
+        self.calibrate_wait = 70
+
+        # Winkelbereiche
+        self.measure_start = -60
+        self.measure_stop = 60
+        self.step = 0.5                  # bei "adaptive" die feinste Schrittweite
+        self.measure_mode = "grid"       # "grid" oder "adaptive"
+        self.refine_coarse_step = 4.0    # Grobraster bei "adaptive"
+        self.refine_tol_db = 0.3         # erlaubter Interpolationsfehler bei "adaptive"
+        self.refine_budget = None        # höchstens so viele Winkel bei "adaptive"
+        self.max_angle_start = -40       # Grobraster der Maximumsuche
+        self.max_angle_stop = 40
+        self.angle_step = 10
+        self.max_resolution = 0.5        # Zielauflösung der Maximumsuche
+        self.sweep_speed = 1             # speed-Parameter beim Sweep (Bins: step)
+        self.sweep_margin = 0.2          # ohne Positionsrückmeldung so viel länger aufnehmen als geschätzt (Anteil)
+
+        # Positionsrückmeldung
+        self.position_feedback = True    # Ist-Winkel abfragen (motor.position())
+        self.position_poll = 0.1         # s, höchstens so oft abfragen
+        self.position_tol = 0.05         # °, Abweichung vom Ziel, ab der die Fahrt als beendet gilt
+        self.position_hold = 0.25        # s, so lange muss die Position im Toleranzband bleiben
+
+        self.state = STATE_IDLE
+        self.V0 = None
+        self.best_angle = None
+        self.best_angle_se = None        # Unsicherheit aus dem Fit der Hauptkeule
+        self.finder = None
+        self.angle = 0.0                 # zuletzt kommandierter Winkel
+        self.scan_id = 0
+        self.motor_busy = False
+        self.motor_read_time = 0.0
+        self.planner = MotionPlanner()   # None = direkt mit speed 5 fahren wie früher
+        self.move_direction = 0          # Richtung der letzten Fahrt (+1/-1)
+        self.move_log = []               # (von, nach, geschätzt, tatsächlich bis eingeschwungen)
+        self.leg_log = []                # (von, nach, speed, geschätzt, gemessen bis am Ziel) pro Abschnitt
+        self.move_timeout_factor = 3.0   # mit Rückmeldung: so viel länger als geschätzt auf das Ziel warten
+        self._leg = None                 # laufender Abschnitt (von, nach, speed, geschätzt, Startzeit)
+        self._route = []
+        self._move = None
+        self.settle_min_time = 0.5
+        self.settle_margin = 0.2         # ohne Positionsrückmeldung frühestens so viel nach der Schätzung einschwingen (Anteil)
+        self.settle = SettleDetector(sample_rate, max_time=self.motor_settle_time)
+        self._settling = False
+        self.settle_time = None          # Einschwingzeit der letzten Fahrt
+        self.settle_log = []             # (Winkel, Einschwingzeit, Obergrenze erreicht)
+
+        self.hampel = StreamingHampel(k=15, t0=3)   # rollend statt globaler MAD mit Schwelle 4 (rot_live alt)
+        self.ref_stats = RunningStats()
+        self.rec_stats = DwellStats(db_factor=10)
+        self.dwell_samples = 0
+        self.channel_stats = None        # weitere Kanäle an einem Messwinkel
+        self._aux = None                 # gefilterte weitere Kanäle des letzten Blocks (NaN = Ausreißer)
+        self._reset_results()
+        self.current_angles = []
+        self.angle_index = 0
+        self.refiner = None
+        self.profile = None              # Bewegungsprofil des laufenden Sweeps
+        self._sweep_blocks = []
+        self._block = None
+        self.track = PositionTrack()     # (Zeit nach Sample-Takt, Ist-Winkel)
+        self._last_poll = -np.inf
+        self._target = 0.0               # Ziel des laufenden Fahrabschnitts
+        self._on_target = False
+        self._dwell_t0 = None
+        self._settle_min = self.settle_min_time
+        self.on_result = None            # Funktion(angles, mean_db, std_db) für neue Ergebnispunkte
+        self.output_dir = None           # Ordner für save(), None = <heute>
+        self.saved_path = None           # zuletzt gespeicherte Ergebnisdatei
+        self.checkpointing = True        # start_measure(): nach jedem Winkel in einen Checkpoint schreiben
+        self.checkpoint = None           # Checkpoint der laufenden Messung
+
+    # ---------- Motor ---------- #
+    def send(self, cmd, timeout=None):
+        """Befehl an den Motor; timeout = Antwortfrist für Befehle, die erst am Ende antworten."""
+        response = self.motor.send(cmd, timeout=timeout)
+        if cmd.lower().startswith("move"):
+            angle = float(cmd.split()[1])
+            if angle != self.angle:
+                self.move_direction = 1 if angle > self.angle else -1
+            self.angle = angle
+        return response
+
+    def sample_time(self):
+        """Aktuelle Zeit nach Sample-Takt der Datenquelle (ohne Quelle nach der Uhr)."""
+        if self.source is not None:
+            return self.source.sample_index() / self.sample_rate
+        return self.clock.now()
+
+    def poll_position(self):
+        """Ist-Winkel abfragen und in track eintragen, höchstens alle position_poll Sekunden."""
+        if not self.position_feedback or self.clock.now() - self._last_poll < self.position_poll:
+            return
+        self._last_poll = self.clock.now()
+        position = getattr(self.motor, "position", None)
+        angle = position() if position is not None else None
+        if angle is None:
+            self.log("Keine Positionsrückmeldung vom Motor, nutze die kommandierten Winkel.")
+            self.position_feedback = False
+            self.settle.min_time = self._settle_min
+            if self._leg is not None:
+                self.settle.max_time = self._settle_min + self.motor_settle_time
+                if self._route:
+                    self.motor_read_time = self._leg[4] + self._leg[3]
+            return
+        if np.isnan(angle):
+            return      # Antwort noch unterwegs
+        t = self.sample_time()
+        answered = getattr(self.motor, "position_time", None)
+        if answered is not None:
+            t -= self.clock.now() - answered    # Alter der Antwort abziehen
+        if self.track.n == 0 or t > self.track.times[-1]:
+            self.track.append(t, angle)
+
+    def on_target(self):
+        """Steht die gemessene Position am Ziel des laufenden Fahrabschnitts?"""
+        return self.position_feedback and self.track.arrived(self._target, self.position_tol, self.position_hold)
+
+    def measured_angle(self, t0, t1):
+        """Mittlerer Ist-Winkel zwischen zwei Sample-Zeiten, ohne Rückmeldung der kommandierte."""
+        if not self.position_feedback or self.track.n == 0:
+            return self.angle
+        return self.track.mean_angle(t0, t1)
+
+    def move_motor(self, angle, speed=None):
+        """Zu angle fahren; ohne speed plant der MotionPlanner Abschnitte und Geschwindigkeit."""
+        if speed is not None or self.planner is None:
+            legs = [Leg(angle, 5 if speed is None else speed)]
+        else:
+            legs = self.planner.route(self.angle, angle, direction=self.move_direction)
+        estimate = self.planner.duration(self.angle, legs) if self.planner is not None else 0.0
+        self._move = (self.angle, angle, estimate, self.clock.now())
+        self._route = list(legs)
+        self._next_leg()
+
+    def _next_leg(self):
+        leg = self._route.pop(0)
+        start = self.angle
+        estimate, timeout = 0.0, None
+        if self.planner is not None:
+            estimate = self.planner.speed_model.duration(start, leg.angle, leg.speed)
+            timeout = self._move_limit(estimate) + self.motor_settle_time
+        self.send(f"Move {leg.angle} {leg.speed}", timeout=timeout)
+        self._target = leg.angle
+        self._on_target = False
+        self._last_poll = -np.inf
+        self.hampel.reset()  # Daten vor und nach der Bewegung nicht mischen
+        if self.source is not None:
+            self.source.clear()
+        self._leg = (start, leg.angle, leg.speed, estimate, self.clock.now())
+        self.motor_busy = True
+        if self._route:
+            # Zwischenfahrt: geschätzte Zeit abwarten, mit Positionsrückmeldung bis am Ziel
+            # (die Schätzung ist dann nur das Zeitlimit, plus motor_settle_time für kurze Abschnitte)
+            self.motor_read_time = self.clock.now() + self._move_limit(estimate)
+            if self.position_feedback:
+                self.motor_read_time += self.motor_settle_time
+            self._settling = False
+            return
+        # letzter Abschnitt: frühestens nach der geschätzten Fahrzeit eingeschwungen,
+        # spätestens motor_settle_time danach
+        self.motor_read_time = self.clock.now() + estimate + self.motor_settle_time
+        self._settling = self.settle_detection
+        # mit Positionsrückmeldung entscheidet on_target() statt der Schätzung, ab wann
+        # das Signal stabil sein darf; ein langsamerer Tisch als geschätzt darf dann
+        # nicht als eingeschwungen gelten, nur weil die Schätzung abgelaufen ist.
+        # Ohne Rückmeldung sperrt nur die Schätzung; ein flaches Signal mitten in der
+        # Fahrt (Nullstelle, Rauschboden) sähe sonst stabil aus, daher settle_margin Reserve
+        self._settle_min = max(self.settle_min_time, estimate * (1 + self.settle_margin))
+        self.settle.min_time = np.inf if self.position_feedback else self._settle_min
+        limit = self._move_limit(estimate) if self.position_feedback else self._settle_min
+        self.settle.max_time = limit + self.motor_settle_time
+        self.settle.reset()
+
+    def _move_limit(self, estimate):
+        """Zeitlimit für einen Abschnitt: die Schätzung, mit Rückmeldung move_timeout_factor mal so lang."""
+        return estimate * self.move_timeout_factor if self.position_feedback else estimate
+
+    def _log_leg(self, arrived, warn=True):
+        """Laufenden Abschnitt in leg_log eintragen; Zeit bis am Ziel nur, wenn die Rückmeldung es zeigt."""
+        if self._leg is None:
+            return
+        start, target, speed, estimate, t0 = self._leg
+        # arrived() meldet erst, wenn die Position position_hold lang am Ziel war
+        measured = max(self.clock.now() - t0 - self.position_hold, 0.0) if arrived else np.nan
+        self.leg_log.append((start, target, speed, estimate, measured))
+        self._leg = None
+        if warn and not arrived and self.position_feedback:
+            self.log(f"Fahrt nach {target}° nach {self.clock.now() - t0:.1f} s nicht am Ziel "
+                     f"(geschätzt {estimate:.1f} s)")
+
+    def wait_motor(self, seconds):
+        """Motor als beschäftigt markieren, z. B. während calibrate."""
+        self.motor_busy = True
+        self.motor_read_time = self.clock.now() + seconds
+        self._settling = False
+        self._route = []
+        self._move = None
+        self._leg = None
+
+    def motor_ready(self):
+        if not self.motor_busy:
+            return True
+        if self._settling:
+            return False     # entscheidet process() anhand der Daten
+        if self._route:
+            self.poll_position()
+            arrived = self.on_target()
+            if arrived or self.clock.now() >= self.motor_read_time:
+                self._log_leg(arrived)
+                self._next_leg()
+            return False
+        if self.clock.now() >= self.motor_read_time:
+            self.motor_busy = False
+            self._log_leg(False, warn=False)    # ohne Einschwingerkennung: feste Wartezeit
+            self._arrived()
+            return True
+        return False
+
+    def waiting(self):
+        """True, solange nur die Zeit abgewartet wird und Blöcke verworfen werden können."""
+        return not self._settling and not self.motor_ready()
+
+    def _settled(self):
+        self.motor_busy = False
+        self._settling = False
+        self.hampel.reset()         # k wartende Samples stammen noch aus der Einschwingphase
+        self._log_leg(False)        # nur noch offen, wenn die Rückmeldung das Ziel nicht gezeigt hat
+        self.settle_time = self.settle.elapsed
+        self.settle_log.append((self.angle, self.settle_time, self.settle.timed_out))
+        self._arrived()
+
+    def _arrived(self):
+        if self._move is not None:
+            start, target, estimate, t0 = self._move
+            self.move_log.append((start, target, estimate, self.clock.now() - t0))
+            self._move = None
+
+    # ---------- Befehle (Tasten) ---------- #
+    def start_ref(self):
+        self.log("Referenzmessung gestartet (V0 bestimmen)...")
+        self.ref_stats.reset()
+        self.dwell_samples = 0
+        self.scan_id += 1
+        self.state = STATE_REF
+
+    def start_measure(self):
+        if self.V0 is None or self.best_angle is None:
+            self.log("V0 oder best_angle noch nicht gesetzt! Erst p oder w drücken.")
+            return False
+        self._reset_results()
+        self.log("Messung gestartet...")
+        self.scan_id += 1
+        self.current_angles = np.round(
+            np.arange(self.measure_start, self.measure_stop + self.step, self.step) + self.best_angle, 3)
+        self.refiner = None
+        if self.measure_mode == "adaptive":
+            self.refiner = AdaptiveGrid(self.measure_start, self.measure_stop, self.refine_coarse_step,
+                                        min_step=self.step, tol_db=self.refine_tol_db,
+                                        budget=self.refine_budget, order=self._order_relative)
+        elif self.planner is not None:
+            self.current_angles = self.planner.order(self.current_angles, self.angle)
+        self.move_log = []
+        self.angle_index = 0
+        self.open_checkpoint()
+        self.state = STATE_MEASURE
+        return True
+
+    def resume(self, path):
+        """
+        Abgebrochene Messung aus einem Checkpoint fortsetzen: Parameter, V0,
+        best_angle und gemessene Winkel übernehmen, nur die fehlenden messen.
+        Den Drehtisch vorher neu referenzieren (start_calibration()).
+        """
+        params, rows = load_checkpoint(path)
+        for key in CHECKPOINT_PARAMS:
+            setattr(self, key, params[key])
+        self._reset_results(rows)
+        self.scan_id += 1
+        measured = {round(a + self.best_angle, 3) for a in self.results["angle_cmd"]}
+        self.refiner = None
+        if self.measure_mode == "adaptive":
+            self.refiner = AdaptiveGrid(self.measure_start, self.measure_stop, self.refine_coarse_step,
+                                        min_step=self.step, tol_db=self.refine_tol_db,
+                                        budget=self.refine_budget, order=self._order_relative)
+            for a, value in zip(self.results["angle_cmd"], self.results["mean_db"]):
+                self.refiner.restore(a, value)
+            self.current_angles = []
+        else:
+            self.current_angles = np.array([a for a in params["angles"] if round(a, 3) not in measured])
+            if self.planner is not None and len(self.current_angles):
+                self.current_angles = self.planner.order(self.current_angles, self.angle)
+        self.log(f"Messung fortgesetzt: {len(rows)} Winkel aus {path}, "
+                 f"{'Rest adaptiv' if self.refiner is not None else f'{len(self.current_angles)} fehlen'}")
+        self.move_log = []
+        self.angle_index = 0
+        self.checkpoint = Checkpoint(path) if self.checkpointing else None
+        self.state = STATE_MEASURE
+        return True
+
+    def result_columns(self):
+        """RESULT_COLUMNS und mean_/std_<Kanal> für jeden weiteren Kanal."""
+        return RESULT_COLUMNS + [f"{stat}_{channel_label(name)}" for name in self.channel_names[1:]
+                                 for stat in ("mean", "std")]
+
+    def _reset_results(self, rows=()):
+        self.results = {k: [row.get(k) for row in rows] for k in self.result_columns()}
+        self.channel_stats = ChannelStats(len(self.channel_names) - 1)
+
+    def open_checkpoint(self):
+        """Neuen Checkpoint für die eben gestartete Messung anlegen (neben der Ergebnis-CSV)."""
+        self.close_checkpoint()
+        if not self.checkpointing:
+            return
+        directory = Path(self.output_dir or datetime.now().strftime("%Y-%m-%d"))
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / datetime.now().strftime("checkpoint_%Y-%m-%d-T%H-%M-%S")
+        path, n = Path(f"{stem}.jsonl"), 1
+        while path.exists():
+            n += 1
+            path = Path(f"{stem}_{n}.jsonl")
+        params = {key: getattr(self, key) for key in CHECKPOINT_PARAMS}
+        params["angles"] = [float(a) for a in self.current_angles]
+        params["started"] = datetime.now().isoformat(timespec="seconds")
+        self.checkpoint = Checkpoint(path, params)
+
+    def close_checkpoint(self):
+        """Checkpoint schließen (bleibt liegen, z. B. nach Abbruch); gibt den Pfad zurück."""
+        if self.checkpoint is None:
+            return None
+        self.checkpoint.close()
+        path, self.checkpoint = self.checkpoint.path, None
+        return path
+
+    def start_find_max(self):
+        self.log("Finde Maximum")
+        self.scan_id += 1
+        self.finder = BoresightFinder(self.max_angle_start, self.max_angle_stop, self.angle_step,
+                                      resolution=self.max_resolution)
+        if self.planner is not None:
+            self.finder.grid = list(self.planner.order(self.finder.grid, self.angle))
+        self.move_log = []
+        self.state = STATE_FIND_MAX
+
+    def start_sweep(self):
+        if self.V0 is None or self.best_angle is None:
+            self.log("V0 oder best_angle noch nicht gesetzt! Erst p oder w drücken.")
+            return False
+        if self.source is None:
+            self.log("Sweep braucht die Datenquelle (Scan(..., source=...)).")
+            return False
+        self._reset_results()
+        self.log("Sweep gestartet...")
+        self.scan_id += 1
+        self.move_log = []
+        self.angle_index = 0
+        self.state = STATE_SWEEP
+        return True
+
+    def _sweep_ends(self):
+        """Anfangs- und Endwinkel (absolut), in Anfahrrichtung des Planers."""
+        a, b = self.measure_start + self.best_angle, self.measure_stop + self.best_angle
+        return (b, a) if self.planner is not None and self.planner.approach < 0 else (a, b)
+
+    def _order_relative(self, angles):
+        """Winkel relativ zu best_angle in Fahrreihenfolge (für AdaptiveGrid)."""
+        if self.planner is None:
+            return sorted(angles)
+        return self.planner.order(np.asarray(angles) + self.best_angle, self.angle) - self.best_angle
+
+    def start_calibration(self):
+        self.log("Starte Kalibrierung des Motors")
+        self.state = STATE_CALIBRATE_START
+
+    # ---------- ein DAQ-Block ---------- #
+    def process(self, block):
+        """Block verarbeiten und Zustand weiterschalten. Gibt die bereinigten Samples zurück."""
+        data = block.data
+        self.poll_position()
+        if self._settling:
+            if not self._on_target and self.on_target():
+                # ab jetzt steht der Tisch, das Signal darf als stabil erkannt werden
+                self._on_target = True
+                self._log_leg(True)
+                self.settle.min_time = self.settle.elapsed + self.settle_min_time
+            clean = self._filter(data)
+            if self.settle.feed(clean):
+                self._settled()
+            return clean
+        self.dwell_samples += data.shape[-1]
+        if self.archive is not None and self.state in ARCHIVE_STATES:
+            t0, t1 = block.start / self.sample_rate, (block.start + data.shape[-1]) / self.sample_rate
+            self.archive.write(block.start, data, self.scan_id, self.angle_index, self.measured_angle(t0, t1),
+                               ARCHIVE_STATES[self.state], self.V0, self.best_angle, angle_cmd=self.angle)
+        clean = self._filter(data)  # um k Samples verzögert
+        self._block = block
+        self._calibration_step()
+        self._scan_step(clean)
+        return clean
+
+    def _filter(self, data):
+        """Hampel über alle Kanäle in einem Aufruf; gibt Kanal 0 ohne Ausreißer zurück."""
+        clean = self.hampel.feed(data)
+        if clean.ndim == 1:
+            self._aux = None
+            return clean
+        self._aux = clean[1:]
+        return clean[0][~np.isnan(clean[0])]
+
+    def _calibration_step(self):
+        if self.state == STATE_CALIBRATE_START:
+            self.move_motor(-360, speed=15)
+            self.state = STATE_CALIBRATE_CAL
+        elif self.state == STATE_CALIBRATE_CAL:
+            if self.motor_ready():
+                self.log("Starte Kalibrierung... ")
+                self.send("calibrate", timeout=self.calibrate_wait + self.motor_settle_time)
+                self.wait_motor(self.calibrate_wait)
+                self.state = STATE_CALIBRATE_MOVE2
+        elif self.state == STATE_CALIBRATE_MOVE2:
+            if self.motor_ready():
+                self.move_motor(-360, speed=15)
+                self.state = STATE_CALIBRATE_TEST
+        elif self.state == STATE_CALIBRATE_TEST:
+            if self.motor_ready():
+                self.log("Kalibrierung Testen ...")
+                self.send("testcal", timeout=self.calibrate_wait + self.motor_settle_time)
+                self.wait_motor(self.calibrate_wait)
+                self.state = STATE_CALIBRATE_DONE
+        elif self.state == STATE_CALIBRATE_DONE:
+            if self.motor_ready():
+                self.log("Testen der Kalibrierung abgeschlossen.")
+                self.state = STATE_IDLE
+
+    def _scan_step(self, clean):
+        if self.state == STATE_REF:
+            self.ref_stats.update(clean)
+            if self.dwell_samples >= self.save_duration * self.sample_rate:
+                self.V0 = self.ref_stats.mean
+                self.log(f"V0 = {self.V0:.4f} V")
+                self.state = STATE_IDLE
+
+        elif self.state == STATE_FIND_MAX:
+            angle = self.finder.next_angle()
+            if angle is not None:
+                self.angle_index = self.finder.moves
+                self.move_motor(angle)
+                self.rec_stats.reset()
+                self.dwell_samples = 0
+                self.state = STATE_FIND_MAX_WAIT
+            else:
+                self.best_angle, self.best_angle_se, best_value = self.finder.result()
+                self.log(f"Bester Winkel: {self.best_angle}° ± {self.best_angle_se:.2f}° mit Spannung "
+                         f"{best_value:.4f}V ({self.finder.moves} Positionen)")
+                self.log_travel_summary()
+                self.state = STATE_IDLE
+
+        elif self.state == STATE_FIND_MAX_WAIT:
+            self.rec_stats.update(clean)
+            if self.dwell_samples >= self.find_max_duration * self.sample_rate:
+                # der Finder rechnet mit dem angefragten Winkel weiter, der Gauß-Fit
+                # bekommt trotzdem saubere Werte, solange der Tisch am Ziel steht
+                self.finder.add(self.angle, self.rec_stats.mean_raw, self.rec_stats.se_raw)
+                self.state = STATE_FIND_MAX
+
+        elif self.state == STATE_MEASURE:
+            angle = self.next_measure_angle()
+            if angle is not None:
+                self.move_motor(angle)
+                self.dwell_samples = 0
+                self._dwell_t0 = None
+                self.rec_stats.reset(self.V0)
+                self.channel_stats.reset()
+                self.state = STATE_MEASURE_WAIT
+            else:
+                self.log("Messung abgeschlossen")
+                self.log_timing_summary()
+                if self.save() is not None and self.checkpoint is not None:
+                    self.checkpoint.remove()
+                    self.checkpoint = None
+                self.move_motor(self.best_angle)
+                self.state = STATE_IDLE
+
+        elif self.state == STATE_MEASURE_WAIT:
+            block = self._block
+            if self._dwell_t0 is None:
+                self._dwell_t0 = block.start / self.sample_rate
+            self.rec_stats.update(clean)
+            if self._aux is not None:
+                self.channel_stats.update(self._aux)
+            if self.dwell_done():
+                angle = self.next_measure_angle()
+                measured = self.measured_angle(self._dwell_t0, (block.start + block.data.shape[-1]) / self.sample_rate)
+                self.results["angle"].append(round(measured - self.best_angle, 4))
+                self.results["angle_cmd"].append(angle - self.best_angle)
+                self.results["mean_db"].append(self.rec_stats.mean_db)
+                self.results["std_db"].append(self.rec_stats.std_db)
+                self.results["mean_raw"].append(self.rec_stats.mean_raw)
+                self.results["std_raw"].append(self.rec_stats.std_raw)
+                self.results["se_db"].append(self.rec_stats.se_db)
+                self.results["dwell"].append(self.dwell_samples / self.sample_rate)
+                self.results["settle_time"].append(self.settle_time)
+                stats = self.channel_stats
+                mean = np.where(stats.count > 0, stats.mean, np.nan)
+                for i, name in enumerate(self.channel_names[1:]):
+                    self.results[f"mean_{channel_label(name)}"].append(mean[i])
+                    self.results[f"std_{channel_label(name)}"].append(stats.std[i])
+                if self.checkpoint is not None:
+                    self.checkpoint.append({k: v[-1] for k, v in self.results.items()})
+                if self.on_result is not None:
+                    self.on_result([self.results["angle"][-1]], [self.rec_stats.mean_db], [self.rec_stats.std_db])
+                if self.refiner is not None:
+                    self.refiner.add(self.refiner.next_angle(), self.rec_stats.mean_db)
+                self.angle_index += 1
+                self.state = STATE_MEASURE
+
+        elif self.state == STATE_SWEEP:
+            start, _ = self._sweep_ends()
+            self.move_motor(start)    # Startpunkt normal anfahren und einschwingen lassen
+            self.state = STATE_SWEEP_START
+
+        elif self.state == STATE_SWEEP_START:
+            start, stop = self._sweep_ends()
+            speed_model = self.planner.speed_model if self.planner is not None else SpeedModel()
+            self.profile = MotionProfile(start, stop, self.sweep_speed, self.sample_time(), speed_model)
+            self.send(f"Move {stop} {self.sweep_speed}",
+                      timeout=self._move_limit(self.profile.t_end - self.profile.t0) + self.motor_settle_time)
+            self._target, self._on_target, self._last_poll = stop, False, -np.inf
+            self._leg = (start, stop, self.sweep_speed, self.profile.t_end - self.profile.t0, self.clock.now())
+            self._sweep_blocks = []
+            self.state = STATE_SWEEP_RUN
+
+        elif self.state == STATE_SWEEP_RUN:
+            block = self._block
+            self._sweep_blocks.append((block.start, np.array(block.data, dtype=float)))
+            if self._sweep_done((block.start + block.data.shape[-1]) / self.sample_rate):
+                self._log_leg(self.on_target())
+                self._finish_sweep()
+                self.save()
+                self.move_motor(self.best_angle)
+                self.state = STATE_IDLE
+
+    def _sweep_done(self, t):
+        """
+        Fahrt am Endwinkel? Mit Positionsrückmeldung, sobald der Tisch dort steht
+        (Zeitlimit wie bei Fahrabschnitten), sonst nach der Schätzung plus
+        sweep_margin; erst danach darf der nächste Move kommen.
+        """
+        if self.on_target():
+            return True
+        estimate = self.profile.t_end - self.profile.t0
+        if self.position_feedback:
+            limit = self._move_limit(estimate) + self.motor_settle_time
+        else:
+            limit = estimate * (1 + self.sweep_margin)
+        return t >= self.profile.t0 + limit
+
+    def _finish_sweep(self):
+        """Alle Sweep-Samples filtern, mit Winkeln versehen und in Bins mitteln."""
+        starts = [s for s, _ in self._sweep_blocks]
+        values = np.concatenate([d for _, d in self._sweep_blocks], axis=-1)
+        index = np.concatenate([np.arange(s, s + d.shape[-1]) for s, d in self._sweep_blocks])
+        keep = hampel_mask(values, self.hampel.k, self.hampel.t0)     # alle Kanäle in einem Aufruf
+        aux = None
+        if values.ndim == 2:
+            aux = np.where(keep[1:], values[1:], np.nan)
+            values, keep = values[0], keep[0]
+        if self.position_feedback:
+            # gemessene Positionen aus dem Sweep-Zeitraum statt des Sollverlaufs
+            times = self.track.times
+            inside = (times >= starts[0] / self.sample_rate - 1) & (times <= index[-1] / self.sample_rate + 1)
+            self.profile.refine(times[inside], self.track.angles[inside])
+        angles = self.profile.angle_at(index / self.sample_rate) - self.best_angle
+        edges = np.arange(self.measure_start - self.step / 2, self.measure_stop + self.step, self.step)
+        binned = bin_sweep(angles[keep], values[keep], edges, self.V0, self.rec_stats.db_factor)
+        n = binned["n"]
+        self.results = {"angle": list(np.round(binned["angle"], 3)),
+                        "mean_db": list(binned["mean_db"]), "std_db": list(binned["std_db"]),
+                        "mean_raw": list(binned["mean_raw"]), "std_raw": list(binned["std_raw"]),
+                        "se_db": list(binned["se_db"]),
+                        "dwell": list(n / self.sample_rate),
+                        "settle_time": [np.nan] * len(n),
+                        "angle_cmd": list(np.round(binned["angle"], 3))}
+        if aux is not None:
+            mean, std = bin_channels(angles, aux, edges)
+            for i, name in enumerate(self.channel_names[1:]):
+                self.results[f"mean_{channel_label(name)}"] = list(mean[i, binned["bin"]])
+                self.results[f"std_{channel_label(name)}"] = list(std[i, binned["bin"]])
+        duration = (starts[-1] - starts[0]) / self.sample_rate
+        self.log(f"Sweep: {len(values)} Samples in {duration:.0f} s, {len(n)} Winkel-Bins")
+        if self.on_result is not None:
+            self.on_result(self.results["angle"], self.results["mean_db"], self.results["std_db"])
+        self._sweep_blocks = []
+
+    def next_measure_angle(self):
+        """Aktueller Messwinkel (absolut) oder None, wenn alle Winkel gemessen sind."""
+        if self.refiner is not None:
+            angle = self.refiner.next_angle()
+            return None if angle is None else round(angle + self.best_angle, 3)
+        if self.angle_index < len(self.current_angles):
+            return self.current_angles[self.angle_index]
+        return None
+
+    def dwell_done(self):
+        """Aufnahme an einem Messwinkel beenden? Fest save_duration oder adaptiv nach se_db."""
+        if self.dwell_samples >= self.save_duration * self.sample_rate:
+            return True
+        return (self.adaptive_dwell and self.dwell_samples >= self.dwell_min * self.sample_rate
+                and self.rec_stats.se_db <= self.dwell_target_se)
+
+    def log_travel_summary(self):
+        if self.move_log:
+            moves = np.array(self.move_log)
+            self.log(f"Fahrten: {len(moves)}, geschätzt {moves[:, 2].sum():.0f} s, "
+                     f"tatsächlich bis eingeschwungen {moves[:, 3].sum():.0f} s")
+        model = self.fit_speed_model()
+        if model is not None and self.planner is not None:
+            self.log(f"Fahrzeiten laut Positionsrückmeldung: {model}, Planer rechnet mit {self.planner.speed_model}")
+
+    def fit_speed_model(self, apply=False):
+        """
+        SpeedModel aus leg_log (nur Abschnitte, deren Ankunft die Rückmeldung
+        gezeigt hat). None bei weniger als 3 solchen Abschnitten oder nur einer
+        Kombination aus Strecke und speed. apply: gleich im Planer verwenden.
+        """
+        legs = np.array([leg for leg in self.leg_log if np.isfinite(leg[4])], dtype=float).reshape(-1, 5)
+        if len(legs) < 3 or np.ptp(np.abs(legs[:, 1] - legs[:, 0]) / legs[:, 2]) == 0:
+            return None
+        model = SpeedModel.fit(legs[:, 1] - legs[:, 0], legs[:, 2], legs[:, 4])
+        if apply and self.planner is not None:
+            self.planner.speed_model = model
+        return model
+
+    def log_timing_summary(self):
+        times = [t for t in self.results["settle_time"] if t is not None and np.isfinite(t)]
+        if times:
+            self.log(f"Einschwingen: {sum(times):.0f} s für {len(times)} Winkel, im Mittel {np.mean(times):.2f} s "
+                     f"(fest wären es {len(times) * self.motor_settle_time:.0f} s)")
+        dwell = self.results["dwell"]
+        if dwell:
+            self.log(f"Aufnahme: {sum(dwell):.0f} s für {len(dwell)} Winkel, im Mittel {np.mean(dwell):.2f} s "
+                     f"(fest wären es {len(dwell) * self.save_duration:.0f} s)")
+        self.log_travel_summary()
+
+    # ---------- Speichern ---------- #
+    def save(self, directory=None):
+        """Ergebnisse als CSV in <heute>/ (oder output_dir) speichern, Dateiname wie bisher in rot_live.py."""
+        import pandas as pd
+
+        if len(self.results["mean_db"]) == 0:
+            self.log("Keine Messdaten zum Speichern.")
+            return None
+        df = pd.DataFrame(self.results).sort_values("angle", kind="stable")
+        today = datetime.now().strftime("%Y-%m-%d")
+        time_stamp = datetime.now().strftime("%Y-%m-%d-T%H-%M-%S")
+        directory = Path(directory or self.output_dir or today)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"data_{time_stamp}_{self.measure_start}_{self.measure_stop}_{self.step}_{self.V0:.3f}"
+        path = directory / f"{stem}.csv"
+        n = 1
+        while path.exists():             # zwei Scans in derselben Sekunde (Kampagne, Simulation)
+            n += 1
+            path = directory / f"{stem}_{n}.csv"
+        df.to_csv(path, index=False)
+        self.log(f"Daten gespeichert in {path}")
+        self.saved_path = path
+        return path
+
+
+def run_until_idle(scan, source, poll=0.1):
+    """
+    Messschleife ohne GUI: Blöcke holen und verarbeiten, bis der Scan wieder
+    IDLE ist. Bei reinen Wartezeiten (Kalibrierung) werden Blöcke verworfen
+    und die Uhr läuft weiter (bei VirtualClock ohne echtes Warten).
+    """
+    while scan.state != STATE_IDLE:
+        if scan.waiting():
+            source.clear()
+            scan.clock.sleep(min(poll, scan.motor_read_time - scan.clock.now()))
+            continue
+        block = source.get_block()
+        if block is not None:
+            scan.process(block)
+
+
+def measure_speed_model(scan, source, distances=(2, 10, 40), speeds=(2, 5, 15), poll=0.1):
+    """
+    Testfahrten hin und zurück um den aktuellen Winkel (jede Strecke mit jedem
+    speed) mit Positionsrückmeldung, danach SpeedModel aus leg_log fitten.
+    Gibt das Modell zurück, None ohne Rückmeldung.
+    """
+    scan.leg_log = []
+    home = scan.angle
+    for speed in speeds:
+        for distance in distances:
+            for target in (home + distance, home):
+                scan.move_motor(target, speed=speed)
+                while scan.motor_busy:
+                    if scan.waiting():
+                        source.clear()
+                        scan.clock.sleep(poll)
+                        continue
+                    block = source.get_block()
+                    if block is not None:
+                        scan.process(block)
+                if not scan.position_feedback:
+                    scan.log("Ohne Positionsrückmeldung lässt sich die Fahrzeit nicht messen.")
+                    return None
+                # Zwischenstand als Zeitlimit der nächsten Fahrten, falls das alte Modell weit daneben liegt
+                scan.fit_speed_model(apply=True)
+    model = scan.fit_speed_model()
+    if model is not None:
+        res = [leg[4] - model.duration(leg[0], leg[1], leg[2]) for leg in scan.leg_log if np.isfinite(leg[4])]
+        scan.log(f"{model}, {len(res)} Fahrten, Abweichung rms {np.sqrt(np.mean(np.square(res))):.2f} s")
+    return model
+
+
+# ========================== #
+# ==== KOMMANDOZEILE ==== #
+# ========================== #
+# Exit-Codes von main(); Fehler in den Argumenten beendet argparse mit 2
+EXIT_OK = 0
+EXIT_FAILED = 1          # nichts gespeichert
+EXIT_NOT_READY = 3       # V0 oder best_angle fehlen für --measure / --sweep
+EXIT_INTERRUPTED = 130   # Strg+C
+
+SPEED_MODEL_FILE = "speed_model.json"
+
+
+def _number(text):
+    """Zahl aus der Kommandozeile, ganzzahlig als int (Dateiname wie bisher: _-60_60_0.5_)."""
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _duration(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """Kompakte Fortschrittszeile mit Restzeit, wird als Scan.on_result eingehängt."""
+
+    def __init__(self, clock, total=None, out=print):
+        self.clock = clock
+        self.total = total
+        self.out = out
+        self.done = 0
+        self.t0 = clock.now()
+
+    def __call__(self, angles, mean_db, std_db):
+        self.done += len(angles)
+        elapsed = self.clock.now() - self.t0
+        line = (f"[{self.done:4d}/{self.total or '?'}] {angles[-1]:+8.2f}°  {mean_db[-1]:7.2f} dB "
+                f"± {std_db[-1]:.2f}  {_duration(elapsed)}")
+        if self.total:
+            rest = elapsed / self.done * max(self.total - self.done, 0)
+            line += f"  noch ca. {_duration(rest)}"
+        self.out(line)
+
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m masterarbeit.scan",
+        description="Scan ohne GUI: dieselben Abläufe wie die Tasten k, p, w, m, c in rot_live.py, "
+                    "in dieser Reihenfolge.")
+    parser.add_argument("--calibrate", action="store_true", help="Motor kalibrieren (Taste k)")
+    parser.add_argument("--fit-speed", action="store_true",
+                        help="Testfahrten mit Positionsrückmeldung, SpeedModel nach --speed-model schreiben")
+    parser.add_argument("--ref", action="store_true", help="V0 messen (Taste p)")
+    parser.add_argument("--find-max", action="store_true", help="Hauptstrahlrichtung suchen (Taste w)")
+    parser.add_argument("--measure", nargs=3, type=_number, metavar=("START", "STOP", "STEP"),
+                        help="Diagramm Schritt für Schritt messen, Winkel relativ zu best_angle (Taste m)")
+    parser.add_argument("--sweep", nargs=3, type=_number, metavar=("START", "STOP", "STEP"),
+                        help="Diagramm in einer durchgehenden Fahrt messen, Bins à STEP (Taste c)")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="abgebrochene Messung fortsetzen (referenziert den Drehtisch vorher neu, "
+                             "V0 und best_angle aus dem Checkpoint)")
+    add_setup_arguments(parser)
+    return parser
+
+
+def add_setup_arguments(parser):
+    """Argumente für setup() (Hardware, Vorgaben, Ausgabe), auch für masterarbeit.campaign."""
+    parser.add_argument("--V0", type=float, help="V0 vorgeben statt --ref")
+    parser.add_argument("--best-angle", type=float, help="best_angle vorgeben statt --find-max")
+    parser.add_argument("--adaptive", action="store_true", help="grob messen und nur an Flanken verfeinern")
+    parser.add_argument("--dwell", type=float, help="höchstens so lange pro Winkel aufnehmen (s)")
+    parser.add_argument("--out", help="Ordner für die Ergebnis-CSV (Standard: <heute>)")
+    parser.add_argument("--archive", help="Rohdaten in diesen Ordner mitschreiben")
+    parser.add_argument("--port", default="COM12", help="serieller Port des Drehtischs")
+    parser.add_argument("--position-cmd",
+                        help="Befehl der Positionsabfrage, z. B. pos beim Emulator (Standard: keine Rückmeldung)")
+    parser.add_argument("--speed-model", default=SPEED_MODEL_FILE,
+                        help="gemessenes SpeedModel (von --fit-speed) für die Fahrplanung")
+    parser.add_argument("--channel", default="Dev1/ai0",
+                        help="DAQ-Kanal oder Kanäle, z. B. Dev1/ai0:3 (der erste ist der Empfänger)")
+    parser.add_argument("--rate", type=float, default=2000, help="Sample Rate in Hz")
+    parser.add_argument("--block", type=int, default=500, help="Samples pro Block")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Simulator mit virtueller Uhr statt Hardware (Horn bei 1.7°)")
+    parser.add_argument("--quiet", action="store_true", help="nur Fortschritt und Ergebnis ausgeben")
+
+
+def setup(args, log=print):
+    """
+    Uhr, Motor, Datenquelle, Archiv und Scan nach den Kommandozeilen-Argumenten.
+    ValueError, wenn --archive ein Archiv mit anderer Rate oder anderen Kanälen ist.
+    """
+    from masterarbeit.motor import MotorModel, SerialMotor, SimulatedMotor
+    from masterarbeit.sources import RealClock, SimulatedSource, VirtualClock, horn_pattern
+
+    archive = None
+    if args.archive:
+        from masterarbeit.archive import ArchiveWriter
+
+        archive = ArchiveWriter(args.archive, args.rate, args.channel)    # vor dem Motor, prüft ein bestehendes Archiv
+    if args.simulate:
+        from functools import partial
+
+        clock = VirtualClock()
+        model = MotorModel(clock)
+        source = SimulatedSource(clock, motor=model, pattern=partial(horn_pattern, boresight=1.7),
+                                 sample_rate=args.rate, block_size=args.block, channels=args.channel, seed=1)
+        motor = SimulatedMotor(model)
+        speed_model = SpeedModel.from_model(model)
+    else:
+        from masterarbeit.acquisition import AcquisitionEngine
+
+        clock = RealClock()
+        motor = SerialMotor(args.port, 115200, timeout=1, position_cmd=args.position_cmd, log=log)
+        source = AcquisitionEngine(args.channel, args.rate, args.block)
+        if Path(args.speed_model).exists():
+            speed_model = SpeedModel.load(args.speed_model)
+        else:
+            speed_model = SpeedModel()
+            log(f"{args.speed_model} fehlt, Fahrzeiten nur geschätzt ({speed_model}); mit --fit-speed messen")
+    scan = Scan(motor, clock, sample_rate=args.rate, archive=archive, log=log, source=source)
+    scan.planner = MotionPlanner(speed_model)
+    scan.output_dir = args.out
+    scan.V0 = args.V0
+    scan.best_angle = args.best_angle
+    if args.adaptive:
+        scan.measure_mode = "adaptive"
+    if args.dwell is not None:
+        scan.save_duration = args.dwell
+    return scan, source, motor, archive
+
+
+def main(argv=None):
+    """Kommandozeile: Abläufe nacheinander ausführen, Ergebnis speichern, Exit-Code zurückgeben."""
+    from functools import partial
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not (args.calibrate or args.fit_speed or args.ref or args.find_max or args.measure or args.sweep or args.resume):
+        parser.error("nichts zu tun: --calibrate, --fit-speed, --ref, --find-max, --measure, --sweep oder --resume angeben")
+    if args.resume and (args.ref or args.find_max or args.measure or args.sweep):
+        parser.error("--resume übernimmt V0, best_angle und Bereich aus dem Checkpoint, "
+                     "nicht mit --ref, --find-max, --measure oder --sweep kombinierbar")
+    if args.resume:
+        try:
+            load_checkpoint(args.resume)
+        except (OSError, ValueError) as e:
+            parser.error(f"--resume: {e}")
+    args.calibrate = args.calibrate or bool(args.resume)   # Drehtisch neu referenzieren
+    out = partial(print, flush=True)
+    try:
+        scan, source, motor, archive = setup(args, log=(lambda *a: None) if args.quiet else out)
+    except ValueError as e:
+        parser.error(str(e))
+    t0 = scan.clock.now()
+    status = EXIT_OK
+    try:
+        source.start()
+        for flag, start in ((args.calibrate, scan.start_calibration), (args.ref, scan.start_ref),
+                            (args.find_max, scan.start_find_max)):
+            if flag:
+                start()
+                run_until_idle(scan, source)
+            if start == scan.start_calibration and args.fit_speed:
+                model = measure_speed_model(scan, source)
+                if model is None:
+                    status = EXIT_FAILED
+                else:
+                    model.save(args.speed_model)
+                    scan.planner.speed_model = model
+                    out(f"SpeedModel gespeichert in {args.speed_model}")
+        if args.resume:
+            scan.resume(args.resume)
+            scan.on_result = Progress(scan.clock, None if scan.refiner is not None else len(scan.current_angles), out)
+            scan.saved_path = None
+            run_until_idle(scan, source)
+            if scan.saved_path is None:
+                status = EXIT_FAILED
+        for scan_range, start in ((args.measure, scan.start_measure), (args.sweep, scan.start_sweep)):
+            if not scan_range:
+                continue
+            scan.measure_start, scan.measure_stop, scan.step = scan_range
+            if not start():
+                return EXIT_NOT_READY
+            if start == scan.start_sweep:
+                total = len(np.arange(scan.measure_start, scan.measure_stop + scan.step / 2, scan.step))
+            else:
+                total = len(scan.current_angles) if scan.refiner is None else None
+            scan.on_result = Progress(scan.clock, total, out)
+            scan.saved_path = None
+            run_until_idle(scan, source)
+            if scan.saved_path is None:
+                status = EXIT_FAILED
+    except KeyboardInterrupt:
+        out("Abgebrochen.")
+        return EXIT_INTERRUPTED
+    finally:
+        checkpoint = scan.close_checkpoint()
+        if checkpoint is not None:
+            out(f"Checkpoint: {checkpoint} (fortsetzen mit --resume {checkpoint})")
+        source.stop()
+        if archive is not None:
+            archive.close()
+        motor.close()
+    summary = [f"fertig nach {_duration(scan.clock.now() - t0)}"]
+    if scan.V0 is not None:
+        summary.append(f"V0 = {scan.V0:.4f} V")
+    if scan.best_angle is not None:
+        summary.append(f"best_angle = {scan.best_angle}°")
+    if scan.saved_path is not None:
+        summary.append(f"Ergebnis: {scan.saved_path}")
+    out(", ".join(summary))
+    return status
+
+
+if __name__ == "__main__":
+    # python -m masterarbeit.scan --ref --find-max --measure -60 60 0.5  (aus dem Ordner Python/)
+    # mit --simulate gegen den Simulator (virtuelle Uhr, eine Stunde Scan in Sekunden)
+    import sys
+
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Nicht blockierender Treiber für die serielle Schnittstelle des Drehtischs.
+Bisher schrieb send() den Befehl und las sofort mit read_all() (meist
+leer), rot.py wartete mit time.sleep auf in_waiting und submit_move in
+rot_live.py hielt die GUI 5 s an. Jetzt läuft die Schnittstelle in einem
+eigenen Thread:
+    - submit(cmd) reiht den Befehl ein und gibt sofort ein Future zurück
+    - Befehle gehen in Reihenfolge raus, bis zu max_pending gleichzeitig
+      offen (mit 2 hält ein Move, der erst am Ziel antwortet, keine
+      Positionsabfrage auf; 1 = streng nacheinander)
+    - jede Zeile (abgeschlossen mit \\r oder \\n) geht an den ältesten
+      offenen Befehl, zu dem sie passt (expect, z. B. Präfix "POS");
+      ein Echo des Befehls zählt nicht als Antwort, Zeilen ohne passenden
+      Befehl werden gemeldet und stehen in unmatched
+    - jeder Befehl hat ein eigenes Timeout, danach TimeoutError im Future
+    - bei Verbindungsfehlern (USB abgezogen) wird neu verbunden, Befehle
+      in dieser Zeit schlagen sofort mit ConnectionError fehl
+    - die Laufzeit jedes Befehls (Senden bis Antwort) steht in rtt_log
+Zeiten nach time.monotonic, also dieselbe Uhr wie RealClock.
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+import numpy as np
+
+# Antwort auf einen Befehl: Text der Zeile, Sende- und Empfangszeit, Laufzeit (s)
+Reply = namedtuple("Reply", ["command", "text", "sent", "received", "rtt"])
+# gesendeter Befehl, der noch auf seine Antwort wartet
+_Sent = namedtuple("_Sent", ["command", "expect", "sent", "deadline", "future"])
+
+
+class SerialDriver:
+    """
+    port, baudrate:  wie serial.Serial
+    timeout:         Standard-Timeout pro Befehl (s), submit(..., timeout=) überschreibt es
+    reconnect_delay: Wartezeit zwischen zwei Verbindungsversuchen (s)
+    max_pending:     so viele Befehle dürfen gleichzeitig auf ihre Antwort warten
+    """
+
+    def __init__(self, port="COM12", baudrate=115200, timeout=2.0, reconnect_delay=1.0, max_pending=1, log=print):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_pending = max_pending
+        self.log = log
+        self.connected = False
+        self.rtt_log = []           # (Befehl, Laufzeit) aller beantworteten Befehle
+        self.timeouts = 0
+        self.reconnects = 0
+        self.unmatched = []         # (Empfangszeit, Zeile) ohne passenden offenen Befehl
+        self._ser = None
+        self._buf = b""
+        self._sent = []             # offene Befehle, älteste zuerst
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="serial-driver", daemon=True)
+        self._thread.start()
+
+    # ---------- Schnittstelle ---------- #
+    def submit(self, cmd, timeout=None, expect=None):
+        """
+        Befehl einreihen; das Future liefert ein Reply oder TimeoutError/ConnectionError.
+        expect: welche Zeile die Antwort ist, Präfix (Groß-/Kleinschreibung egal)
+                oder Funktion(text) -> bool; None = die nächste Zeile
+        """
+        if isinstance(expect, str):
+            prefix = expect.lower()
+            expect = lambda text: text.lower().startswith(prefix)
+        future = Future()
+        if self._stop.is_set():
+            future.set_exception(ConnectionError("Treiber ist geschlossen"))
+        else:
+            self._queue.put((cmd, self.timeout if timeout is None else timeout, expect, future))
+        return future
+
+    def request(self, cmd, timeout=None, expect=None):
+        """Befehl senden und auf die Antwort warten (nur für Skripte ohne Messschleife)."""
+        return self.submit(cmd, timeout, expect).result()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def rtt_summary(self):
+        """(Anzahl, Median, 95%-Quantil, Maximum) der Laufzeiten in s oder None."""
+        if not self.rtt_log:
+            return None
+        rtt = np.array([r for _, r in self.rtt_log])
+        return len(rtt), float(np.median(rtt)), float(np.percentile(rtt, 95)), float(rtt.max())
+
+    def close(self):
+        """Thread beenden, offene Befehle mit ConnectionError abbrechen, Port schließen."""
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join(timeout=2)
+        self._fail_queued(ConnectionError("Treiber ist geschlossen"))
+        self._disconnect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Thread ---------- #
+    def _connect(self):
+        import serial  # erst hier, damit das Paket ohne pyserial importierbar bleibt
+
+        try:
+            # kurzes Lese-Timeout, die Befehls-Timeouts prüft _read_replies selbst
+            self._ser = serial.Serial(self.port, self.baudrate, timeout=0.05)
+        except (OSError, ValueError) as e:
+            if self.connected or self.reconnects == 0:
+                self.log(f"Drehtisch an {self.port} nicht erreichbar: {e}")
+            self.connected = False
+            return False
+        if self.reconnects:
+            self.log(f"Drehtisch an {self.port} wieder verbunden")
+        self.connected = True
+        self.reconnects += 1
+        return True
+
+    def _disconnect(self):
+        self.connected = False
+        self._buf = b""
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except OSError:
+                pass
+            self._ser = None
+
+    def _fail_queued(self, error):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[3].set_running_or_notify_cancel():
+                item[3].set_exception(error)
+
+    def _fail_sent(self, error):
+        for item in self._sent:
+            item.future.set_exception(error)
+        self._sent = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._ser is None and not self._connect():
+                # ohne Verbindung nichts aufstauen: alte Fahrbefehle später auszuführen wäre gefährlich
+                self._fail_queued(ConnectionError(f"keine Verbindung zu {self.port}"))
+                self._stop.wait(self.reconnect_delay)
+                continue
+            try:
+                if not self._write_queued():
+                    break
+                self._read_replies()
+            except OSError as e:    # serial.SerialException und ConnectionError sind OSError
+                if not self._stop.is_set():
+                    self.log(f"Verbindung zu {self.port} verloren: {e}")
+                self._disconnect()
+                self._fail_sent(ConnectionError(str(e)))
+        self._fail_sent(ConnectionError("Treiber ist geschlossen"))
+
+    def _write_queued(self):
+        """Eingereihte Befehle schreiben; ohne offene Befehle kurz auf den nächsten warten. False = beenden."""
+        wait = not self._sent and not self._ser.in_waiting
+        while len(self._sent) < self.max_pending:
+            try:
+                item = self._queue.get(timeout=0.05) if wait else self._queue.get_nowait()
+            except queue.Empty:
+                return True
+            wait = False
+            if item is None:
+                return False
+            cmd, timeout, expect, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            sent = time.monotonic()
+            self._sent.append(_Sent(cmd, expect, sent, sent + timeout, future))
+            self._ser.write((cmd + "\r").encode())
+        return True
+
+    def _read_replies(self):
+        """Angekommene Zeilen zuordnen, abgelaufene Befehle mit TimeoutError beenden."""
+        ser = self._ser
+        if self._sent or ser.in_waiting:
+            self._buf += ser.read(ser.in_waiting or 1)
+        received = time.monotonic()
+        *lines, self._buf = self._buf.replace(b"\n", b"\r").split(b"\r")
+        for line in lines:
+            text = line.decode(errors="ignore").strip()
+            if text:
+                self._dispatch(text, received)
+        for item in [item for item in self._sent if received > item.deadline]:
+            self._sent.remove(item)
+            self.timeouts += 1
+            item.future.set_exception(TimeoutError(
+                f"keine Antwort auf {item.command!r} nach {item.deadline - item.sent:.1f} s"))
+
+    def _dispatch(self, text, received):
+        """Zeile dem ältesten offenen Befehl geben, zu dem sie passt; Echos überspringen."""
+        if any(text.lower() == item.command.strip().lower() for item in self._sent):
+            return
+        for item in self._sent:
+            if item.expect is None or item.expect(text):
+                self._sent.remove(item)
+                self.rtt_log.append((item.command, received - item.sent))
+                item.future.set_result(Reply(item.command, text, item.sent, received, received - item.sent))
+                return
+        self.unmatched.append((received, text))
+        self.log(f"Antwort ohne passenden Befehl: {text!r}")
+
+
+# ========================== #
+# ==== TEST GEGEN EMULATOR ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.serial_driver  (aus dem Ordner Python/)
+    # Befehle gegen den Emulator mit Latenz, verlorenen Antworten und Verbindungsabbruch.
+    from masterarbeit.emulator import MotorEmulator
+
+    with MotorEmulator(latency=0.02, jitter=0.02, drop_rate=0.05, disconnect_after=60, seed=0) as emulator:
+        driver = SerialDriver(emulator.port, timeout=0.3, reconnect_delay=0.2, log=print)
+        t = time.perf_counter()
+        futures = [driver.submit(f"Move {a} 15") for a in range(-5, 6)] + [driver.submit("pos")]
+        print(f"{len(futures)} Befehle eingereiht in {1e3 * (time.perf_counter() - t):.2f} ms")
+        for f in futures:
+            try:
+                reply = f.result()
+                print(f"  {reply.command:12s} -> {reply.text:12s} {1e3 * reply.rtt:6.1f} ms")
+            except (TimeoutError, ConnectionError) as e:
+                print(f"  {type(e).__name__}: {e}")
+        outcomes = {"ok": 0, "timeout": 0, "connection": 0}
+        for i in range(60):
+            try:
+                driver.request("pos")
+                outcomes["ok"] += 1
+            except TimeoutError:
+                outcomes["timeout"] += 1
+            except ConnectionError:
+                outcomes["connection"] += 1
+        print(f"60 Abfragen: {outcomes}, Emulator verbunden: {emulator.connected}")
+        n, median, p95, worst = driver.rtt_summary()
+        print(f"RTT über {n} Befehle: Median {1e3 * median:.1f} ms, 95% {1e3 * p95:.1f} ms, max {1e3 * worst:.1f} ms")
+        driver.close()
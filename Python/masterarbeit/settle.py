@@ -0,0 +1,73 @@
+"""
+Erkennung, wann der Drehtisch nach einer Fahrt zur Ruhe gekommen ist.
+Statt nach jeder Bewegung fest MOTOR_SETTLE_TIME (7 s) zu warten, wird
+das Signal während der Fahrt weiter gelesen. Es wird in kurze Fenster
+zerlegt; sind Mittelwert und Streuung der letzten n_windows Fenster
+stabil, gilt der Tisch als eingeschwungen. Die feste Zeit bleibt als
+Obergrenze (max_time).
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class SettleDetector:
+    """
+    window:    Fensterlänge in s
+    n_windows: so viele aufeinanderfolgende Fenster müssen übereinstimmen
+    rel_tol:   erlaubte Spanne der Fenster-Mittelwerte relativ zum Mittelwert ...
+    k_sigma:   ... mindestens aber k_sigma Standardfehler des Fenster-Mittelwerts
+    std_ratio: erlaubtes Verhältnis größte / kleinste Fenster-Streuung
+    min_time:  frühestens nach so vielen s (Controller braucht etwas bis zur Fahrt)
+    max_time:  spätestens nach so vielen s gilt der Tisch als eingeschwungen
+    Die Zeit wird in Samples gezählt (Sample-Takt), nicht mit der Wanduhr.
+    """
+
+    def __init__(self, sample_rate, window=0.25, n_windows=4, rel_tol=0.005, k_sigma=4.0,
+                 std_ratio=2.0, min_time=0.5, max_time=7.0):
+        self.sample_rate = sample_rate
+        self.window = max(int(window * sample_rate), 2)
+        self.rel_tol = rel_tol
+        self.k_sigma = k_sigma
+        self.std_ratio = std_ratio
+        self.min_time = min_time
+        self.max_time = max_time
+        self._means = deque(maxlen=n_windows)
+        self._stds = deque(maxlen=n_windows)
+        self.reset()
+
+    def reset(self):
+        """Neue Fahrt: Historie verwerfen, Zeit auf 0."""
+        self._rest = np.empty(0)
+        self._means.clear()
+        self._stds.clear()
+        self.samples = 0
+        self.settled = False
+        self.timed_out = False
+
+    @property
+    def elapsed(self):
+        """Seit reset() gelesene Zeit in s."""
+        return self.samples / self.sample_rate
+
+    def feed(self, data):
+        """Samples anhängen; True, sobald der Tisch eingeschwungen ist."""
+        if self.settled:
+            return True
+        self.samples += len(data)
+        x = np.concatenate((self._rest, data)) if len(self._rest) else np.asarray(data, dtype=float)
+        n_full = len(x) // self.window
+        if n_full:
+            w = x[:n_full * self.window].reshape(n_full, self.window)
+            self._means.extend(w.mean(axis=1))
+            self._stds.extend(w.std(axis=1))
+        self._rest = x[n_full * self.window:]
+
+        if self.elapsed >= self.max_time:
+            self.settled = self.timed_out = True
+        elif self.elapsed >= self.min_time and len(self._means) == self._means.maxlen:
+            means, stds = np.array(self._means), np.array(self._stds)
+            tol = max(self.rel_tol * abs(means.mean()), self.k_sigma * stds.mean() / np.sqrt(self.window))
+            self.settled = bool(np.ptp(means) <= tol and stds.max() <= self.std_ratio * stds.min())
+        return self.settled
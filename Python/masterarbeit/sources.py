@@ -0,0 +1,242 @@
+"""
+Datenquellen für die Messskripte.
+DataSource ist die gemeinsame Schnittstelle: start(), stop(), get_block(),
+clear(), pending(), sample_time(). Es gibt zwei Backends:
+    - AcquisitionEngine (acquisition.py): echtes NI-DAQ über nidaqmx
+    - SimulatedSource (hier): synthetisches Antennensignal ohne Hardware
+Zeit läuft über eine Uhr (RealClock oder VirtualClock). Mit der
+VirtualClock wird nie wirklich gewartet, ein ganzer Scan läuft dann
+offline in Sekunden statt in einer Stunde.
+
+Mit mehreren Kanälen (z. B. "Dev1/ai0:3") ist Block.data ein Array
+(Kanäle x Samples), alle Kanäle mit demselben Sample-Takt in einem Lesevorgang.
+Kanal 0 ist immer der Empfänger, die übrigen (Referenz-Leistungsmonitor,
+zweiter Empfänger, Temperatur ...) werden mitgemittelt.
+"""
+
+import re
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Ein Block Messdaten: Index des ersten Samples seit start() und die Werte
+Block = namedtuple("Block", ["start", "data"])
+
+
+def expand_channels(channels):
+    """
+    Kanalangabe wie bei NI-DAQmx in einzelne Kanäle auflösen:
+    "Dev1/ai0:3" -> ["Dev1/ai0", "Dev1/ai1", "Dev1/ai2", "Dev1/ai3"],
+    auch kommagetrennt ("Dev1/ai0, Dev1/ai5") oder als Liste.
+    """
+    if isinstance(channels, str):
+        channels = channels.split(",")
+    names = []
+    for part in channels:
+        part = part.strip()
+        match = re.fullmatch(r"(.*?)(\d+):(\d+)", part)
+        if match is None:
+            names.append(part)
+            continue
+        prefix, first, last = match.group(1), int(match.group(2)), int(match.group(3))
+        step = 1 if last >= first else -1
+        names.extend(f"{prefix}{i}" for i in range(first, last + step, step))
+    return names
+
+
+def channel_label(name):
+    """Kurzname für Spaltennamen: "Dev1/ai1" -> "ai1"."""
+    return name.rsplit("/", 1)[-1]
+
+
+# ========================== #
+# ==== UHREN ==== #
+# ========================== #
+
+class RealClock:
+    """Wanduhr, sleep() wartet wirklich."""
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, dt):
+        if dt > 0:
+            time.sleep(dt)
+
+    def sleep_until(self, t):
+        self.sleep(t - self.now())
+
+
+class VirtualClock:
+    """Simulierte Uhr, sleep() setzt nur die Zeit weiter."""
+
+    def __init__(self, t0=0.0):
+        self.t = float(t0)
+
+    def now(self):
+        return self.t
+
+    def sleep(self, dt):
+        if dt > 0:
+            self.t += dt
+
+    def sleep_until(self, t):
+        self.t = max(self.t, t)
+
+
+# ========================== #
+# ==== SCHNITTSTELLE ==== #
+# ========================== #
+
+class DataSource:
+    """Gemeinsame Schnittstelle aller Datenquellen (Blöcke à block_size Samples)."""
+
+    sample_rate = None
+    block_size = None
+    channel_names = ("Dev1/ai0",)   # Block.data mit mehreren Kanälen: (Kanäle x Samples)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_block(self, timeout=1.0):
+        """Nächsten Block (Block(start, data)) oder None nach timeout."""
+        raise NotImplementedError
+
+    def pending(self):
+        """Anzahl Blöcke, die schon bereitliegen."""
+        return 0
+
+    def clear(self):
+        """Bereitliegende Blöcke verwerfen."""
+
+    def sample_time(self, index):
+        return index / self.sample_rate
+
+    def sample_index(self):
+        """Index des gerade aufgenommenen Samples (gleiche Zählung wie Block.start)."""
+        raise NotImplementedError
+
+    def status(self):
+        return ""
+
+
+# ========================== #
+# ==== SIMULATOR ==== #
+# ========================== #
+
+def horn_pattern(angle, peak=0.3, width=14.0, floor=0.003, boresight=0.0):
+    """Spannung am Empfänger über dem Motorwinkel: sinc²-Hauptkeule mit Nebenkeulen und Nullstellen."""
+    return floor + peak * np.sinc((np.asarray(angle) - boresight) / width) ** 2
+
+
+def sine_wave(t, amplitude=0.5, freq=8.0):
+    """Sinus über der Zeit wie in den alten Testskripten (2 Perioden pro 500 Samples bei 2 kHz)."""
+    return amplitude * np.sin(2 * np.pi * freq * np.asarray(t))
+
+
+class SimulatedSource(DataSource):
+    """
+    Synthetisches DAQ-Signal für Tests und Benchmarks ohne USB-6251.
+    Modelliert: Antennendiagramm über dem Motorwinkel, weißes Rauschen,
+    impulsartige Ausreißer, langsame Drift der Verstärkung und ein
+    abklingendes Nachschwingen nach jeder Motorbewegung.
+    Der Winkel kommt von motor (MotorModel, angle_at(t) / last_stop) oder
+    ist fest (angle=...). waveform: Funktion t -> Spannung statt
+    pattern(Winkel), z. B. sine_wave für Filtertests ohne Drehtisch.
+    channels: Anzahl oder Kanalangabe wie bei der AcquisitionEngine ("Dev1/ai0:3").
+    Weitere Kanäle sind Referenz-Leistungsmonitore (monitor_level, nur die
+    Drift des Senders und Rauschen), Block.data dann (Kanäle x Samples).
+    """
+
+    def __init__(self, clock=None, motor=None, angle=0.0, sample_rate=2000, block_size=500,
+                 pattern=horn_pattern, noise=0.002, outlier_rate=1e-3, outlier_size=0.5,
+                 drift=0.02, drift_period=1800.0, settle_amp=0.05, settle_tau=0.8,
+                 settle_freq=3.0, channels=1, monitor_level=0.5, waveform=None, seed=None):
+        self.clock = clock if clock is not None else VirtualClock()
+        self.motor = motor
+        self.angle = angle
+        self.sample_rate = sample_rate
+        self.block_size = int(block_size)
+        self.pattern = pattern
+        self.waveform = waveform
+        self.noise = noise
+        self.outlier_rate = outlier_rate
+        self.outlier_size = outlier_size
+        self.drift = drift
+        self.drift_period = drift_period
+        self.settle_amp = settle_amp
+        self.settle_tau = settle_tau
+        self.settle_freq = settle_freq
+        if isinstance(channels, int):
+            self.channel_names = [f"Sim/ai{i}" for i in range(channels)]
+        else:
+            self.channel_names = expand_channels(channels)
+        self.channels = len(self.channel_names)
+        self.monitor_level = monitor_level
+        self.rng = np.random.default_rng(seed)
+        self._next = 0          # Index des nächsten Samples
+        self.samples_read = 0
+
+    def start(self):
+        self._next = int(round(self.clock.now() * self.sample_rate))
+
+    def gain(self, t):
+        """Drift der Verstärkung (Temperatur o. ä.), sieht auch der Referenzmonitor."""
+        return 1 + self.drift * np.sin(2 * np.pi * t / self.drift_period)
+
+    def signal(self, t):
+        """Rauschfreies Signal zu den Zeiten t."""
+        if self.waveform is not None:
+            return self.waveform(t) * self.gain(t)
+        if self.motor is not None:
+            angle = self.motor.angle_at(t)
+        else:
+            angle = np.full_like(t, self.angle)
+        v = self.pattern(angle) * self.gain(t)
+        # Nachschwingen der Halterung nach dem letzten Stopp
+        if self.motor is not None and self.settle_amp and np.isfinite(self.motor.last_stop):
+            dt = t - self.motor.last_stop
+            ring = np.where(dt >= 0, np.exp(-np.maximum(dt, 0) / self.settle_tau)
+                            * np.cos(2 * np.pi * self.settle_freq * dt), 0.0)
+            v = v * (1 + self.settle_amp * ring)
+        return v
+
+    def get_block(self, timeout=1.0):
+        n = self.block_size
+        start = self._next
+        # wie echte Hardware: warten, bis der Block vollständig aufgenommen ist,
+        # aber höchstens timeout, sonst None (wie AcquisitionEngine)
+        ready = (start + n) / self.sample_rate
+        if ready - self.clock.now() > timeout:
+            self.clock.sleep(timeout)
+            return None
+        self.clock.sleep_until(ready)
+        t = (start + np.arange(n)) / self.sample_rate
+        if self.channels == 1:
+            data = self.signal(t) + self.rng.normal(0, self.noise, n)
+        else:
+            data = np.empty((self.channels, n))
+            data[0] = self.signal(t)
+            data[1:] = self.monitor_level * self.gain(t)
+            data += self.rng.normal(0, self.noise, data.shape)
+        hits = self.rng.random(data.shape) < self.outlier_rate
+        data[hits] += self.rng.choice([-1.0, 1.0], hits.sum()) * self.outlier_size
+        self._next = start + n
+        self.samples_read += n
+        return Block(start, data)
+
+    def pending(self):
+        return int((self.clock.now() * self.sample_rate - self._next) // self.block_size)
+
+    def clear(self):
+        self._next = max(self._next, int(self.clock.now() * self.sample_rate))
+
+    def sample_index(self):
+        return int(self.clock.now() * self.sample_rate)
+
+    def status(self):
+        return f"simuliert: {self.samples_read} Samples, t = {self.clock.now():.1f} s"
@@ -0,0 +1,217 @@
+"""
+Laufende Statistik (Welford / Chan) für Referenz- und Messaufnahmen.
+Statt alle Samples einer Aufnahme in Listen zu sammeln und am Ende
+np.mean/np.std zu rechnen, werden pro Block nur count, mean, M2, min, max
+nachgeführt. Speicherbedarf O(1), Ergebnis jederzeit abrufbar.
+BatchMeans schätzt daraus den Standardfehler des Mittelwerts unter
+Berücksichtigung der Autokorrelation (effektive Anzahl der Blockmittel).
+"""
+
+import numpy as np
+
+
+def to_db(data, V0, factor=10):
+    """Spannung relativ zu V0 in dB (factor=10 wie in rot_live.py, 20 für Amplitude)."""
+    return factor * np.log10(np.maximum(np.abs(data) / V0, 1e-12))
+
+
+class RunningStats:
+    """count, mean, M2, min, max einer Datenreihe, blockweise aktualisiert."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, block):
+        """Block vektorisiert zusammenfassen und mit dem bisherigen Stand mergen."""
+        block = np.asarray(block, dtype=float)
+        n_b = len(block)
+        if n_b == 0:
+            return
+        mean_b = block.mean()
+        m2_b = np.sum((block - mean_b) ** 2)
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.count * n_b / n
+        self.count = n
+        self.min = min(self.min, block.min())
+        self.max = max(self.max, block.max())
+
+    @property
+    def var(self):
+        """Varianz wie np.var (ddof=0)."""
+        return self.m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        """Standardabweichung wie np.std (ddof=0)."""
+        return np.sqrt(self.var)
+
+
+class ChannelStats:
+    """
+    RunningStats für mehrere Kanäle auf einmal: Blöcke (Kanäle x Samples),
+    count/mean/std pro Kanal als Arrays, alles vektorisiert über die Kanäle.
+    NaN (vom Hampel-Filter entfernte Ausreißer) zählt nicht mit.
+    """
+
+    def __init__(self, channels=1):
+        self.channels = channels
+        self.reset()
+
+    def reset(self):
+        self.count = np.zeros(self.channels)
+        self.mean = np.zeros(self.channels)
+        self.m2 = np.zeros(self.channels)
+
+    def update(self, block):
+        block = np.asarray(block, dtype=float).reshape(self.channels, -1)
+        valid = ~np.isnan(block)
+        n_b = valid.sum(axis=1)
+        if not n_b.any():
+            return
+        n_safe = np.maximum(n_b, 1)
+        mean_b = np.where(valid, block, 0.0).sum(axis=1) / n_safe
+        m2_b = np.where(valid, (block - mean_b[:, None]) ** 2, 0.0).sum(axis=1)
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / np.maximum(n, 1)
+        self.m2 += m2_b + delta ** 2 * self.count * n_b / np.maximum(n, 1)
+        self.count = n
+
+    @property
+    def std(self):
+        """Standardabweichung pro Kanal wie np.std (ddof=0), NaN ohne Daten."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.m2 / self.count)
+
+
+class BatchMeans:
+    """
+    Standardfehler eines Mittelwerts aus Blockmittelwerten (batch means).
+    Benachbarte Blockmittel sind bei Drift oder 1/f-Rauschen korreliert;
+    mit der Lag-1-Autokorrelation r1 ergibt sich die effektive Anzahl
+    n_eff = n * (1 - r1) / (1 + r1) (AR(1)-Näherung) und daraus
+    se = std(Blockmittel) / sqrt(n_eff). Alles in O(1) pro Block.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self._shift = 0.0    # erstes Blockmittel, gegen Auslöschung
+        self._s = 0.0        # Summe
+        self._ss = 0.0       # Quadratsumme
+        self._sp = 0.0       # Summe der Produkte benachbarter Werte
+        self._first = 0.0
+        self._last = 0.0
+
+    def update(self, mean):
+        if self.n == 0:
+            self._shift = mean
+        m = mean - self._shift
+        if self.n:
+            self._sp += self._last * m
+        else:
+            self._first = m
+        self._s += m
+        self._ss += m * m
+        self._last = m
+        self.n += 1
+
+    @property
+    def r1(self):
+        """Lag-1-Autokorrelation der Blockmittel, auf [0, 0.99] begrenzt."""
+        n = self.n
+        if n < 3:
+            return 0.0
+        mean = self._s / n
+        c0 = self._ss - n * mean ** 2
+        c1 = self._sp - mean * (2 * self._s - self._first - self._last) + (n - 1) * mean ** 2
+        if c0 <= 0:
+            return 0.0
+        return float(np.clip(c1 / c0, 0.0, 0.99))
+
+    @property
+    def n_eff(self):
+        r1 = self.r1
+        return self.n * (1 - r1) / (1 + r1)
+
+    @property
+    def se(self):
+        """Standardfehler des Gesamtmittels; inf, solange weniger als 4 Blöcke vorliegen."""
+        n = self.n
+        if n < 4:
+            return np.inf
+        var = max(self._ss - self._s ** 2 / n, 0.0) / (n - 1)
+        return float(np.sqrt(var / self.n_eff))
+
+
+class DwellStats:
+    """
+    Statistik einer Messaufnahme an einem Winkel, linear und in dB zugleich.
+    Ersetzt rec_buffer / rec_buffer_db aus rot_live.py.
+    Jeder update()-Block zählt als ein Blockmittel für se_raw / se_db.
+    """
+
+    def __init__(self, V0=None, db_factor=10):
+        self.V0 = V0
+        self.db_factor = db_factor
+        self.raw = RunningStats()
+        self.db = RunningStats()
+        self.raw_batches = BatchMeans()
+        self.db_batches = BatchMeans()
+
+    def reset(self, V0=None):
+        if V0 is not None:
+            self.V0 = V0
+        self.raw.reset()
+        self.db.reset()
+        self.raw_batches.reset()
+        self.db_batches.reset()
+
+    def update(self, block):
+        if len(block) == 0:
+            return
+        self.raw.update(block)
+        self.raw_batches.update(float(np.mean(block)))
+        if self.V0 is not None:
+            db = to_db(block, self.V0, self.db_factor)
+            self.db.update(db)
+            self.db_batches.update(float(db.mean()))
+
+    @property
+    def count(self):
+        return self.raw.count
+
+    @property
+    def mean_raw(self):
+        return self.raw.mean
+
+    @property
+    def std_raw(self):
+        return self.raw.std
+
+    @property
+    def mean_db(self):
+        return self.db.mean
+
+    @property
+    def std_db(self):
+        return self.db.std
+
+    @property
+    def se_raw(self):
+        return self.raw_batches.se
+
+    @property
+    def se_db(self):
+        return self.db_batches.se
@@ -0,0 +1,166 @@
+"""
+Kontinuierlicher Sweep statt Schritt-Messung.
+Der Drehtisch fährt mit kleiner, konstanter Geschwindigkeit von Anfang
+bis Ende, das DAQ nimmt ohne Pause auf. Jedes Sample bekommt einen
+Winkel aus dem Bewegungsprofil (Startzeit laut Sample-Takt, Geschwindigkeit
+aus dem SpeedModel), bei vorhandener Positionsrückmeldung aus deren
+Interpolation. Danach werden die Samples vektorisiert in Winkel-Bins
+zusammengefasst, Ergebnis ist dieselbe Tabelle wie bei der Schritt-Messung.
+"""
+
+import numpy as np
+
+from masterarbeit.stats import BatchMeans, to_db
+
+
+class MotionProfile:
+    """
+    Sollverlauf einer Fahrt mit konstanter Geschwindigkeit:
+    Stillstand bis t0 + overhead, dann linear von start nach stop.
+    Zeiten in s nach Sample-Takt der Datenquelle.
+    """
+
+    def __init__(self, start, stop, speed, t0, speed_model):
+        self.start, self.stop = float(start), float(stop)
+        self.t0 = t0
+        self.t_move = t0 + speed_model.overhead
+        self.rate = speed * speed_model.deg_per_speed
+        self.t_end = t0 + speed_model.duration(start, stop, speed)
+        self._readback = None
+
+    def refine(self, times, angles):
+        """Gemessene Positionen (Zeit, Winkel) verwenden statt des Sollverlaufs."""
+        times, angles = np.asarray(times, dtype=float), np.asarray(angles, dtype=float)
+        if len(times) >= 2:
+            self._readback = (times, angles)
+
+    def angle_at(self, t):
+        t = np.asarray(t, dtype=float)
+        if self._readback is not None:
+            return np.interp(t, *self._readback)
+        travelled = np.clip((t - self.t_move) * self.rate, 0, abs(self.stop - self.start))
+        return self.start + np.sign(self.stop - self.start) * travelled
+
+
+def bin_sweep(angles, values, edges, V0, db_factor=10, batches=10):
+    """
+    Samples (in Aufnahmereihenfolge) in Winkel-Bins [edges[i], edges[i+1])
+    zusammenfassen. Gibt ein dict mit angle (Bin-Mitte), mean_db, std_db,
+    se_db, mean_raw, std_raw, n und bin (Nummer des Bins) zurück, leere
+    Bins fallen weg. Alles per np.bincount, nur se_db nicht: benachbarte
+    Samples sind korreliert, std/sqrt(n) wäre viel zu klein. Daher wird
+    jeder Bin in batches aufeinanderfolgende Teile zerlegt und deren
+    Mittel gehen wie bei der Schritt-Messung durch BatchMeans, vorher
+    ohne den linearen Verlauf über den Bin (der ist Diagramm, kein Rauschen).
+    """
+    angles = np.asarray(angles, dtype=float)
+    values = np.asarray(values, dtype=float)
+    idx = np.searchsorted(edges, angles, side="right") - 1
+    inside = (idx >= 0) & (idx < len(edges) - 1)
+    idx, values, angles = idx[inside], values[inside], angles[inside]
+    n_bins = len(edges) - 1
+    n = np.bincount(idx, minlength=n_bins)
+    full = n > 0
+
+    def mean_std(x):
+        mean = np.bincount(idx, weights=x, minlength=n_bins) / np.maximum(n, 1)
+        # zweiter Durchlauf über die Abweichungen vom Bin-Mittel (stabiler als E[x²] - E[x]²)
+        var = np.bincount(idx, weights=(x - mean[idx]) ** 2, minlength=n_bins) / np.maximum(n, 1)
+        return mean[full], np.sqrt(var[full])
+
+    db = to_db(values, V0, db_factor)
+    mean_raw, std_raw = mean_std(values)
+    mean_db, std_db = mean_std(db)
+    # Steigung von dB über den Winkel pro Bin (kleinste Quadrate), für se_db abziehen
+    dx = angles - (np.bincount(idx, weights=angles, minlength=n_bins) / np.maximum(n, 1))[idx]
+    sxx = np.bincount(idx, weights=dx ** 2, minlength=n_bins)
+    sxy = np.bincount(idx, weights=dx * db, minlength=n_bins)
+    slope = np.divide(sxy, sxx, out=np.zeros(n_bins), where=sxx > 0)
+    centers = 0.5 * (edges[:-1] + edges[1:])
+    return {"angle": centers[full], "mean_db": mean_db, "std_db": std_db,
+            "se_db": batch_se(idx, db - slope[idx] * dx, n, batches)[full],
+            "mean_raw": mean_raw, "std_raw": std_raw, "n": n[full], "bin": np.flatnonzero(full)}
+
+
+def batch_se(idx, x, n, batches=10):
+    """
+    Standardfehler des Mittels pro Bin über BatchMeans: die Samples eines
+    Bins (Reihenfolge bleibt) in batches gleich lange Teile, Teilmittel per
+    np.bincount. inf für Bins mit weniger als 4 Teilen.
+    """
+    n_bins = len(n)
+    order = np.argsort(idx, kind="stable")
+    rank = np.empty(len(idx), dtype=np.int64)
+    rank[order] = np.arange(len(idx)) - np.repeat(np.cumsum(n) - n, n)
+    part = idx * batches + rank * batches // n[idx]
+    count = np.bincount(part, minlength=n_bins * batches).reshape(n_bins, batches)
+    sums = np.bincount(part, weights=x, minlength=n_bins * batches).reshape(n_bins, batches)
+    se = np.full(n_bins, np.inf)
+    for b in np.flatnonzero(n):
+        bm = BatchMeans()
+        for s, c in zip(sums[b], count[b]):
+            if c:
+                bm.update(s / c)
+        se[b] = bm.se
+    return se
+
+
+def bin_channels(angles, values, edges):
+    """
+    Weitere Kanäle (Kanäle x Samples, NaN = Ausreißer) in dieselben Winkel-Bins:
+    mean und std pro Kanal und Bin, Form (Kanäle x Bins), alle Bins (leer = NaN).
+    Ein np.bincount für alle Kanäle, Bin-Nummer + Kanal * Anzahl Bins.
+    """
+    values = np.asarray(values, dtype=float)
+    n_ch, n_bins = values.shape[0], len(edges) - 1
+    idx = np.searchsorted(edges, np.asarray(angles, dtype=float), side="right") - 1
+    valid = (idx >= 0) & (idx < n_bins) & ~np.isnan(values)
+    flat = (idx + n_bins * np.arange(n_ch)[:, None])[valid]
+    x = values[valid]
+    n = np.bincount(flat, minlength=n_ch * n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(flat, weights=x, minlength=n_ch * n_bins) / n
+        var = np.bincount(flat, weights=(x - mean[flat]) ** 2, minlength=n_ch * n_bins) / n
+    return mean.reshape(n_ch, n_bins), np.sqrt(var).reshape(n_ch, n_bins)
+
+
+# ========================== #
+# ==== VERGLEICH ==== #
+# ========================== #
+if __name__ == "__main__":
+    # python -m masterarbeit.sweep  (aus dem Ordner Python/)
+    # Sweep gegen Schritt-Messung am simulierten Horn, gleicher Aufbau.
+    import tempfile
+    import time
+    from functools import partial
+    from masterarbeit.motor import MotorModel, SimulatedMotor
+    from masterarbeit.planner import MotionPlanner, SpeedModel
+    from masterarbeit.scan import Scan, run_until_idle
+    from masterarbeit.sources import SimulatedSource, VirtualClock, horn_pattern
+
+    pattern = partial(horn_pattern, boresight=1.7)
+    tables = {}
+    for mode in ("stepped", "sweep"):
+        clock = VirtualClock()
+        model = MotorModel(clock)
+        source = SimulatedSource(clock, motor=model, pattern=pattern, seed=1)
+        scan = Scan(SimulatedMotor(model), clock, sample_rate=source.sample_rate, source=source,
+                    log=lambda *a: None)
+        scan.planner = MotionPlanner(SpeedModel.from_model(model))
+        scan.V0, scan.best_angle = float(pattern(1.7)), 1.7
+        source.start()
+        t_wall = time.perf_counter()
+        scan.start_sweep() if mode == "sweep" else scan.start_measure()
+        with tempfile.TemporaryDirectory() as tmp:
+            scan.save = partial(Scan.save, scan, tmp)
+            run_until_idle(scan, source)
+        tables[mode] = {k: np.asarray(v) for k, v in scan.results.items()}
+        print(f"{mode:8s}: {clock.now() / 60:5.1f} min simuliert ({time.perf_counter() - t_wall:.1f} s gerechnet), "
+              f"{len(scan.results['angle'])} Winkel")
+
+    step, sweep = tables["stepped"], tables["sweep"]
+    common, i, j = np.intersect1d(np.round(step["angle"], 3), np.round(sweep["angle"], 3), return_indices=True)
+    diff = sweep["mean_db"][j] - step["mean_db"][i]
+    main = step["mean_db"][i] > -10
+    print(f"Sweep - Schritt: Hauptkeule (> -10 dB) max {np.abs(diff[main]).max():.2f} dB, "
+          f"gesamt median {np.median(np.abs(diff)):.2f} dB, max {np.abs(diff).max():.2f} dB")
@@ -4,7 +4,6 @@ Zweck: Liest analogen Input eines NI-DAQ Geräts (z. B. NI USB-6251),
 zeigt ihn live an, und erlaubt gesteuerte Aufzeichnung & Speicherung.
 """
 
-import nidaqmx # type: ignore
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Button, TextBox, CheckButtons
@@ -12,6 +11,11 @@ import keyboard # type: ignore
 import time
 from datetime import datetime
 import numpy as np
+from masterarbeit.outliers import StreamingHampel
+from masterarbeit.ringbuffer import RingBuffer
+from masterarbeit.acquisition import AcquisitionEngine
+from masterarbeit.liveplot import BlitRenderer
+from masterarbeit.decimate import decimate, display_points
 
 # ========================== #
 # ==== KONFIGURATION ==== #
@@ -22,24 +26,39 @@ DISPLAY_WINDOW = 0.5        # Sekunden pro Live-Anzeige
 SAVE_FILE = "../data/data.csv"  # Name der Ausgabedatei
 SAVE_DURATION = 20          # Sekunden Messzeit bei Speicherung
 FILENAME = "Characterisation"
+FPS = 20                    # höchstens so viele Bilder pro Sekunde
+DISPLAY_DECIMATION = "minmax"   # Ausdünnen für die Anzeige: "minmax" oder "lttb"
 
 V0 = None
 mean_list = []
 std_list= []
 
+def buffer_capacity():
+    """
+    Platz für eine ganze Aufnahme plus überstehende Blöcke am Ende. Die Dauer
+    zählt nach Sample-Takt ab dem ersten Block nach dem Tastendruck, auch
+    mit vielen Blöcken in der Warteschlange kommen nicht mehr Samples zusammen.
+    """
+    return int(SAMPLE_RATE * (SAVE_DURATION + 2 * DISPLAY_WINDOW)) + 1
+
+# Aufnahmen beginnen beim ersten Block ab *_start_index (Sample beim Tastendruck),
+# *_start_time ist None, bis dieser Block da ist
 is_ref_mode = False
+ref_start_index = None
 ref_start_time = None
-ref_buffer = []
+ref_buffer = RingBuffer(buffer_capacity())
 
 is_recording = False
+rec_start_index = None
 rec_start_time = None
-rec_buffer = []
+rec_buffer = RingBuffer(buffer_capacity())
+rec_filter = StreamingHampel(k=15, t0=3)  # filtert die Aufnahme blockweise mit
 # ========================== #
 # ==== INITIALISIERUNG ==== #
 # ========================== #
-task = nidaqmx.Task()
-task.ai_channels.add_ai_voltage_chan(CHANNEL)
-task.timing.cfg_samp_clk_timing(rate=SAMPLE_RATE)
+# Kontinuierliche Aufnahme im eigenen Thread, ein Block = ein Anzeigefenster
+engine = AcquisitionEngine(CHANNEL, SAMPLE_RATE, int(SAMPLE_RATE*DISPLAY_WINDOW))
+engine.start()
 
 plt.ion()  # interaktiver Modus
 fig, ax = plt.subplots()
@@ -62,24 +81,6 @@ print("Taste 's' drücken, um die Messung als .csv abzuspeichern. \n")
 # ==== FUNKTIONEN ==== #
 # ========================== #
 
-def remove_outliers(data, k=15, t0=3):
-    """Entfernt Ausreißer aus den Daten"""
-    data = np.array(data)
-    mask =np.ones(len(data), dtype=bool)
-    for i in range(len(data)):
-        left = max(0, i-k)
-        right = min(len(data), i+k+1)
-        window = data[left:right]
-        
-        med = np.median(window)
-        mad = np.median(np.abs(window - med))
-        if mad == 0:
-            continue
-        z = 0.6745 * (data[i] - med) / mad
-        if np.abs(z) > t0:
-            mask[i] = False
-    return data[mask]
-
 def save_to_csv(filename):
     """Speichert Messdaten in CSV."""
     timestamp = datetime.now().strftime("%Y-%m-%d")
@@ -88,19 +89,40 @@ def save_to_csv(filename):
     df.to_csv(filename, index=False)
     print(f"Daten gespeichert in: {filename}")
 
+def resize_buffers():
+    """Ringpuffer neu anlegen, wenn Sample Rate oder Display Window geändert wurden (nicht während einer Aufnahme)."""
+    global ref_buffer, rec_buffer
+    if buffer_capacity() > ref_buffer.capacity:
+        ref_buffer = RingBuffer(buffer_capacity())
+        rec_buffer = RingBuffer(buffer_capacity())
+
+def busy():
+    """Während Referenz oder Messung dürfen Rate und Blockgröße nicht wechseln (Marke und Zeiten gingen verloren)."""
+    if is_ref_mode or is_recording:
+        print("Erst die laufende Aufnahme abwarten, Eingabe ignoriert.")
+        return True
+    return False
+
 def update_sample_rate(text):
     global SAMPLE_RATE
+    if busy():
+        return
     try:
         SAMPLE_RATE = float(text)
-        task.timing.cfg_samp_clk_timing(rate=SAMPLE_RATE)
+        engine.restart(sample_rate=SAMPLE_RATE, block_size=int(SAMPLE_RATE*DISPLAY_WINDOW))
+        resize_buffers()
         print(f"Neue Sample_Rate: {SAMPLE_RATE} Hz")
     except ValueError:
         print("Ungültige Eingabe für Sample_Rate")
 
 def update_display_window(text):
     global DISPLAY_WINDOW
+    if busy():
+        return
     try:
         DISPLAY_WINDOW = float(text)
+        engine.restart(block_size=int(SAMPLE_RATE*DISPLAY_WINDOW))
+        resize_buffers()
         print(f"Neues Display_Window: {DISPLAY_WINDOW}")
     except ValueError:
         print("Ungültige Eingabe für Display_Window")
@@ -111,7 +133,7 @@ def update_yaxis_label():
         ax.set_ylabel("Spannung (V)")
     else:
         ax.set_ylabel("Voltage level (db)")
-    fig.canvas.draw_idle() 
+    renderer.invalidate()
     
 # ========================== #
 # ==== GUI-ELEMENTE ==== #
@@ -132,26 +154,28 @@ ax_window = plt.axes([0.3, 0.05, 0.15, 0.05])
 box_window = TextBox(ax_window, "", initial=str(DISPLAY_WINDOW))
 box_window.on_submit(update_display_window)
 
+# nur Kurve und Texte werden pro Frame neu gezeichnet, der Rest ist gespeicherter Hintergrund
+renderer = BlitRenderer(fig, [line, status_text, mean_text, std_text], fps=FPS)
+plt.show(block=False)
+
 # ========================== #
 # ==== GUI-Tastatur ==== #
 # ========================== #
 def on_key(event):
-    global is_ref_mode, ref_start_time, ref_buffer
-    global is_recording, rec_start_time, rec_buffer
+    global is_ref_mode, ref_start_index, ref_start_time
+    global is_recording, rec_start_index, rec_start_time
     if event.key == 'q':
         print("Beenden durch Benutzer.")
         plt.close(fig)
     elif event.key == 'k':
         print("Referenzwertsetzen durch Benutzer.")
         is_ref_mode = True
-        ref_start_time = time.time()
-        ref_buffer = []
+        ref_start_index, ref_start_time = engine.sample_index(), None
         status_text.set_text("Keine Live-Daten. Referenzmessung läuft...")
     elif event.key == 'm':
         print("Messpunkt aufnehmen durch Benutzer.")
         is_recording = True
-        rec_start_time = time.time()
-        rec_buffer = []
+        rec_start_index, rec_start_time = engine.sample_index(), None
         status_text.set_text("Keine Live-Daten. Messung läuft...")
     elif event.key == 's':
         print("Messdaten speichern durch Benutzer.")
@@ -164,70 +188,92 @@ fig.canvas.mpl_connect('key_press_event', on_key)
 # ========================== #
 update_yaxis_label()
 time_axis = np.linspace(0, DISPLAY_WINDOW)
-line.set_xdata(0, DISPLAY_WINDOW)
 try:
     while plt.fignum_exists(fig.number):
-        data = task.read(number_of_samples_per_channel=int(SAMPLE_RATE*DISPLAY_WINDOW))
-        data = np.array(data)
+        block = engine.get_block(timeout=1 / FPS)
+        if block is None:
+            renderer.draw()
+            continue
+        data = block.data
+        now = engine.sample_time(block.start + len(data))  # Zeit laut Sample-Takt
         
         # Referenzmessung
         if is_ref_mode:
-            ref_buffer.extend(data)
-            elapsed = time.time() - ref_start_time
+            if block.start < ref_start_index:
+                continue    # noch vor dem Tastendruck aufgenommen
+            if ref_start_time is None:
+                ref_start_time = engine.sample_time(block.start)
+                ref_buffer.mark()
+            ref_buffer.append_block(data)
+            elapsed = now - ref_start_time
             status_text.set_text(f"Referenzmessung läuft... {(SAVE_DURATION - elapsed):.0f} s.")
             if elapsed >= SAVE_DURATION:
-                V0 = np.mean(ref_buffer)
-                print(f"Referenzwert gesetzt: V0 = {V0:.6f} V")
                 is_ref_mode = False
+                try:
+                    V0 = np.mean(ref_buffer.since_mark())
+                    print(f"Referenzwert gesetzt: V0 = {V0:.6f} V")
+                except OverflowError as e:
+                    print(f"Referenzmessung verworfen: {e}")
                 status_text.set_text("")
                 update_yaxis_label()
-            plt.pause(0.01)
+            renderer.draw()
             continue
         
         # Aufnahmemodus
         if is_recording:
             if V0 is None:
                 raise ValueError("V0 ist noch nicht gesetzt. Erst Referenzmessung durchführen.")
-            data_db = 20 * np.log10(np.maximum(np.abs(np.array(data))/V0, 1e-12))
-            rec_buffer.extend(data_db)
-            elapsed = time.time() - rec_start_time
+            if block.start < rec_start_index:
+                continue    # noch vor dem Tastendruck aufgenommen
+            if rec_start_time is None:
+                rec_start_time = engine.sample_time(block.start)
+                rec_buffer.mark()
+                rec_filter.reset()
+            data_db = 20 * np.log10(np.maximum(np.abs(data)/V0, 1e-12))
+            rec_buffer.append_block(rec_filter.feed(data_db))
+            elapsed = now - rec_start_time
             status_text.set_text(f"Messung läuft... {(SAVE_DURATION - elapsed):.0f} s")
             if elapsed >= SAVE_DURATION:
-                cleaned_data = remove_outliers(rec_buffer)
+                is_recording = False
+                rec_buffer.append_block(rec_filter.flush())
+                try:
+                    cleaned_data = rec_buffer.since_mark()
+                except OverflowError as e:
+                    print(f"Messpunkt verworfen: {e}")
+                    status_text.set_text("")
+                    renderer.draw()
+                    continue
                 mean_list.append(np.mean(cleaned_data))
                 std_list.append(np.std(cleaned_data))
                 mean_text.set_text(f"Mean: {np.mean(cleaned_data):.4f} V")
                 std_text.set_text(f"Std: {np.std(cleaned_data):.4f} V")
                 print("Messpunkte gespeichert")
-                is_recording = False
                 status_text.set_text("")
-            plt.pause(0.01)
+            renderer.draw()
             continue
         
         if V0 is None:
-            line.set_ydata(data)
-            ax.set_ylim(min(data)-0.1, max(data)+0.1)
-            time_axis = np.linspace(0, DISPLAY_WINDOW, len(data))
-            mean_text.set_text(f"Mean: {np.mean(data):.4f} V")
-            std_text.set_text(f"Std: {np.std(data):.4f} V")
+            display_data = data
         else:
-            data_db = 20 * np.log10(np.maximum(np.abs(np.array(data))/V0, 1e-12))
-            line.set_ydata(data_db)
-            ax.set_ylim(min(data_db)-1, max(data_db)+1)
-            time_axis = np.linspace(0, DISPLAY_WINDOW, len(data_db))
-            mean_text.set_text(f"Mean: {np.mean(data_db):.4f} V")
-            std_text.set_text(f"Std: {np.std(data_db):.4f} V")
-        line.set_xdata(time_axis)
-        ax.set_xlim(0, DISPLAY_WINDOW)
-        fig.canvas.draw_idle()
-        
-        plt.pause(0.01)
+            display_data = 20 * np.log10(np.maximum(np.abs(data)/V0, 1e-12))
+        renderer.set_ylim(ax, display_data.min(), display_data.max())
+        mean_text.set_text(f"Mean: {np.mean(display_data):.4f} V")
+        std_text.set_text(f"Std: {np.std(display_data):.4f} V")
+        if len(time_axis) != len(data):  # nur nach Änderung von Rate/Fenster neu
+            time_axis = np.linspace(0, DISPLAY_WINDOW, len(data))
+            ax.set_xlim(0, DISPLAY_WINDOW)
+            renderer.invalidate()
+        # höchstens ca. 2 Punkte pro Pixel an matplotlib, Ausreißer bleiben sichtbar
+        line.set_data(*decimate(time_axis, display_data, display_points(ax), DISPLAY_DECIMATION))
+        renderer.draw()
 
 except KeyboardInterrupt:
     print("Messung manuell abgebrochen.")
 
 finally:
-    task.close()
+    engine.stop()
+    print(engine.status())
+    print(renderer.status())
     plt.ioff()
     plt.close(fig)
     print("Task beendet, Fenster geschlossen.")
\ No newline at end of file